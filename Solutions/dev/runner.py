@@ -18,6 +18,7 @@ from util.subparsers import test as testSubparser
 from util.subparsers import package as packageSubparser
 from util.subparsers import validate as validateSubparser
 from util.subparsers import template as templateSubparser
+from util.subparsers import cases as casesSubparser
 
 def parse_arguments(arguments, output=sys.stdout):
     argParser = PCArgParseFactory.get_argument_parser(output)
@@ -39,6 +40,7 @@ def parse_arguments(arguments, output=sys.stdout):
     packageSubparser.add_to_subparser_object(subparsers, baseParser)
     validateSubparser.add_to_subparser_object(subparsers, baseParser)
     templateSubparser.add_to_subparser_object(subparsers, baseParser)
+    casesSubparser.add_to_subparser_object(subparsers, baseParser)
 
     if len(arguments) == 0:
         argParser.print_help()
@@ -6,9 +6,15 @@
 # Contains tests for util/case.py
 ################################################################################
 import unittest
-from util.case import CaseType, Case, KnownCase
+import json
+import os
+import sys
+import tempfile
+from util.case import CaseType, Case, CaseIndex, KnownCase
 from util.pathmapper import PathMapper
 from util.definitions import Definitions
+from util.matcher import Matcher
+from util.variables import Variables
 from util import case
 from unittest import mock
 
@@ -86,3 +92,278 @@ class TestKnownCase(unittest.TestCase):
         self.assertEqual(testKnownCase.inputContents, 'input')
         self.assertEqual(testKnownCase.outputContents, 'output')
 
+    def test_lazy_contents(self):
+        """
+        Ensure a KnownCase given where a case is in its case file reads and
+        decodes its contents only once they are used, and that reading cases
+        from a file does not decode them
+        """
+        caseText = '{"output": 12, "input": {"b": [1, 2], "a": "é"}}'
+        with tempfile.TemporaryDirectory() as tempDir:
+            casePath = os.path.join(tempDir, 'cases.json')
+            with open(casePath, 'wb') as caseFile:
+                caseFile.write(b'{"cases": {"0": ' + caseText.encode('utf-8') +
+                        b', "1": {"input": 3}, "2": {"input": [nul]}}}')
+
+            knownCase = KnownCase('caseType', 1, 0, None, None,
+                    caseSpan=(casePath, 16, len(caseText.encode('utf-8'))))
+            self.assertFalse(hasattr(knownCase, '__dict__'))
+            self.assertIsNone(knownCase._inputContents)
+            self.assertEqual(knownCase.outputContents, '12')
+            self.assertEqual(knownCase.inputContents, '["\\u00e9",[1,2]]')
+            self.assertIsNone(knownCase._undecoded)
+
+            cases = list(case.iter_cases_from_json_file(casePath, 1,
+                'caseType'))
+            self.assertEqual(cases[0]._undecoded[0], casePath)
+            self.assertEqual([type(testCase) for testCase in cases],
+                    [KnownCase, Case, Case])
+            self.assertEqual([testCase.inputContents for testCase in
+                cases[:2]], ['["\\u00e9",[1,2]]', '[3]'])
+            self.assertEqual(cases[0].outputContents, '12')
+            with self.assertRaises(Exception):
+                cases[2].inputContents
+
+
+class TestGetAllCases(unittest.TestCase):
+
+    @mock.patch.object(case, '_get_file_problemnumber_type_tuple')
+    @mock.patch('util.case.fileops')
+    def test_get_case_file_index(self, mocked_case_fileops,
+            mocked_get_tuple):
+        """
+        Ensure case._get_case_file_index maps files by problem from names alone
+        """
+        mocked_case_fileops.get_files_in_dir.return_value = [
+                'problem2_sample.json', 'problem1_sample.json',
+                'problem1_corner.json', 'problem1_data.json', 'README']
+        fileTuples = {'problem1_sample.json': (1, CaseType.SAMPLE),
+                      'problem1_corner.json': (1, CaseType.CORNER_CASE),
+                      'problem2_sample.json': (2, CaseType.SAMPLE)}
+        mocked_get_tuple.side_effect = lambda path: fileTuples.get(path)
+
+        self.assertEqual(case._get_case_file_index('dir'), {
+            1: [('problem1_corner.json', CaseType.CORNER_CASE),
+                ('problem1_sample.json', CaseType.SAMPLE)],
+            2: [('problem2_sample.json', CaseType.SAMPLE)]})
+        mocked_case_fileops.get_files_in_dir.assert_called_with('dir')
+
+    @mock.patch.object(case, '_get_cases_from_json_file_given_problem_type')
+    @mock.patch.object(case, '_get_case_file_index')
+    def test_get_all_cases_for_problems(self, mocked_get_index,
+            mocked_get_cases):
+        """
+        Ensure case._get_all_cases only opens files of the requested problems
+        """
+        mocked_get_index.return_value = {
+                1: [('problem1_sample.json', CaseType.SAMPLE)],
+                2: [('problem2_sample.json', CaseType.SAMPLE)],
+                3: [('problem3_sample.json', CaseType.SAMPLE)]}
+        mocked_get_cases.side_effect = lambda path, number, caseType: [path]
+
+        self.assertEqual(case._get_all_cases('dir', problemNumbers={'1', 3}),
+                {1: ['problem1_sample.json'], 3: ['problem3_sample.json']})
+        self.assertEqual(mocked_get_cases.call_count, 2)
+
+        self.assertEqual(case._get_all_cases('dir', problemNumber=2),
+                {2: ['problem2_sample.json']})
+
+class TestCaseIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.definitions = {'case_naming': 'problem{problem}_{caseType}',
+                'sample_case_type': 'sample', 'corner_case_type': 'corner',
+                'generated_case_type': 'general'}
+        patcher = mock.patch.object(Definitions, 'get_value',
+                side_effect=lambda key: self.definitions.get(key))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # The case naming variables are read from conf/variables.json
+        patcher = mock.patch.object(PathMapper, '_rootPath',
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # ...and must not stay loaded for the tests that follow
+        patcher = mock.patch.object(Variables, '_variablesDict', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        tempDir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempDir.cleanup)
+        self.caseDir = os.path.join(tempDir.name, 'cases')
+        os.mkdir(self.caseDir)
+        self.indexPath = os.path.join(tempDir.name, 'cases.json')
+
+    def _write_cases(self, fileName: str, caseCount: int, mtime: int=1):
+        path = os.path.join(self.caseDir, fileName)
+        with open(path, 'w') as caseFile:
+            json.dump({'cases': {str(number): {'input': number, 'output': number}
+                for number in range(caseCount)}}, caseFile)
+        # Old enough to be trusted by modification time
+        os.utime(path, (mtime, mtime))
+
+    def _get_all_cases(self, **kwargs):
+        caseIndex = CaseIndex(self.indexPath)
+        cases = case._get_all_cases(self.caseDir, caseIndex=caseIndex, **kwargs)
+        caseIndex.save()
+        return cases, CaseIndex(self.indexPath)
+
+    def test_index(self):
+        """
+        Ensure the CaseIndex finds the case files of each problem and records
+        how many cases were loaded from them
+        """
+        self._write_cases('problem1_sample.json', 2)
+        self._write_cases('problem1_corner.json', 1)
+        self._write_cases('problem2_general.json', 3)
+        self._write_cases('problem1_data.json', 5)
+        self._write_cases('README', 0)
+
+        cases, caseIndex = self._get_all_cases(problemNumber=1)
+        self.assertEqual(len(cases[1]), 3)
+        self.assertEqual(caseIndex.get_case_count(1), 3)
+        self.assertIsNone(caseIndex.get_case_count(2))
+
+        caseIndex.update(self.caseDir)
+        self.assertEqual(caseIndex.get_case_files(), {
+            1: [(os.path.join(self.caseDir, 'problem1_corner.json'),
+                CaseType.CORNER_CASE),
+                (os.path.join(self.caseDir, 'problem1_sample.json'),
+                    CaseType.SAMPLE)],
+            2: [(os.path.join(self.caseDir, 'problem2_general.json'),
+                CaseType.GENERATED)]})
+
+    def test_incremental_update(self):
+        """
+        Ensure only changed files are indexed again
+        """
+        self._write_cases('problem1_sample.json', 2)
+        self._write_cases('problem2_sample.json', 1)
+        self._get_all_cases()
+
+        self._write_cases('problem1_sample.json', 4, mtime=2)
+        os.remove(os.path.join(self.caseDir, 'problem2_sample.json'))
+        self._write_cases('problem3_sample.json', 1)
+        with mock.patch.object(case, '_get_file_problemnumber_type_tuple',
+                wraps=case._get_file_problemnumber_type_tuple) as mocked_get_tuple:
+            cases, caseIndex = self._get_all_cases()
+            self.assertEqual(sorted(os.path.basename(call.args[0]) for call in
+                mocked_get_tuple.call_args_list),
+                ['problem1_sample.json', 'problem3_sample.json'])
+        self.assertEqual(sorted(cases), [1, 3])
+        self.assertEqual(caseIndex.get_case_count(1), 4)
+
+        # Touching a file keeps its case count, renaming the cases rebuilds
+        self._write_cases('problem3_sample.json', 1, mtime=3)
+        caseIndex.update(self.caseDir)
+        self.assertEqual(caseIndex.get_case_count(3), 1)
+        self.definitions['case_naming'] = 'case{problem}_{caseType}'
+        caseIndex.update(self.caseDir)
+        self.assertEqual(caseIndex.get_case_files(), {})
+
+    def test_iter_cases(self):
+        """
+        Ensure case.iter_cases yields the cases get_all_cases loads, in the
+        same order, and only of the requested case type
+        """
+        self.definitions.update({'test_directory': self.caseDir,
+            'case_index_file': self.indexPath})
+        self._write_cases('problem1_sample.json', 2)
+        self._write_cases('problem1_general.json', 3)
+        self._write_cases('problem2_sample.json', 1)
+
+        def get_case_tuples(cases):
+            return [(testCase.caseType, testCase.caseNumber,
+                testCase.inputContents, testCase.outputContents)
+                for testCase in cases]
+
+        cases = case.iter_cases(1)
+        self.assertEqual(get_case_tuples(cases),
+                get_case_tuples(case.get_all_cases(problemNumber=1)[1]))
+        self.assertEqual(get_case_tuples(case.iter_cases(1, CaseType.SAMPLE)),
+                [(CaseType.SAMPLE, 0, '[0]', '0'), (CaseType.SAMPLE, 1, '[1]',
+                    '1')])
+        self.assertEqual(list(case.iter_cases(3)), [])
+
+        caseStreams = case.get_case_streams([1, 2, 3])
+        self.assertEqual(sorted(caseStreams), [1, 2])
+        self.assertEqual(len(list(caseStreams[2])), 1)
+        self.assertEqual(len(list(caseStreams[2])), 1)
+
+        # A stream's files are parsed once, however often it is iterated
+        allCases = case.get_all_cases(problemNumber=1)[1]
+        with mock.patch.object(case, 'iter_cases_from_json_file',
+                side_effect=case.iter_cases_from_json_file) as mocked_iter:
+            self.assertTrue(caseStreams[1])
+            self.assertEqual(mocked_iter.call_count, 1)
+            firstCases = list(caseStreams[1])
+            self.assertEqual(get_case_tuples(caseStreams[1]),
+                    get_case_tuples(allCases))
+            self.assertEqual(list(caseStreams[1]), firstCases)
+        self.assertEqual(mocked_iter.call_count, 2)
+        self.assertFalse(case.CaseStream(3, []))
+
+    def test_case_pack(self):
+        """
+        Ensure the CasePack holds the cases get_all_cases loads from the JSON
+        files, and that it is rebuilt once a case file changes
+        """
+        packPath = os.path.join(os.path.dirname(self.caseDir), 'cases.pack')
+        self.definitions.update({'test_directory': self.caseDir,
+            'case_index_file': self.indexPath})
+        self._write_cases('problem1_sample.json', 2)
+        self._write_cases('problem2_general.json', 3)
+        with open(os.path.join(self.caseDir, 'problem2_corner.json'),
+                'w') as caseFile:
+            json.dump({'cases': {'1': {'input': 'é'}}}, caseFile)
+        os.utime(caseFile.name, (1, 1))
+
+        def get_case_tuples(cases):
+            return [(type(testCase), testCase.caseType, testCase.caseNumber,
+                testCase.inputContents, getattr(testCase, 'outputContents',
+                    None)) for testCase in cases]
+
+        jsonCases = case.get_all_cases()
+        self.assertIsNone(case.CasePack.load(self.caseDir))
+        self.definitions['case_pack_file'] = packPath
+        self.assertEqual(case.compile_case_pack(packPath), 6)
+        casePack = case.CasePack.load(self.caseDir)
+        self.assertTrue(casePack.is_up_to_date(self.caseDir))
+        packCases = casePack.get_cases()
+        self.assertEqual(sorted(packCases), sorted(jsonCases))
+        # A packed output is compared encoded and only decoded once it is used
+        self.assertIsInstance(packCases[1][0].get_encoded_output(), memoryview)
+        self.assertIsNone(packCases[1][0].get_decoded_output())
+        for problemNumber in jsonCases:
+            self.assertEqual(get_case_tuples(packCases[problemNumber]),
+                    get_case_tuples(jsonCases[problemNumber]))
+        self.assertEqual(list(casePack.get_cases([2])), [2])
+        self.assertEqual(packCases[1][0].get_decoded_output(), '0')
+        self.assertEqual(get_case_tuples(case.get_all_cases()[1]),
+                get_case_tuples(jsonCases[1]))
+
+        self._write_cases('problem1_sample.json', 4, mtime=2)
+        self.assertFalse(casePack.is_up_to_date(self.caseDir))
+        with mock.patch('builtins.print') as mocked_print:
+            self.assertEqual(len(case.get_all_cases()[1]), 4)
+        mocked_print.assert_called_once_with('Cases changed since {} was '
+                'compiled, recompiling it'.format(packPath), file=sys.stderr)
+        self.assertTrue(case.CasePack(packPath).is_up_to_date(self.caseDir))
+
+    def test_file_name_memo(self):
+        """
+        Ensure case file names are matched once while the case naming is
+        unchanged
+        """
+        path = os.path.join(self.caseDir, 'problem4_corner.json')
+        with mock.patch.object(Matcher, 'get_variable_value',
+                autospec=True, side_effect=Matcher.get_variable_value) as \
+                        mocked_get_variable_value:
+            for _ in range(2):
+                self.assertEqual(case._get_file_problemnumber_type_tuple(path),
+                        (4, CaseType.CORNER_CASE))
+            self.assertEqual(mocked_get_variable_value.call_count, 2)
+
+            self.definitions['case_naming'] = 'problem{problem}_corner'
+            self.assertEqual(case._get_file_problemnumber_type_tuple(path),
+                    (4, CaseType.GENERATED))
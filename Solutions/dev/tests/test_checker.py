@@ -0,0 +1,99 @@
+################################################################################
+# Filename: tests/test_checker.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains tests for util/checker.py
+################################################################################
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+from util import checker
+from util.case import KnownCase
+from util.comparison import OutputComparator
+from util.definitions import Definitions
+from util.perror import PyCException
+
+class TestCheckers(unittest.TestCase):
+
+    def setUp(self):
+        self.case = KnownCase(0, 1, 1, '3', '1.5 x\n2.0')
+
+    def test_exact_checker(self):
+        """
+        Ensure ExactChecker only accepts the expected output
+        """
+        exactChecker = checker.ExactChecker()
+        self.assertTrue(exactChecker.check(self.case, '1.5 x\n2.0'))
+        self.assertFalse(exactChecker.check(self.case, '1.5 x 2.0'))
+
+        comparator = OutputComparator(self.case.outputContents)
+        comparator.feed(b'1.5 x\n2.0\n')
+        self.assertTrue(exactChecker.check(self.case, comparator.get_output(),
+            comparator))
+
+    def test_token_checker(self):
+        """
+        Ensure TokenChecker ignores how tokens are spaced
+        """
+        tokenChecker = checker.TokenChecker()
+        self.assertTrue(tokenChecker.check(self.case, ' 1.5\tx 2.0\n\n'))
+        self.assertFalse(tokenChecker.check(self.case, '1.5 x 2.00'))
+        self.assertFalse(tokenChecker.check(self.case, '1.5 x'))
+
+    def test_float_checker(self):
+        """
+        Ensure FloatChecker accepts numbers within its tolerance only
+        """
+        floatChecker = checker.FloatChecker(1e-3)
+        self.assertTrue(floatChecker.check(self.case, '1.5 x 2'))
+        self.assertTrue(floatChecker.check(self.case, '1.5004 x 1.9996'))
+        self.assertFalse(floatChecker.check(self.case, '1.51 x 2'))
+        self.assertFalse(floatChecker.check(self.case, '1.5 y 2'))
+        self.assertFalse(floatChecker.check(self.case, '1.5 x 2 3'))
+        self.assertTrue(floatChecker.check(KnownCase(0, 1, 1, '', '2e9'),
+            '2000001000'))
+
+    def test_external_checker(self):
+        """
+        Ensure ExternalChecker passes the case files to its program and goes
+        by its exit code
+        """
+        checkScript = ('#!{}\n'
+                       'import sys\n'
+                       'output, expected = (open(path).read().lower()\n'
+                       '    for path in sys.argv[2:])\n'
+                       'sys.exit(0 if output == expected else 1)\n').format(
+                               sys.executable)
+        with tempfile.TemporaryDirectory() as tempDir:
+            checkerPath = os.path.join(tempDir, 'check')
+            with open(checkerPath, 'w') as checkerFile:
+                checkerFile.write(checkScript)
+            os.chmod(checkerPath, 0o755)
+
+            externalChecker = checker.ExternalChecker(checkerPath)
+            self.assertTrue(externalChecker.check(self.case, '1.5 X\n2.0'))
+            self.assertFalse(externalChecker.check(self.case, '1.5 y\n2.0'))
+
+        with self.assertRaises(checker.CheckerError):
+            checker.ExternalChecker(checkerPath).check(self.case, '')
+
+    def test_get_checker(self):
+        """
+        Ensure get_checker builds each problem's checker from the definitions
+        """
+        definitions = {'checker': 'tokens', 'problem2_checker': 'float',
+                'problem2_float_tolerance': 0.5, 'problem3_checker': 'external',
+                'problem4_checker': 'nonsense'}
+        with mock.patch.object(Definitions, 'get_value',
+                side_effect=lambda key: definitions.get(key)), \
+                mock.patch.object(checker, '_checkers', {}):
+            self.assertIsInstance(checker.get_checker(1), checker.TokenChecker)
+            self.assertIs(checker.get_checker('1'), checker.get_checker(1))
+            self.assertEqual(checker.get_checker(2).tolerance, 0.5)
+            with self.assertRaises(PyCException):
+                checker.get_checker(3)
+            with self.assertRaises(PyCException):
+                checker.get_checker(4)
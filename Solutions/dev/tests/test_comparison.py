@@ -0,0 +1,67 @@
+################################################################################
+# Filename: tests/test_comparison.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains tests for util/comparison.py
+################################################################################
+import unittest
+from util.comparison import OutputComparator
+from util.language import AppliedLanguage
+
+class TestOutputComparator(unittest.TestCase):
+
+    def _feed(self, expectedOutput: str, chunks: list,
+            encodedOutput=None) -> OutputComparator:
+        comparator = OutputComparator(expectedOutput, encodedOutput)
+        for chunk in chunks:
+            comparator.feed(chunk)
+        return comparator
+
+    def test_matches_like_normalized_output(self):
+        """
+        Ensure the comparator agrees with comparing normalized output, also
+        when the expected output is given as a memoryview
+        """
+        for expectedOutput, output in (('1\n2', b'1\r\n2\r\n'), ('1\n2', b'1\n2\n'),
+                ('1\n2', b'1\n2'), ('1\n2', b'1\n2\n\n'), ('', b''), ('', b'\n'),
+                ('', b'ab'), ('ab', b'a'), ('é', 'éé'.encode('utf-8')),
+                ('é', 'é\n\n'.encode('utf-8'))):
+            for chunkSize, encodedOutput in ((1, None), (2, None), (64, None),
+                    (1, memoryview(expectedOutput.encode('utf-8')))):
+                chunks = [output[i:i + chunkSize]
+                        for i in range(0, len(output), chunkSize)]
+                comparator = self._feed(expectedOutput, chunks, encodedOutput)
+                normalizedOutput = AppliedLanguage.get_normalized_output(output)
+                self.assertEqual(comparator.matches(),
+                        normalizedOutput == expectedOutput)
+                self.assertEqual(comparator.get_output(), normalizedOutput)
+
+    def test_keeps_matching_output_shared(self):
+        """
+        Ensure matching output is the expected output itself
+        """
+        expectedOutput = 'x' * 1000
+        comparator = self._feed(expectedOutput, [b'x' * 500, b'x' * 500, b'\n'])
+        self.assertTrue(comparator.matches())
+        self.assertIs(comparator.get_output(), expectedOutput)
+
+    def test_stops_comparing_after_mismatch(self):
+        """
+        Ensure output after the first difference is kept but not compared
+        """
+        comparator = self._feed('abcdef', [b'abc', b'xef\n', b'abcdef\n'])
+        self.assertFalse(comparator.matches())
+        self.assertEqual(comparator.get_output(), 'abcxef\nabcdef')
+
+    def test_keeps_start_of_mismatched_output(self):
+        """
+        Ensure only the asked for start of a mismatched output is kept, cut
+        before a character it would split
+        """
+        comparator = OutputComparator('abc', keptOutputSize=4)
+        for chunk in (b'ab', b'x', 'éé'.encode('utf-8'), b'y' * 1000):
+            comparator.feed(chunk)
+        self.assertFalse(comparator.matches())
+        self.assertEqual(comparator.get_output(), 'abx')
+        self.assertEqual(comparator._mismatchedSize, 4)
@@ -0,0 +1,43 @@
+################################################################################
+# Filename: tests/test_compilecache.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains tests for util/compilecache.py
+################################################################################
+import unittest
+import tempfile
+import os
+from unittest import mock
+from util.compilecache import CompileCache
+from util.definitions import Definitions
+from util.pathmapper import PathMapper
+
+class TestCompileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.definitions = {CompileCache.DIRECTORY_DEFINITION_KEY: 'cache'}
+        self.definitionsPatch = mock.patch.object(Definitions, 'get_value',
+                side_effect=lambda key: self.definitions.get(key))
+        self.definitionsPatch.start()
+        PathMapper.set_root_path(self.tempDir.name)
+
+    def tearDown(self):
+        self.definitionsPatch.stop()
+        self.tempDir.cleanup()
+
+    def test_settings(self):
+        """
+        Ensure the cache is enabled by its directory, and that its size is
+        given in MB
+        """
+        self.assertTrue(CompileCache.is_enabled())
+        self.assertEqual(CompileCache.get_cache_path(),
+                os.path.join(self.tempDir.name, 'cache'))
+        self.assertIsNone(CompileCache.get_max_size())
+        self.definitions[CompileCache.SIZE_DEFINITION_KEY] = 2.5
+        self.assertEqual(CompileCache.get_max_size(), 2.5 * 1024 * 1024)
+
+        del self.definitions[CompileCache.DIRECTORY_DEFINITION_KEY]
+        self.assertFalse(CompileCache.is_enabled())
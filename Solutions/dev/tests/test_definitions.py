@@ -48,6 +48,19 @@ class TestDefinitionsUnit(unittest.TestCase):
         self.assertEqual(Definitions.get_value('nonkey'), None)
         Definitions._definitionsDict = None
 
+    def test_get_problem_value(self):
+        """
+        Ensure Definitions.get_problem_value prefers problem specific values
+        """
+        Definitions._definitionsDict = {
+                                            'time_limit' : 20,
+                                            'problem3_time_limit' : 5
+                                       }
+        self.assertEqual(Definitions.get_problem_value('time_limit', 3), 5)
+        self.assertEqual(Definitions.get_problem_value('time_limit', 4), 20)
+        self.assertEqual(Definitions.get_problem_value('memory_limit', 3), None)
+        Definitions._definitionsDict = None
+
     @mock.patch.object(Definitions, 'get_definitions_filepath')
     @mock.patch('util.definitions.fileops')
     def test_load_definitions(self, mocked_fileops, mocked_get_def_filepath):
@@ -82,6 +95,23 @@ class TestDefinitionsUnit(unittest.TestCase):
         mocked_get_value.assert_called_with('key')
         mocked_matcher_from_var_string.assert_called_with('hello')
 
+    @mock.patch.object(Definitions, '_valueMatchers', {})
+    @mock.patch.object(Definitions, 'get_value')
+    def test_get_value_matcher_reuses_matchers(self, mocked_get_value):
+        """
+        Ensure Definitions.get_value_matcher builds one matcher per definition
+        value
+        """
+        mocked_get_value.return_value = 'problem{problem}'
+        matcher = Definitions.get_value_matcher('key')
+        self.assertIs(Definitions.get_value_matcher('key'), matcher)
+        self.assertTrue(matcher.matches('problem1'))
+
+        mocked_get_value.return_value = 'case{problem}'
+        otherMatcher = Definitions.get_value_matcher('key')
+        self.assertIsNot(otherMatcher, matcher)
+        self.assertTrue(otherMatcher.matches('case1'))
+
 class TestDefinitionsFunctional(unittest.TestCase):
     """
     Black-Box Functional Tests/Acceptance Tests for Definitions.py
@@ -0,0 +1,240 @@
+################################################################################
+# Filename: tests/test_execution.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains tests for util/execution.py
+################################################################################
+import unittest
+import os
+import signal
+import sys
+import tempfile
+import time
+from unittest import mock
+from util.definitions import Definitions
+from util.execution import CorePool, ExecutionLimits, ExecutionStats, Reaper
+from util.execution import run_process
+from util.language import Language
+
+class TestExecutionLimits(unittest.TestCase):
+
+    def test_for_problem(self):
+        """
+        Ensure ExecutionLimits.for_problem reads and scales the definitions
+        """
+        definitions = {'time_limit': 10, 'problem2_time_limit': 4,
+                'memory_limit': 256, 'output_limit': 1,
+                'problem2_spool_output': True}
+        with mock.patch.object(Definitions, 'get_value',
+                side_effect=lambda key: definitions.get(key)):
+            limits = ExecutionLimits.for_problem(1)
+            self.assertEqual(limits.wallTime, 10)
+            self.assertIsNone(limits.cpuTime)
+            self.assertEqual(limits.memory, 256 * 1024 * 1024)
+            self.assertEqual(limits.output, 1024 * 1024)
+            self.assertFalse(limits.spoolOutput)
+
+            language = Language('Java', timeLimitMultiplier=2,
+                    memoryLimitMultiplier=0)
+            limits = ExecutionLimits.for_problem(2, language)
+            self.assertEqual(limits.wallTime, 8)
+            self.assertIsNone(limits.memory)
+            self.assertTrue(limits.spoolOutput)
+            self.assertTrue(limits.without_cpu_time().spoolOutput)
+
+    def test_is_exceeded(self):
+        """
+        Ensure ExecutionLimits recognizes processes stopped by its limits
+        """
+        limits = ExecutionLimits(cpuTime=1, memory=1000)
+        self.assertTrue(limits.is_cpu_time_exceeded(-signal.SIGXCPU))
+        self.assertTrue(limits.is_cpu_time_exceeded(-signal.SIGKILL, 1.5))
+        self.assertFalse(limits.is_cpu_time_exceeded(-signal.SIGKILL, 0.1))
+        self.assertTrue(limits.is_memory_exceeded(1, 950))
+        self.assertFalse(limits.is_memory_exceeded(0, 950))
+        self.assertFalse(limits.is_memory_exceeded(1, 10))
+        self.assertTrue(limits.is_memory_exceeded(1, 10, b'\nMemoryError\n'))
+        self.assertFalse(ExecutionLimits().is_memory_exceeded(1, 950))
+        limits = ExecutionLimits(output=100)
+        self.assertTrue(limits.is_output_exceeded(-signal.SIGXFSZ))
+        self.assertTrue(limits.is_output_exceeded(0, 101))
+        self.assertFalse(limits.is_output_exceeded(0, 100))
+        self.assertFalse(ExecutionLimits().is_output_exceeded(0, 101))
+
+class TestExecutionStats(unittest.TestCase):
+
+    def test_get_cpu_time(self):
+        """
+        Ensure ExecutionStats.get_cpu_time only adds up measured times
+        """
+        self.assertEqual(ExecutionStats(userTime=1, sysTime=0.5).get_cpu_time(),
+                1.5)
+        self.assertIsNone(ExecutionStats(wallTime=1).get_cpu_time())
+        self.assertEqual(ExecutionStats(wallTime=1).to_dict(), {'wallTime': 1,
+            'userTime': None, 'sysTime': None, 'peakMemory': None})
+
+class TestCorePool(unittest.TestCase):
+
+    def test_load(self):
+        """
+        Ensure CorePool.load prefers the defined cores, then the isolated ones,
+        and only uses cores this process may run on
+        """
+        definitions = {}
+        with tempfile.NamedTemporaryFile('w') as isolatedFile, \
+                mock.patch.object(Definitions, 'get_value',
+                        side_effect=lambda key: definitions.get(key)), \
+                mock.patch.object(CorePool, 'ISOLATED_CORES_PATH',
+                        isolatedFile.name), \
+                mock.patch('os.sched_getaffinity', return_value={0, 1, 2, 3,
+                    6}):
+            isolatedFile.write('1-3,5-7\n')
+            isolatedFile.flush()
+            self.assertEqual(CorePool.load()._freeCores, [6, 3, 2, 1])
+
+            definitions['pinned_cores'] = [0, 6, 9]
+            self.assertEqual(CorePool.load().get_core_count(), 2)
+
+            isolatedFile.truncate(0)
+            del definitions['pinned_cores']
+            self.assertEqual(CorePool.load().get_core_count(), 5)
+
+    def test_pin(self):
+        """
+        Ensure every worker holds its own core, and that the processes it
+        starts run on that core only
+        """
+        corePool = CorePool(sorted(os.sched_getaffinity(0)))
+        with corePool.pin() as core:
+            self.assertEqual(CorePool.get_pinned_core(), core)
+            if corePool.get_core_count() > 1:
+                with corePool.pin() as otherCore:
+                    self.assertNotEqual(otherCore, core)
+            result = run_process([sys.executable, '-c',
+                'import os; print(os.sched_getaffinity(0))'], b'',
+                ExecutionLimits())
+            self.assertEqual(result.output.strip(),
+                    str({core}).encode('ascii'))
+        self.assertIsNone(CorePool.get_pinned_core())
+        self.assertIsNone(ExecutionLimits().get_preexec_fn())
+
+class TestRunProcess(unittest.TestCase):
+
+    def _run(self, code, inputBytes=b'', limits=None):
+        return run_process([sys.executable, '-c', code], inputBytes,
+                limits if not limits is None else ExecutionLimits())
+
+    def test_output(self):
+        """
+        Ensure run_process feeds the input and collects the output
+        """
+        inputBytes = b'x' * 200000
+        result = self._run('import sys; sys.stdout.write(sys.stdin.read())',
+                inputBytes)
+        self.assertEqual(result.returnCode, 0)
+        self.assertEqual(result.output, inputBytes)
+        self.assertFalse(result.timedOut)
+        self.assertGreater(result.stats.peakMemory, 0)
+        self.assertGreaterEqual(result.stats.wallTime,
+                result.stats.get_cpu_time() * 0.5)
+
+    def test_output_consumer(self):
+        """
+        Ensure run_process passes the output to its consumer instead of
+        collecting it
+        """
+        consumer = mock.MagicMock()
+        result = run_process([sys.executable, '-c', 'print("out")'], b'',
+                ExecutionLimits(), outputConsumer=consumer)
+        self.assertEqual(result.output, b'')
+        self.assertEqual(b''.join(call.args[0] for call in
+            consumer.feed.call_args_list), b'out\n')
+
+    def test_spool_output(self):
+        """
+        Ensure run_process can spool the output to a file and stop a process
+        writing more than its output limit there
+        """
+        code = 'import sys; sys.stdout.write(sys.stdin.read())'
+        inputBytes = b'y' * 200000
+        result = self._run(code, inputBytes, ExecutionLimits(spoolOutput=True))
+        self.assertEqual(result.output, inputBytes)
+        self.assertEqual(result.outputSize, len(inputBytes))
+
+        consumer = mock.MagicMock()
+        result = run_process([sys.executable, '-c', code], inputBytes,
+                ExecutionLimits(spoolOutput=True), readSize=65536,
+                outputConsumer=consumer)
+        self.assertEqual(b''.join(call.args[0] for call in
+            consumer.feed.call_args_list), inputBytes)
+
+        limits = ExecutionLimits(output=1000, spoolOutput=True)
+        result = self._run(code, inputBytes, limits)
+        self.assertTrue(limits.is_output_exceeded(result.returnCode,
+            result.outputSize))
+        self.assertLessEqual(result.outputSize, 1001)
+
+    def test_output_limit(self):
+        """
+        Ensure run_process kills a process writing more than its output limit
+        to its pipe without waiting for the wall time
+        """
+        limits = ExecutionLimits(wallTime=10, output=100000)
+        result = self._run('while True: print("x" * 1000)', limits=limits)
+        self.assertTrue(limits.is_output_exceeded(result.returnCode,
+            result.outputSize))
+        self.assertFalse(result.timedOut)
+        self.assertLessEqual(len(result.output), 100000)
+        self.assertLess(result.stats.wallTime, 10)
+
+    def test_failure(self):
+        """
+        Ensure run_process reports return codes and wall time timeouts
+        """
+        result = self._run('import sys; sys.stderr.write("oops"); sys.exit(3)')
+        self.assertEqual(result.returnCode, 3)
+        self.assertEqual(result.errorOutput, b'oops')
+
+        result = self._run('while True: pass',
+                limits=ExecutionLimits(wallTime=0.5))
+        self.assertTrue(result.timedOut)
+
+    def _is_running(self, processId: int) -> bool:
+        # Killed processes may linger as zombies until init reaps them
+        try:
+            with open('/proc/{}/stat'.format(processId)) as statFile:
+                return not statFile.read().rsplit(')', 1)[1].split()[0] == 'Z'
+        except FileNotFoundError:
+            return False
+
+    def _assert_stopped(self, processId: int):
+        deadline = time.monotonic() + 5
+        while self._is_running(processId) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(self._is_running(processId))
+
+    def test_kills_forked_processes(self):
+        """
+        Ensure run_process kills the processes a solution leaves behind, both
+        when it exits and when it times out
+        """
+        forkCode = ('import subprocess, sys\n'
+                    'child = subprocess.Popen([sys.executable, "-c",\n'
+                    '    "import time; time.sleep(30)"],\n'
+                    '    stdout=subprocess.DEVNULL)\n'
+                    'print(child.pid, flush=True)\n')
+        leakedGroupCount = Reaper.get_leaked_group_count()
+        # The forked process holds stderr open, which must not keep the run
+        # going once the solution has exited
+        result = self._run(forkCode, limits=ExecutionLimits(wallTime=5))
+        self.assertEqual(result.returnCode, 0)
+        self.assertFalse(result.timedOut)
+        self.assertLess(result.stats.wallTime, 2)
+        self._assert_stopped(int(result.output))
+        self.assertEqual(Reaper.get_leaked_group_count(), leakedGroupCount + 1)
+
+        result = self._run(forkCode + 'while True: pass',
+                limits=ExecutionLimits(wallTime=0.5))
+        self.assertTrue(result.timedOut)
+        self._assert_stopped(int(result.output))
@@ -9,6 +9,8 @@ import unittest.mock
 import util.fileops
 from util.fileops import FileType
 import unittest
+import io
+import json
 import os
 from nose.plugins.deprecated import DeprecatedTest
 
@@ -97,6 +99,88 @@ class TestFileOps(unittest.TestCase):
         mocked_fileops_exists.assert_called_with('path', FileType.FILE)
         mocked_fileops_open.assert_called_with('path')
 
+    def _get_mocked_json_file(self, jsonString: str, readSize: int):
+        """
+        Creates a binary file of jsonString that reads at most readSize bytes
+        at a time
+        """
+        mockedFile = io.BytesIO(jsonString.encode('utf-8'))
+        mockedFile.read = unittest.mock.MagicMock(side_effect=lambda size:
+                io.BytesIO.read(mockedFile, min(size, readSize)))
+        return mockedFile
+
+    def test_iter_json_object_items(self):
+        """
+        Ensure fileops.iter_json_object_items yields the same items as loading
+        the whole file, however little of it is read at a time, and that
+        fileops.iter_json_object_spans yields the spans of the values' UTF-8
+        bytes along with their keys
+        """
+        jsonString = ('{"before": [1, {"cases": "}"}], "cases": {"0": '
+                      '{"input": [12345, "a \\"b\\" c"], "output": "é"}, '
+                      '"1": {"input": -1.5e3, "output": true}, "k\\"2" : '
+                      '{"input": [[[[1, "]"]]], {"a": {"b": [{"c": "{"}]}}], '
+                      '"output": null}}, "after": 7}')
+        encodedString = jsonString.encode('utf-8')
+        expectedItems = list(json.loads(jsonString)['cases'].items())
+        for readSize in (1, 2, 3, 65536):
+            with unittest.mock.patch('util.fileops.open', create=True,
+                    return_value=self._get_mocked_json_file(jsonString,
+                        readSize)), \
+                    unittest.mock.patch('util.fileops.exists', return_value=True):
+                self.assertEqual(list(util.fileops.iter_json_object_items('path',
+                    'cases')), expectedItems)
+
+            with unittest.mock.patch('util.fileops.open', create=True,
+                    return_value=self._get_mocked_json_file(jsonString,
+                        readSize)), \
+                    unittest.mock.patch('util.fileops.exists', return_value=True):
+                self.assertEqual([(key, json.loads(encodedString[offset:offset +
+                    length]), valueKeys) for key, (offset, length), valueKeys
+                    in util.fileops.iter_json_object_spans('path', 'cases')],
+                    [(key, value, set(value) if isinstance(value, dict) else
+                        None) for key, value in expectedItems])
+
+        # An object small enough to be found along with its key is still read
+        # key by key
+        for readSize in range(1, 41):
+            with unittest.mock.patch('util.fileops.open', create=True,
+                    return_value=self._get_mocked_json_file('{"cases": {}, '
+                        '"after": {"a\\"": {}}, "last": 2}', readSize)), \
+                    unittest.mock.patch('util.fileops.exists', return_value=True):
+                self.assertEqual(list(util.fileops.iter_json_object_items(
+                    'path', 'cases')), [])
+
+        for invalidString in ('{"cases": {"0": 1,}}', '{"cases": {"0": [1}',
+                '{"cases": {"0": "a'):
+            with unittest.mock.patch('util.fileops.open', create=True,
+                    return_value=io.BytesIO(invalidString.encode('utf-8'))), \
+                    unittest.mock.patch('util.fileops.exists', return_value=True):
+                with self.assertRaises(Exception):
+                    list(util.fileops.iter_json_object_items('path', 'cases'))
+
+    def test_iter_json_object_spans_numbers(self):
+        """
+        Ensure fileops.iter_json_object_spans finds numbers split across
+        reads, whatever part of them a read ends in
+        """
+        jsonString = ('{"scale": 1.25e-3, "count": 120, "cases": {"0": '
+                      '{"input": 6.02E+23, "output": -0.5}, "1": {"input": '
+                      '[1e5, 2.5], "output": 10}, "2": 7.5e1}, "ratio": '
+                      '-12.5e10, "last": 3}')
+        expectedItems = [(key, json.dumps(value)) for key, value in
+                json.loads(jsonString)['cases'].items()]
+        for readSize in range(1, 41):
+            with unittest.mock.patch('util.fileops.open', create=True,
+                    return_value=self._get_mocked_json_file(jsonString,
+                        readSize)), \
+                    unittest.mock.patch('util.fileops.exists', return_value=True):
+                self.assertEqual([(key, json.dumps(json.loads(
+                    jsonString[offset:offset + length])))
+                    for key, (offset, length), _ in
+                    util.fileops.iter_json_object_spans('path', 'cases')],
+                    expectedItems)
+
     @unittest.mock.patch('util.fileops.os.path')
     def test_join_path(self, mocked_fileops_os_path):
         """
@@ -6,10 +6,17 @@
 # Tests to ensure the functionality of util/language.py
 ################################################################################
 import unittest
-from util.language import Language, Languages
+from util.language import Language, Languages, BatchSession, ExecutionError
+from util.language import AppliedLanguage
+from util.language import HARNESS_DIRECTORY
+from util.definitions import Definitions
+from util.execution import ExecutionLimits
 from unittest import mock
 from util.pathmapper import PathMapper
+import asyncio
 import os
+import sys
+import tempfile
 from nose.plugins.deprecated import DeprecatedTest
 
 class TestLanguage(unittest.TestCase):
@@ -49,6 +56,365 @@ class TestLanguage(unittest.TestCase):
         self.assertEqual(testLanguage._runExtension, '')
         self.assertEqual(testLanguage._runCommand, '{directory}/{fileNameWoExtension}')
         self.assertEqual(testLanguage._runArguments, [])
+        self.assertEqual(testLanguage._compileVersionArguments,
+                Language.DEFAULT_COMPILE_VERSION_ARGS)
+        self.assertEqual(testLanguage._timeLimitMultiplier, 1)
+        self.assertEqual(testLanguage._memoryLimitMultiplier, 1)
+
+        self.assertFalse(testLanguage.supports_batch_execution())
+
+        languageDictionary['compileVersionArguments'] = ['-version']
+        languageDictionary['batchRunCommand'] = 'harness'
+        languageDictionary['batchRunArguments'] = ['{directory}']
+        languageDictionary['timeLimitMultiplier'] = 2
+        languageDictionary['memoryLimitMultiplier'] = 0
+        testLanguage = Language.load_from_dict(languageDictionary)
+        self.assertEqual(testLanguage._timeLimitMultiplier, 2)
+        self.assertEqual(testLanguage._memoryLimitMultiplier, 0)
+        self.assertEqual(testLanguage._compileVersionArguments, ['-version'])
+        self.assertEqual(testLanguage._batchRunCommand, 'harness')
+        self.assertEqual(testLanguage._batchRunArguments, ['{directory}'])
+        self.assertTrue(testLanguage.supports_batch_execution())
+
+class TestAppliedLanguage(unittest.TestCase):
+
+    def _get_python_language(self, code):
+        return AppliedLanguage('Python', runCommand=sys.executable,
+                runArguments=['-c', code])
+
+    def test_get_normalized_output(self):
+        """
+        Ensure AppliedLanguage.get_normalized_output strips the line endings
+        """
+        self.assertEqual(AppliedLanguage.get_normalized_output(b'1\r\n2\r\n'),
+                '1\n2')
+
+    def test_execute_code_async(self):
+        """
+        Ensure AppliedLanguage.execute_code_async returns the solution output
+        """
+        language = self._get_python_language('print(input() * 2)')
+        self.assertEqual(asyncio.run(language.execute_code_async('ab\n')),
+                'abab')
+
+        language = self._get_python_language('import sys; sys.exit(1)')
+        with self.assertRaises(ExecutionError) as context:
+            asyncio.run(language.execute_code_async(''))
+        self.assertEqual(context.exception.message, 'Runtime Error')
+
+    def test_execute_code(self):
+        """
+        Ensure AppliedLanguage.execute_code reports each kind of failure
+        """
+        language = self._get_python_language('print(input() * 2)')
+        self.assertEqual(language.execute_code('ab\n'), 'abab')
+
+        output, stats = language.execute_code_with_stats('ab\n')
+        self.assertEqual(output, 'abab')
+        self.assertGreater(stats.wallTime, 0)
+        self.assertGreater(stats.peakMemory, 0)
+
+        language = self._get_python_language('import sys; sys.exit(1)')
+        with self.assertRaises(ExecutionError) as context:
+            language.execute_code('')
+        self.assertEqual(context.exception.message,
+                ExecutionError.RUNTIME_ERROR)
+        self.assertGreater(context.exception.stats.wallTime, 0)
+
+        language = self._get_python_language('while True: pass')
+        with self.assertRaises(ExecutionError) as context:
+            language.execute_code('', limits=ExecutionLimits(wallTime=0.5))
+        self.assertEqual(context.exception.message,
+                ExecutionError.TIME_LIMIT_EXCEEDED)
+
+        language = self._get_python_language('while True: print("x" * 1000)')
+        for spoolOutput in (False, True):
+            with self.assertRaises(ExecutionError) as context:
+                language.execute_code('', limits=ExecutionLimits(wallTime=10,
+                    output=100000, spoolOutput=spoolOutput))
+            self.assertEqual(context.exception.message,
+                    ExecutionError.OUTPUT_LIMIT_EXCEEDED)
+        with self.assertRaises(ExecutionError) as context:
+            asyncio.run(language.execute_code_async('',
+                limits=ExecutionLimits(wallTime=10, output=100000)))
+        self.assertEqual(context.exception.message,
+                ExecutionError.OUTPUT_LIMIT_EXCEEDED)
+
+    def test_get_run_fingerprint(self):
+        """
+        Ensure identical solutions share a run fingerprint wherever they are
+        """
+        runTemplate = ['python', '{directory}/{fileName}']
+        with tempfile.TemporaryDirectory() as tempDir:
+            paths = []
+            for directory, contents in (('a', 'print(1)'), ('b', 'print(1)'),
+                    ('c', 'print(2)')):
+                os.mkdir(os.path.join(tempDir, directory))
+                paths.append(os.path.join(tempDir, directory, 'Problem1.py'))
+                with open(paths[-1], 'w') as solutionFile:
+                    solutionFile.write(contents)
+
+            fingerprints = [AppliedLanguage('Python', path=path,
+                runCommand='python', runArguments=[path]).get_run_fingerprint(
+                    runTemplate) for path in paths]
+            self.assertEqual(fingerprints[0], fingerprints[1])
+            self.assertNotEqual(fingerprints[0], fingerprints[2])
+            self.assertNotEqual(fingerprints[0], AppliedLanguage('Python',
+                path=paths[0]).get_run_fingerprint(runTemplate,
+                    ExecutionLimits(wallTime=1)))
+
+    def test_compile_code_in_build_path(self):
+        """
+        Ensure compiled languages build once in their build directory and
+        leave the solution's directory alone
+        """
+        with tempfile.TemporaryDirectory() as tempDir:
+            solutionPath = os.path.join(tempDir, 'Problem1.src')
+            with open(solutionPath, 'w') as solutionFile:
+                solutionFile.write('print(1)')
+            buildPath = os.path.join(tempDir, 'build', 'hash')
+            copyScript = 'import shutil, sys; shutil.copy(*sys.argv[1:])'
+
+            def get_applied_language():
+                return AppliedLanguage('Fake', path=solutionPath,
+                        compileCommand=sys.executable, compileArguments=['-c',
+                            copyScript, os.path.join(buildPath, 'Problem1.src'),
+                            os.path.join(buildPath, 'Problem1.run')],
+                        runExtension='run', buildPath=buildPath)
+
+            runPath = get_applied_language()._compile_code()
+            self.assertEqual(runPath, os.path.join(buildPath, 'Problem1.run'))
+            self.assertTrue(os.path.isfile(runPath))
+            self.assertEqual(sorted(os.listdir(tempDir)), ['Problem1.src', 'build'])
+            self.assertEqual(get_applied_language()._get_run_artifacts(),
+                    [runPath])
+
+            with mock.patch.object(AppliedLanguage, '_run_compiler') as mocked_run_compiler:
+                self.assertEqual(get_applied_language()._compile_code(), runPath)
+                mocked_run_compiler.assert_not_called()
+
+    def test_build_root(self):
+        """
+        Ensure compiled languages build in the compile cache directory unless
+        a build directory is defined, and in tree if neither is
+        """
+        with tempfile.TemporaryDirectory() as tempDir:
+            solutionPath = os.path.join(tempDir, 'Problem1.src')
+            with open(solutionPath, 'w') as solutionFile:
+                solutionFile.write('print(1)')
+            language = Language('Fake', compileCommand='true',
+                    compileVersionArguments=[])
+
+            definitions = {}
+            with mock.patch.object(Definitions, 'get_value',
+                    side_effect=lambda key: definitions.get(key)), \
+                    mock.patch.object(PathMapper, '_rootPath', tempDir):
+                self.assertIsNone(AppliedLanguage._get_build_path(
+                    solutionPath, language))
+                definitions['compile_cache_directory'] = 'cache'
+                self.assertEqual(os.path.dirname(AppliedLanguage._get_build_path(
+                    solutionPath, language)), os.path.join(tempDir, 'cache'))
+                definitions['build_directory'] = 'build'
+                self.assertEqual(os.path.dirname(AppliedLanguage._get_build_path(
+                    solutionPath, language)), os.path.join(tempDir, 'build'))
+
+    def test_compile_batch(self):
+        """
+        Ensure AppliedLanguage.compile_batch compiles sources together and
+        only fails the ones the compiler reported errors for
+        """
+        compileScript = ('#!{}\n'
+                         'import shutil, sys\n'
+                         'failed = False\n'
+                         'for path in sys.argv[1:]:\n'
+                         '    if "error" in open(path).read():\n'
+                         '        sys.stderr.write(path + ":1: error: bad\\n")\n'
+                         '        failed = True\n'
+                         '    else:\n'
+                         '        shutil.copy(path, path[:-3] + "run")\n'
+                         'sys.exit(1 if failed else 0)\n').format(sys.executable)
+        with tempfile.TemporaryDirectory() as tempDir:
+            compilerPath = os.path.join(tempDir, 'compiler')
+            with open(compilerPath, 'w') as compilerFile:
+                compilerFile.write(compileScript)
+            os.chmod(compilerPath, 0o755)
+
+            appliedLanguages = []
+            for directory, fileName, contents in (('a', 'Problem1.src', '1'),
+                    ('a', 'Problem2.src', 'error'), ('b', 'Problem1.src', '2')):
+                solutionPath = os.path.join(tempDir, directory, fileName)
+                os.makedirs(os.path.dirname(solutionPath), exist_ok=True)
+                with open(solutionPath, 'w') as solutionFile:
+                    solutionFile.write(contents)
+                buildPath = os.path.join(tempDir, 'build', directory + fileName)
+                appliedLanguages.append(AppliedLanguage('Fake',
+                    path=solutionPath, compileCommand=compilerPath,
+                    compileArguments=[os.path.join(buildPath, fileName)],
+                    runExtension='run', batchCompileArguments=[
+                        os.path.join(buildPath, fileName)],
+                    buildPath=buildPath))
+
+            errors = AppliedLanguage.compile_batch(appliedLanguages)
+            self.assertIsNone(errors[appliedLanguages[0]._path])
+            self.assertIsInstance(errors[appliedLanguages[1]._path],
+                    ExecutionError)
+            self.assertIsNone(errors[appliedLanguages[2]._path])
+            self.assertTrue(appliedLanguages[0]._is_built())
+            self.assertFalse(appliedLanguages[1]._is_built())
+            for appliedLanguage in (appliedLanguages[0], appliedLanguages[2]):
+                self.assertEqual(appliedLanguage._get_run_artifacts(),
+                        [os.path.join(appliedLanguage._buildPath,
+                            'Problem1.run')])
+
+    def test_compile_batch_conflict(self):
+        """
+        Ensure AppliedLanguage.compile_batch does not fail sources which only
+        fail to compile together, like Java sources declaring the same class
+        """
+        compileScript = ('#!{}\n'
+                         'import shutil, sys\n'
+                         'declared = [path for path in sys.argv[1:]\n'
+                         '    if "class Node" in open(path).read()]\n'
+                         'if len(declared) > 1:\n'
+                         '    sys.stderr.write(declared[1] + ":1: error: '
+                         'duplicate class\\n")\n'
+                         '    sys.exit(1)\n'
+                         'for path in sys.argv[1:]:\n'
+                         '    shutil.copy(path, path[:-3] + "run")\n').format(
+                                 sys.executable)
+        with tempfile.TemporaryDirectory() as tempDir:
+            compilerPath = os.path.join(tempDir, 'compiler')
+            with open(compilerPath, 'w') as compilerFile:
+                compilerFile.write(compileScript)
+            os.chmod(compilerPath, 0o755)
+
+            appliedLanguages = []
+            for fileName in ('Problem1.src', 'Problem2.src'):
+                solutionPath = os.path.join(tempDir, 'a', fileName)
+                os.makedirs(os.path.dirname(solutionPath), exist_ok=True)
+                with open(solutionPath, 'w') as solutionFile:
+                    solutionFile.write('class Node')
+                buildPath = os.path.join(tempDir, 'build', fileName)
+                appliedLanguages.append(AppliedLanguage('Fake',
+                    path=solutionPath, compileCommand=compilerPath,
+                    compileArguments=[os.path.join(buildPath, fileName)],
+                    runExtension='run', batchCompileArguments=[
+                        os.path.join(buildPath, fileName)],
+                    buildPath=buildPath))
+
+            errors = AppliedLanguage.compile_batch(appliedLanguages)
+            for appliedLanguage in appliedLanguages:
+                self.assertIsNone(errors[appliedLanguage._path])
+                self.assertTrue(appliedLanguage._is_built())
+
+    def test_prune_builds(self):
+        """
+        Ensure AppliedLanguage.prune_builds removes the least recently used
+        finished builds until they fit the compile cache's size
+        """
+        with tempfile.TemporaryDirectory() as tempDir:
+            buildRoot = os.path.join(tempDir, 'build')
+            for buildName, lastUsed, built in (('old', 1, True),
+                    ('new', 3, True), ('unfinished', 0, False),
+                    ('used', 2, True)):
+                buildPath = os.path.join(buildRoot, buildName)
+                os.makedirs(buildPath)
+                with open(os.path.join(buildPath, 'Problem1.run'), 'wb') as \
+                        artifactFile:
+                    artifactFile.write(b'x' * 1024 * 1024)
+                if built:
+                    markerPath = os.path.join(buildPath, '.complete')
+                    open(markerPath, 'w').close()
+                    os.utime(markerPath, (lastUsed, lastUsed))
+            AppliedLanguage('Fake', path=os.path.join(tempDir, 'Problem1.src'),
+                    buildPath=os.path.join(buildRoot, 'used'))._touch_build()
+
+            definitions = {'build_directory': buildRoot,
+                    'compile_cache_size': 2.5}
+            with mock.patch.object(Definitions, 'get_value',
+                    side_effect=lambda key: definitions.get(key)), \
+                    mock.patch.object(PathMapper, '_rootPath', tempDir):
+                AppliedLanguage.prune_builds()
+            self.assertEqual(sorted(os.listdir(buildRoot)), ['new', 'unfinished',
+                'used'])
+
+class TestBatchSession(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.solutionPath = os.path.join(self.tempDir.name, 'Problem1.py')
+        with open(self.solutionPath, 'w') as solutionFile:
+            solutionFile.write('import os\n'
+                               'x = input()\n'
+                               'if x == "crash": os._exit(1)\n'
+                               'if x == "fail": raise ValueError()\n'
+                               'print(x + str(os.getpid()))\n')
+        self.fallback = mock.MagicMock(return_value=('fallback', None))
+        self.session = BatchSession([sys.executable, os.path.join(
+            HARNESS_DIRECTORY, 'batch_harness.py'), self.solutionPath],
+            self.fallback)
+
+    def tearDown(self):
+        self.session.close()
+        self.tempDir.cleanup()
+
+    def test_single_process(self):
+        """
+        Ensure BatchSession runs every case through one harness process
+        """
+        firstOutput = self.session.get_output('a\n')
+        secondOutput = self.session.get_output('b\n')
+        self.assertTrue(firstOutput.startswith('a'))
+        self.assertTrue(secondOutput.startswith('b'))
+        self.assertEqual(firstOutput[1:], secondOutput[1:])
+        self.fallback.assert_not_called()
+
+    def test_stats(self):
+        """
+        Ensure BatchSession reports the time but not the memory of each case
+        """
+        output, stats = self.session.get_output_with_stats('a\n')
+        self.assertTrue(output.startswith('a'))
+        self.assertGreaterEqual(stats.wallTime, 0)
+        self.assertGreaterEqual(stats.userTime, 0)
+        self.assertGreaterEqual(stats.sysTime, 0)
+        self.assertIsNone(stats.peakMemory)
+
+    def test_fallback(self):
+        """
+        Ensure BatchSession falls back once a case fails or the harness dies
+        """
+        self.assertEqual(self.session.get_output('fail\n'), 'fallback')
+        self.assertTrue(self.session.get_output('a\n').startswith('a'))
+
+        self.assertEqual(self.session.get_output('crash\n'), 'fallback')
+        self.assertEqual(self.session.get_output('a\n'), 'fallback')
+        self.fallback.assert_called_with('a\n')
+
+    def test_timeout(self):
+        """
+        Ensure BatchSession reports a timeout without falling back
+        """
+        self.session._limits = ExecutionLimits(wallTime=0)
+        self.assertRaises(ExecutionError, self.session.get_output, 'a\n')
+        self.fallback.assert_not_called()
+
+    def test_output_limit(self):
+        """
+        Ensure the harness stops a case writing more than its output limit,
+        and keeps running the following cases
+        """
+        with open(self.solutionPath, 'w') as solutionFile:
+            solutionFile.write('x = input()\n'
+                               'while x == "flood": print("x" * 1000)\n'
+                               'print(x)\n')
+        self.session._limits = ExecutionLimits(output=100000)
+        with self.assertRaises(ExecutionError) as context:
+            self.session.get_output('flood\n')
+        self.assertEqual(context.exception.message,
+                ExecutionError.OUTPUT_LIMIT_EXCEEDED)
+        self.assertEqual(self.session.get_output('a\n'), 'a')
+        self.fallback.assert_not_called()
 
 class TestLanguages(unittest.TestCase):
 
@@ -0,0 +1,72 @@
+################################################################################
+# Filename: tests/test_resultcache.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains tests for util/resultcache.py
+################################################################################
+import unittest
+import tempfile
+import os
+import time
+from unittest import mock
+from util.resultcache import ResultCache
+from util.definitions import Definitions
+from util.pathmapper import PathMapper
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.definitions = {ResultCache.DIRECTORY_DEFINITION_KEY: 'cache'}
+        self.definitionsPatch = mock.patch.object(Definitions, 'get_value',
+                side_effect=lambda key: self.definitions.get(key))
+        self.definitionsPatch.start()
+        PathMapper.set_root_path(self.tempDir.name)
+
+    def tearDown(self):
+        self.definitionsPatch.stop()
+        self.tempDir.cleanup()
+
+    def _set_times(self, key, accessTime, storedTime):
+        os.utime(ResultCache._get_entry_path(key), (accessTime, storedTime))
+
+    def test_get_key(self):
+        """
+        Ensure ResultCache.get_key changes with the fingerprint and the input
+        """
+        key = ResultCache.get_key('a', '1')
+        self.assertEqual(key, ResultCache.get_key('a', '1'))
+        self.assertNotEqual(key, ResultCache.get_key('b', '1'))
+        self.assertNotEqual(key, ResultCache.get_key('a', '2'))
+
+    def test_put_and_get(self):
+        """
+        Ensure outputs put in the cache are returned until they expire
+        """
+        self.assertIsNone(ResultCache.get('key'))
+        ResultCache.put('key', 'output')
+        self.assertEqual(ResultCache.get('key'), 'output')
+
+        self.definitions[ResultCache.TTL_DEFINITION_KEY] = 60
+        self._set_times('key', time.time(), time.time() - 120)
+        self.assertIsNone(ResultCache.get('key'))
+
+    def test_evict(self):
+        """
+        Ensure expired entries and then the least recently used are evicted
+        """
+        now = time.time()
+        for key in ('old', 'used', 'expired'):
+            ResultCache.put(key, '123456')
+        self._set_times('old', now - 30, now - 30)
+        self._set_times('used', now, now - 30)
+        self._set_times('expired', now, now - 120)
+
+        self.definitions[ResultCache.TTL_DEFINITION_KEY] = 60
+        self.definitions[ResultCache.SIZE_DEFINITION_KEY] = 25 / (1024 * 1024)
+        ResultCache.evict()
+
+        self.assertIsNone(ResultCache.get('expired'))
+        self.assertIsNone(ResultCache.get('old'))
+        self.assertEqual(ResultCache.get('used'), '123456')
@@ -0,0 +1,118 @@
+################################################################################
+# Filename: tests/test_resultsink.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains tests for util/resultsink.py
+################################################################################
+import unittest
+import tempfile
+import json
+import os
+import xml.etree.ElementTree as ElementTree
+from util import resultsink
+from util.perror import PyCException
+from util.language import Language
+from util.solution import Solution
+
+class FakeResult:
+    """
+    Stands in for the CaseResults of the test subparser
+    """
+
+    def __init__(self, solution, caseNumber, status, message, output=None,
+            wallTime=None):
+        self.solution = solution
+        self.caseNumber = caseNumber
+        self.status = status
+        self.message = message
+        self.output = output
+        self.wallTime = wallTime
+
+    def to_dict(self):
+        return {'writer': self.solution.solutionWriter,
+                'problem': self.solution.problemNumber,
+                'language': self.solution.solutionLanguage.name,
+                'caseType': 'sample', 'case': self.caseNumber,
+                'status': self.status, 'message': self.message,
+                'wallTime': self.wallTime}
+
+class TestResultSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.solutions = [Solution(problemNumber=problemNumber,
+            solutionWriter='alice', solutionLanguage=Language('C++'))
+            for problemNumber in (1, 2)]
+        self.results = [
+                FakeResult(self.solutions[0], 1, 'PASS', 'Correct', wallTime=0.5),
+                FakeResult(self.solutions[0], 2, 'FAIL', 'Incorrect', '<1>'),
+                FakeResult(self.solutions[1], 1, 'SKIP', 'Skipped')]
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def _write(self, fileName, sinkFormat=None):
+        path = os.path.join(self.tempDir.name, 'out', fileName)
+        with resultsink.get_result_sink(path, sinkFormat) as sink:
+            for result in self.results:
+                sink.write(result)
+
+        with open(path) as resultsFile:
+            return resultsFile.read()
+
+    def test_get_result_sink(self):
+        """
+        Ensure get_result_sink picks the format from the extension or argument
+        """
+        self.assertIsInstance(resultsink.get_result_sink('a.jsonl'),
+                resultsink.JsonLinesResultSink)
+        self.assertIsInstance(resultsink.get_result_sink('a.xml'),
+                resultsink.JUnitXmlResultSink)
+        self.assertIsInstance(resultsink.get_result_sink('a', 'json'),
+                resultsink.JsonResultSink)
+        self.assertRaises(PyCException, resultsink.get_result_sink, 'a.txt')
+
+    def test_json(self):
+        """
+        Ensure the JSON sinks write one entry per result
+        """
+        document = json.loads(self._write('results.json'))
+        self.assertEqual(document[resultsink.JsonResultSink.RESULTS_KEY],
+                [result.to_dict() for result in self.results])
+
+        lines = self._write('results.jsonl').splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                [result.to_dict() for result in self.results])
+
+    def test_junit(self):
+        """
+        Ensure the JUnit sink writes a testsuite with counts per solution
+        """
+        root = ElementTree.fromstring(self._write('results.xml'))
+        suites = root.findall('testsuite')
+        self.assertEqual(len(suites), 2)
+        self.assertEqual(suites[0].get('tests'), '2')
+        self.assertEqual(suites[0].get('failures'), '1')
+        self.assertEqual(suites[1].get('skipped'), '1')
+
+        testCases = suites[0].findall('testcase')
+        self.assertEqual(testCases[0].get('time'), '0.500000')
+        self.assertEqual(testCases[1].find('failure').text, '<1>')
+        self.assertIsNotNone(suites[1].find('testcase/skipped'))
+
+    def test_junit_output(self):
+        """
+        Ensure the JUnit sink drops the characters XML does not allow from
+        failing outputs and cuts long ones
+        """
+        maxLength = resultsink.JUnitXmlResultSink.MAX_OUTPUT_LENGTH
+        self.results = [FakeResult(self.solutions[0], 1, 'FAIL', 'Bad\x07',
+            'a\x00\x1b[0m\tb\n'), FakeResult(self.solutions[0], 2, 'FAIL',
+                'Incorrect', 'x' * (maxLength + 5))]
+        failures = ElementTree.fromstring(self._write('results.xml')).findall(
+                'testsuite/testcase/failure')
+        self.assertEqual(failures[0].get('message'), 'Bad')
+        self.assertEqual(failures[0].text, 'a[0m\tb\n')
+        self.assertEqual(failures[1].text, 'x' * maxLength +
+                '\n[5 more characters]')
@@ -0,0 +1,109 @@
+################################################################################
+# Filename: tests/test_runhistory.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains tests for util/runhistory.py
+################################################################################
+import unittest
+import tempfile
+import os
+from unittest import mock
+from util.runhistory import RunHistory
+from util.case import KnownCase
+from util.definitions import Definitions
+from util.language import Language
+from util.solution import Solution
+
+class TestRunHistory(unittest.TestCase):
+
+    def setUp(self):
+        # Case types are named by the definitions file
+        self.definitions = {'sample_case_type': 'sample'}
+        patcher = mock.patch.object(Definitions, 'get_value',
+                side_effect=lambda key: self.definitions.get(key))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.historyPath = os.path.join(self.tempDir.name, 'history.json')
+        self.solutionPath = os.path.join(self.tempDir.name, 'Problem1.py')
+        self._write_solution('print(1)')
+        self.solution = Solution(solutionPath=self.solutionPath,
+                problemNumber=1, solutionLanguage=Language('Python',
+                    runCommand='python'))
+        self.case = KnownCase(0, 1, 1, '[1]', '1')
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def _write_solution(self, contents):
+        with open(self.solutionPath, 'w') as solutionFile:
+            solutionFile.write(contents)
+
+    def test_record_and_get_result(self):
+        """
+        Ensure RunHistory returns recorded results, including after a save
+        """
+        history = RunHistory(self.historyPath)
+        self.assertEqual(history.get_result(self.solution, self.case), None)
+
+        history.record(self.solution, self.case, 'FAIL', 'Incorrect', '2')
+        history.record(self.solution, None, 'PASS', None)
+        history.save()
+
+        history = RunHistory(self.historyPath)
+        result = history.get_result(self.solution, self.case)
+        self.assertEqual(result[RunHistory.STATUS_KEY], 'FAIL')
+        self.assertEqual(result[RunHistory.MESSAGE_KEY], 'Incorrect')
+        self.assertEqual(result[RunHistory.OUTPUT_KEY], '2')
+        self.assertEqual(history.get_result(self.solution)[
+            RunHistory.STATUS_KEY], 'PASS')
+
+        # Only the start of a long output is kept
+        history.record(self.solution, self.case, 'FAIL', 'Incorrect',
+                '2' * (RunHistory.MAX_OUTPUT_LENGTH + 1))
+        self.assertEqual(history.get_result(self.solution, self.case)[
+            RunHistory.OUTPUT_KEY], '2' * RunHistory.MAX_OUTPUT_LENGTH)
+
+    def test_invalidation(self):
+        """
+        Ensure RunHistory forgets results when their inputs change
+        """
+        history = RunHistory(self.historyPath)
+        history.record(self.solution, self.case, 'PASS', 'Correct')
+
+        changedCase = KnownCase(0, 1, 1, '[1]', '2')
+        self.assertEqual(history.get_result(self.solution, changedCase), None)
+
+        self.solution.solutionLanguage._runCommand = 'python3'
+        self.assertEqual(RunHistory(self.historyPath).get_result(
+            self.solution, self.case), None)
+
+        self._write_solution('print(2)')
+        history = RunHistory(self.historyPath)
+        history.record(self.solution, self.case, 'PASS', 'Correct')
+        history.save()
+        self._write_solution('print(3)')
+        self.assertEqual(RunHistory(self.historyPath).get_result(
+            self.solution, self.case), None)
+
+    def test_invalidation_by_definitions(self):
+        """
+        Ensure RunHistory forgets results when the problem's checker or
+        limits change
+        """
+        history = RunHistory(self.historyPath)
+        history.record(self.solution, self.case, 'FAIL', 'Incorrect')
+        history.save()
+        self.assertNotEqual(RunHistory(self.historyPath).get_result(
+            self.solution, self.case), None)
+
+        self.definitions['problem1_checker'] = 'tokens'
+        self.assertEqual(RunHistory(self.historyPath).get_result(
+            self.solution, self.case), None)
+
+        del self.definitions['problem1_checker']
+        self.solution._limits = None
+        self.definitions['time_limit'] = 1
+        self.assertEqual(RunHistory(self.historyPath).get_result(
+            self.solution, self.case), None)
@@ -0,0 +1,273 @@
+################################################################################
+# Filename: tests/test_subparser_test.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains tests for util/subparsers/test.py
+################################################################################
+import unittest
+import sys
+import threading
+import time
+from unittest import mock
+from util.case import KnownCase
+from util.definitions import Definitions
+from util.language import ExecutionError, Language
+from util.resultcache import ResultCache
+from util.solution import Solution
+from util.subparsers import test as TestSubparser
+from util.subparsers.test import CaseResult, CompileStage, FailurePolicy
+from util.subparsers.test import ResultReporter
+
+class TestFailurePolicy(unittest.TestCase):
+
+    def setUp(self):
+        # Case types are named by the definitions file
+        patcher = mock.patch.object(Definitions, 'get_value',
+                side_effect=lambda key: {'sample_case_type': 'sample'}.get(key))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.solutions = [Solution(problemNumber=1, solutionWriter=writer,
+            solutionLanguage=Language('Python')) for writer in ('alice', 'bob')]
+        self.cases = [KnownCase(0, 1, caseNumber, '[1]', '1')
+                for caseNumber in range(4)]
+
+    def _get_result(self, solutionIndex, caseIndex, status, message=''):
+        return CaseResult(self.solutions[solutionIndex],
+                self.cases[caseIndex], status, message)
+
+    def test_stop_after_max_failures(self):
+        """
+        Ensure the run stops once max failures are reported, skipping every
+        case of every solution from then on
+        """
+        policy = FailurePolicy(maxFailures=2)
+        policy.record(self._get_result(0, 0, 'FAIL'))
+        policy.record(self._get_result(0, 1, 'PASS'))
+        self.assertFalse(policy.is_stopped())
+        self.assertIsNone(policy.get_skipped_result(self.solutions[1],
+            self.cases[0]))
+
+        policy.record(self._get_result(1, 0, 'FAIL'))
+        self.assertTrue(policy.is_stopped())
+        for solution in self.solutions:
+            skippedResult = policy.get_skipped_result(solution, self.cases[3])
+            self.assertEqual(skippedResult.status, 'SKIP')
+            self.assertEqual(skippedResult.message, 'Skipped after 2 failures')
+
+    def test_reporter_ignores_results_once_stopped(self):
+        """
+        Ensure the ResultReporter stops reporting after max failures
+        """
+        reporter = ResultReporter(False, True, False, sink=mock.Mock(),
+                policy=FailurePolicy(maxFailures=1))
+        with mock.patch('builtins.print'):
+            reporter.report(self._get_result(0, 0, 'PASS'))
+            reporter.report(self._get_result(0, 1, 'FAIL'))
+            reporter.report(self._get_result(0, 2, 'FAIL'))
+        self.assertTrue(reporter.is_stopped())
+        self.assertEqual([call[0][0].case for call in
+            reporter.sink.write.call_args_list], self.cases[:2])
+
+        # The notice is kept out of the results table on stdout
+        with mock.patch('builtins.print') as mocked_print:
+            reporter.report_stopped()
+        mocked_print.assert_called_once_with('Stopped after 1 failures',
+                file=sys.stderr)
+
+    def test_fail_fast(self):
+        """
+        Ensure fail fast skips only the rest of the failing solution's cases
+        """
+        policy = FailurePolicy(failFast=True)
+        policy.record(self._get_result(0, 0, 'FAIL'))
+        self.assertFalse(policy.is_stopped())
+        self.assertEqual(policy.get_skip_message(self.solutions[0]),
+                'Skipped after a failure')
+        self.assertIsNone(policy.get_skip_message(self.solutions[1]))
+
+    def test_skip_after_consecutive_timeouts(self):
+        """
+        Ensure a solution's cases are skipped after timeouts in a row, and
+        that any other result breaks the run of timeouts
+        """
+        timeLimit = ExecutionError.TIME_LIMIT_EXCEEDED
+        policy = FailurePolicy(maxConsecutiveTimeouts=2)
+        policy.record(self._get_result(0, 0, 'FAIL', timeLimit))
+        policy.record(self._get_result(0, 1, 'PASS'))
+        policy.record(self._get_result(0, 2, 'FAIL', timeLimit))
+        policy.record(self._get_result(1, 0, 'FAIL', timeLimit))
+        self.assertIsNone(policy.get_skip_message(self.solutions[0]))
+
+        policy.record(self._get_result(0, 3, 'FAIL', timeLimit))
+        self.assertEqual(policy.get_skip_message(self.solutions[0]),
+                'Skipped after 2 timeouts')
+        self.assertIsNone(policy.get_skip_message(self.solutions[1]))
+        self.assertFalse(policy.is_stopped())
+
+    def test_skipped_cases_are_not_run(self):
+        """
+        Ensure the runner yields skipped results without running the cases
+        the policy skips
+        """
+        policy = FailurePolicy(failFast=True)
+        policy.record(self._get_result(0, 0, 'FAIL'))
+        with mock.patch.object(TestSubparser, '_run_solution_case') as \
+                mocked_run_solution_case:
+            results = list(TestSubparser._iter_solution_case_results(
+                self.solutions[0], self.cases[1:], False, False, policy))
+        mocked_run_solution_case.assert_not_called()
+        self.assertEqual([result.status for result in results], ['SKIP'] * 3)
+
+class TestCompileStage(unittest.TestCase):
+
+    def setUp(self):
+        self.solutions = [Solution(problemNumber=problemNumber,
+            solutionWriter=writer, solutionLanguage=Language(language))
+            for writer, language in (('alice', 'C++'), ('bob', 'C++'))
+            for problemNumber in (1, 2)]
+
+    def _get_results(self, compileStage) -> list:
+        try:
+            return [compileStage.get_result(solution) for solution in
+                    self.solutions]
+        finally:
+            compileStage.shutdown()
+
+    def test_compile_results(self):
+        """
+        Ensure every solution is compiled once, and that only the ones which
+        failed to compile get a failing result
+        """
+        def compile_solution(solution, verbose=False):
+            if solution.problemNumber == 2:
+                raise ExecutionError('Compile Error')
+
+        compileStage = CompileStage(False, compileJobs=2)
+        with mock.patch.object(Solution, 'compile', autospec=True,
+                side_effect=compile_solution) as mocked_compile:
+            compileStage.submit_all(self.solutions)
+            compileStage.submit(self.solutions[0])
+            results = self._get_results(compileStage)
+
+        self.assertEqual(mocked_compile.call_count, len(self.solutions))
+        self.assertEqual([None if result is None else (result.solution,
+            result.status, result.message) for result in results],
+            [None if solution.problemNumber == 1 else (solution, 'FAIL',
+                'Compile Error') for solution in self.solutions])
+
+    def test_compiles_concurrently(self):
+        """
+        Ensure the stage compiles on compileJobs workers at once
+        """
+        barrier = threading.Barrier(2, timeout=10)
+        compileStage = CompileStage(False, compileJobs=2)
+        with mock.patch.object(Solution, 'compile', autospec=True,
+                side_effect=lambda solution, verbose=False: barrier.wait()):
+            compileStage.submit_all(self.solutions[:2])
+            self.assertEqual([compileStage.get_result(solution) for solution
+                in self.solutions[:2]], [None, None])
+        compileStage.shutdown()
+
+    def test_batch_compilation(self):
+        """
+        Ensure the solutions a writer wrote in a batch compiled language are
+        compiled in a single run, whose errors are passed on to each of them
+        """
+        def compile_batch(solutions, verbose=False):
+            return [None if solution.problemNumber == 1 else
+                    ExecutionError('Compile Error') for solution in solutions]
+
+        compileStage = CompileStage(False)
+        with mock.patch.object(Solution, 'supports_batch_compilation',
+                return_value=True), mock.patch.object(Solution,
+                        'compile_batch', side_effect=compile_batch) as \
+                                mocked_compile_batch:
+            compileStage.submit_all(self.solutions)
+            results = self._get_results(compileStage)
+
+        self.assertEqual([call[0][0] for call in
+            mocked_compile_batch.call_args_list],
+            [self.solutions[:2], self.solutions[2:]])
+        self.assertEqual([None if result is None else result.status for
+            result in results], [None, 'FAIL'] * 2)
+
+class TestCachedResults(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(Definitions, 'get_value',
+                side_effect=lambda key: {'sample_case_type': 'sample'}.get(key))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.solution = Solution(problemNumber=1, solutionWriter='alice',
+                solutionLanguage=Language('Python'))
+        self.case = KnownCase(0, 1, 0, '[1]', '1')
+
+    def test_cached_result_has_no_stats(self):
+        """
+        Ensure a cached output is checked without running the solution, and
+        that its result is written without measurements
+        """
+        with mock.patch.object(TestSubparser, '_get_result_cache_key',
+                return_value='key'), mock.patch.object(ResultCache, 'get',
+                        return_value='1'), mock.patch.object(Solution,
+                                'get_output_with_stats') as \
+                                        mocked_get_output_with_stats:
+            result = TestSubparser._run_solution_case(self.solution,
+                    self.case, False, useCache=True)
+        mocked_get_output_with_stats.assert_not_called()
+        self.assertEqual(result.status, 'PASS')
+        self.assertIsNone(result.stats)
+        self.assertEqual([result.to_dict()[key] for key in ('wallTime',
+            'userTime', 'sysTime', 'peakMemory')], [None] * 4)
+
+class TestParallelRunner(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(Definitions, 'get_value',
+                side_effect=lambda key: {'sample_case_type': 'sample'}.get(key))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.solutions = [Solution(problemNumber=problemNumber,
+            solutionWriter=writer, solutionLanguage=Language('Python'))
+            for writer in ('alice', 'bob') for problemNumber in (1, 2)]
+        self.cases = {problemNumber: [KnownCase(0, problemNumber, caseNumber,
+            '[1]', '1') for caseNumber in range(5)] for problemNumber in (1, 2)}
+
+    def test_results_in_input_order(self):
+        """
+        Ensure results are reported in the order the serial runner reports
+        them, however the jobs finish, with compile failures in place
+        """
+        def run_solution_case(solution, case, *args):
+            # Make the last cases finish first
+            time.sleep(0.01 * (5 - case.caseNumber))
+            return CaseResult(solution, case, 'PASS', 'Correct')
+
+        def compile_solution(solution, verbose=False):
+            if solution is self.solutions[1]:
+                raise ExecutionError('Compile Error')
+
+        reporter = ResultReporter(False, True, False, sink=mock.Mock())
+        compileStage = CompileStage(False, compileJobs=2)
+        with mock.patch.object(Solution, 'compile', autospec=True,
+                side_effect=compile_solution), mock.patch.object(
+                        TestSubparser, '_run_solution_case',
+                        side_effect=run_solution_case), mock.patch(
+                                'builtins.print'):
+            solutionPlans = TestSubparser._get_solution_plans(self.solutions,
+                    self.cases, None, compileStage)
+            TestSubparser._test_solutions_in_parallel(solutionPlans, 4,
+                    reporter, compileStage)
+        compileStage.shutdown()
+
+        expectedResults = []
+        for solution in self.solutions:
+            if solution is self.solutions[1]:
+                expectedResults.append((solution, None, 'FAIL'))
+                continue
+            expectedResults.extend((solution, case, 'PASS') for case in
+                    self.cases[int(solution.problemNumber)])
+        self.assertEqual([(call[0][0].solution, call[0][0].case,
+            call[0][0].status) for call in reporter.sink.write.call_args_list],
+            expectedResults)
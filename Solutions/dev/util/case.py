@@ -10,6 +10,20 @@ from util.variables import Variables
 from util.pathmapper import PathMapper
 from util.definitions import Definitions
 import difflib
+import functools
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+# The number of case file names whose matches are remembered
+FILENAME_CACHE_SIZE = 32768
 
 class CaseType:
     """
@@ -52,17 +66,71 @@ class CaseType:
 
 class Case:
     """
-    Stores a general case object with specific input
+    Stores a general case object with specific input. A case read from a
+    case file (or a CasePack) only keeps where its contents can be read
+    from, and they are read and decoded the first time they are used
     """
+    __slots__ = ['caseType', 'problemNumber', 'caseNumber', '_inputContents',
+            '_undecoded']
+
     NAMING_DEFINITION_KEY = 'case_naming'
     CASES_JSON_KEY = 'cases'
     CASES_INPUT_KEY = 'input'
 
-    def __init__(self, caseType, problemNumber, caseNumber, inputContents):
+    def __init__(self, caseType, problemNumber, caseNumber, inputContents,
+            caseSpan: tuple=None, packedCase: tuple=None):
+        """
+        :param caseSpan: The (path, byte offset, byte length) of the case's
+                         JSON text in its case file, given instead of the
+                         contents to read them lazily
+        :param packedCase: The (CasePack, entry number) of the case, given
+                           instead of the contents to read them lazily
+        """
         self.caseType = caseType
         self.problemNumber = problemNumber
         self.caseNumber = caseNumber
-        self.inputContents = inputContents
+        self._inputContents = inputContents
+        self._undecoded = caseSpan if packedCase is None else packedCase
+
+    @property
+    def inputContents(self) -> str:
+        self._decode()
+        return self._inputContents
+
+    def _decode(self):
+        """
+        Reads and decodes the case's JSON text or packed contents, if they
+        have not been decoded yet. They are dropped once the contents are set, which
+        another thread may be doing at the same time, so they are read
+        before the contents are checked
+        """
+        undecoded = self._undecoded
+        if undecoded is None or not self._is_undecoded():
+            return
+
+        if isinstance(undecoded[0], str):
+            path, offset, length = undecoded
+            try:
+                self._set_contents(json.loads(fileops.read_file_bytes(path,
+                    offset, length).decode('utf-8')))
+            except ValueError:
+                raise Exception('Cannot load case {} from file {}'.format(
+                    self.caseNumber, path)) from None
+        else:
+            casePack, entryNumber = undecoded
+            self._set_packed_contents(*casePack.get_contents(entryNumber))
+        self._undecoded = None
+
+    def _is_undecoded(self) -> bool:
+        return self._inputContents is None
+
+    def _set_contents(self, caseContents: dict):
+        self._inputContents = _parse_input_json(
+                caseContents[Case.CASES_INPUT_KEY])
+
+    def _set_packed_contents(self, inputBytes: memoryview,
+            outputBytes: memoryview):
+        self._inputContents = str(inputBytes, 'utf-8')
 
     def get_case_string(self):
         return CaseType.to_string(self.caseType)
@@ -71,12 +139,71 @@ class KnownCase(Case):
     """
     Stores a general case object with specific input and output
     """
+    __slots__ = ['_outputContents', '_encodedOutput', '_outputTokens']
+
     CASES_OUTPUT_KEY = 'output'
 
     def __init__(self, caseType, problemNumber, caseNumber, inputContents, 
-            outputContents):
-        super().__init__(caseType, problemNumber, caseNumber, inputContents)
-        self.outputContents = str(outputContents)
+            outputContents, caseSpan: tuple=None, packedCase: tuple=None):
+        super().__init__(caseType, problemNumber, caseNumber, inputContents,
+                caseSpan, packedCase)
+        self._outputContents = (None if not self._undecoded is None else
+                str(outputContents))
+        self._encodedOutput = None
+        self._outputTokens = None
+
+    @property
+    def outputContents(self) -> str:
+        self._decode()
+        if self._outputContents is None:
+            # A packed output is only decoded once it is used as text
+            self._outputContents = str(self._encodedOutput, 'utf-8')
+        return self._outputContents
+
+    def _is_undecoded(self) -> bool:
+        return self._inputContents is None or (self._outputContents is None
+                and self._encodedOutput is None)
+
+    def _set_contents(self, caseContents: dict):
+        super()._set_contents(caseContents)
+        self._outputContents = str(caseContents[KnownCase.CASES_OUTPUT_KEY])
+
+    def _set_packed_contents(self, inputBytes: memoryview,
+            outputBytes: memoryview):
+        super()._set_packed_contents(inputBytes, outputBytes)
+        # The packed output already is the encoded output, so it is compared
+        # straight from the pack and only decoded if it is needed as text
+        self._encodedOutput = outputBytes
+
+    def get_encoded_output(self):
+        """
+        Gets the expected output as the UTF-8 bytes solution output is
+        compared with. It is only encoded once per case, and is a memoryview
+        of the pack for a case read from a CasePack
+        """
+        self._decode()
+        if self._encodedOutput is None:
+            self._encodedOutput = self.outputContents.encode('utf-8')
+
+        return self._encodedOutput
+
+    def get_decoded_output(self) -> str:
+        """
+        Gets the expected output if it has already been decoded, or None if
+        it has only been read encoded from a CasePack so far
+        """
+        self._decode()
+        return self._outputContents
+
+    def get_output_tokens(self) -> list:
+        """
+        Gets the whitespace separated tokens of the expected output, which
+        are only split once per case
+        """
+        if self._outputTokens is None:
+            self._outputTokens = self.outputContents.split()
+
+        return self._outputTokens
 
     def get_output_diff(self, otherOutput: str) -> str:
         """
@@ -114,24 +241,52 @@ def _get_cases_from_json_file_given_problem_type(path, problemNumber, caseType):
     Return a list of Case object from a JSON file located at path given
     the case type and problem number
     """
-    return get_cases_from_json(fileops.get_json_dict(path), problemNumber,
-            caseType)
+    return list(iter_cases_from_json_file(path, problemNumber, caseType))
+
+def iter_cases_from_json_file(path, problemNumber, caseType,
+        lazy: bool=True):
+    """
+    Lazily yields the Case objects of a JSON file located at path given the
+    case type and problem number. The file is parsed incrementally, so only
+    the case being yielded is held in memory
+
+    :param lazy: Whether the cases only keep where they are in the file,
+                 which is only decoded once they are used, rather than their
+                 decoded contents
+    """
+    if not lazy:
+        for caseNumberStr, caseContents in fileops.iter_json_object_items(path,
+                Case.CASES_JSON_KEY):
+            yield _get_case_from_json(caseNumberStr, caseContents,
+                    problemNumber, caseType)
+        return
+
+    for caseNumberStr, (offset, length), caseKeys in (
+            fileops.iter_json_object_spans(path, Case.CASES_JSON_KEY)):
+        if caseKeys is None or not Case.CASES_INPUT_KEY in caseKeys:
+            raise KeyError(Case.CASES_INPUT_KEY)
+        if KnownCase.CASES_OUTPUT_KEY in caseKeys:
+            yield KnownCase(caseType, problemNumber, int(caseNumberStr), None,
+                    None, caseSpan=(path, offset, length))
+        else:
+            yield Case(caseType, problemNumber, int(caseNumberStr), None,
+                    caseSpan=(path, offset, length))
 
-def _get_file_problemnumber_type_tuple(path):
+def _get_file_problemnumber_type_tuple(path, filenameMatcher=None):
     """
     Extracts the problem number and case type from the file name at path
 
+    :param filenameMatcher: The matcher of the case naming definition, if it
+                            was already built
     :returns: (problemnumber:int, casetype:int)
     """
-    filename = fileops.get_basename_less_extension(path)
-
-    # Extract problem number
-    filenameMatcher = Definitions.get_value_matcher(Case.NAMING_DEFINITION_KEY)
-    problemNumber = filenameMatcher.get_variable_value(filename,
-            Variables.get_variable_key_name(Variables.NAME_PROBLEM_NUMBER))
+    if filenameMatcher is None:
+        filenameMatcher = Definitions.get_value_matcher(
+                Case.NAMING_DEFINITION_KEY)
 
-    # Extract case type
-    caseType = filenameMatcher.get_variable_value(filename,
+    # Extract problem number and case type
+    problemNumber, caseType = _match_case_filename(path, filenameMatcher,
+            Variables.get_variable_key_name(Variables.NAME_PROBLEM_NUMBER),
             Variables.get_variable_key_name(Variables.NAME_CASE_TYPE))
     if problemNumber is None:
         return None
@@ -139,38 +294,612 @@ def _get_file_problemnumber_type_tuple(path):
     # Return the tuple
     return (int(problemNumber), CaseType.from_string(caseType))
 
-def _get_all_cases(directory, problemNumber=None):
+@functools.lru_cache(maxsize=FILENAME_CACHE_SIZE)
+def _match_case_filename(path: str, filenameMatcher, problemNumberName: str,
+        caseTypeName: str) -> tuple:
     """
-    Looks through directory and creates Case objects from all files in
-    the directory.
+    Matches the name of the case file at path against the case naming
+    definition. Matchers are reused while the definition is unchanged, so a
+    file is only matched again once the naming changes or it falls out of
+    the cache
 
-    :return: A dictionary of cases keyed by the problem number
+    :returns: (problem number string or None, case type string or None)
     """
-    cases = {}
+    filename = fileops.get_basename_less_extension(path)
+    return (filenameMatcher.get_variable_value(filename, problemNumberName),
+            filenameMatcher.get_variable_value(filename, caseTypeName))
+
+class CaseIndex:
+    """
+    An on-disk index of the case files in the cases directory, remembering
+    the problem number, case type and case count of every file along with
+    its modification time, size and hash. Only files which changed since the
+    index was saved have their names matched again, so the cases of a few
+    problems can be found without looking at every file
+    """
+    FILE_DEFINITION_KEY = 'case_index_file'
+
+    # Index keys
+    SIGNATURE_KEY = 'signature'
+    FILES_KEY = 'files'
+
+    # File entry keys
+    MTIME_KEY = 'mtime'
+    SIZE_KEY = 'size'
+    HASH_KEY = 'hash'
+    PROBLEM_KEY = 'problem'
+    CASE_TYPE_KEY = 'caseType'
+    CASE_COUNT_KEY = 'caseCount'
+
+    # Files modified this recently may still change within the resolution
+    # of their modification time, so they are checked by hash next time
+    RACY_SECONDS = 2
+
+    def __init__(self, path: str):
+        self._path = path
+        try:
+            index = fileops.get_json_dict(path)
+            self._signature = index[self.SIGNATURE_KEY]
+            self._files = index[self.FILES_KEY]
+        except Exception:
+            self._signature = None
+            self._files = {}
+        self._directory = None
+        self._changed = False
+
+    @classmethod
+    def load(cls):
+        """
+        Loads the index file named in the definitions file. Returns None if
+        no index file is defined
+        """
+        indexFile = Definitions.get_value(cls.FILE_DEFINITION_KEY)
+        if indexFile is None:
+            return None
+
+        return CaseIndex(PathMapper.get_mapped_path(indexFile))
+
+    def save(self):
+        """
+        Writes the index back to its file, if anything in it changed
+        """
+        if not self._changed:
+            return
+
+        fileops.make(fileops.get_parent_dir(self._path),
+                fileops.FileType.DIRECTORY)
+        fileops.write_json_dict_atomically(self._path, {
+            self.SIGNATURE_KEY: self._signature, self.FILES_KEY: self._files})
+        self._changed = False
+
+    def update(self, directory: str):
+        """
+        Brings the index up to date with the files in directory. Files whose
+        modification time and size are unchanged are trusted, the rest are
+        matched against the case naming and hashed. The whole index is
+        rebuilt if the directory or the case naming changed
+        """
+        signature = [os.path.abspath(directory),
+                Definitions.get_value(Case.NAMING_DEFINITION_KEY)] + [
+                        CaseType.to_string(caseType) for caseType in
+                        (CaseType.SAMPLE, CaseType.CORNER_CASE)]
+        if not signature == self._signature:
+            self._signature = signature
+            self._files = {}
+            self._changed = True
+        self._directory = directory
+
+        filenameMatcher = None
+        indexTime = time.time()
+        files = {}
+        with os.scandir(directory) as directoryEntries:
+            for directoryEntry in directoryEntries:
+                if (fileops.file_is_hidden(directoryEntry.name) or
+                        not directoryEntry.is_file()):
+                    continue
+
+                stat = directoryEntry.stat()
+                fileEntry = self._files.get(directoryEntry.name)
+                if (not fileEntry is None and
+                        fileEntry[self.MTIME_KEY] == stat.st_mtime_ns and
+                        fileEntry[self.SIZE_KEY] == stat.st_size):
+                    files[directoryEntry.name] = fileEntry
+                    continue
+
+                if filenameMatcher is None:
+                    filenameMatcher = Definitions.get_value_matcher(
+                            Case.NAMING_DEFINITION_KEY)
+                files[directoryEntry.name] = self._get_file_entry(
+                        directoryEntry.path, stat, fileEntry, filenameMatcher,
+                        indexTime)
+                self._changed = True
+
+        if not len(files) == len(self._files):
+            # Some files were removed
+            self._changed = True
+        self._files = files
+
+    def _get_file_entry(self, path: str, stat, oldFileEntry,
+            filenameMatcher, indexTime: float) -> dict:
+        """
+        Indexes a new or changed file. Its case count is kept if its contents
+        did not change, and is otherwise only known once it is loaded
+        """
+        problemTypeTuple = None
+        if not "_data" in path:
+            problemTypeTuple = _get_file_problemnumber_type_tuple(path,
+                    filenameMatcher)
+
+        fileHash = hashlib.sha256()
+        with open(path, 'rb') as caseFile:
+            for chunk in iter(lambda: caseFile.read(65536), b''):
+                fileHash.update(chunk)
+        fileHash = fileHash.hexdigest()
+
+        caseCount = None
+        if not oldFileEntry is None and oldFileEntry[self.HASH_KEY] == fileHash:
+            caseCount = oldFileEntry[self.CASE_COUNT_KEY]
+
+        return {
+                self.MTIME_KEY: (None if indexTime - stat.st_mtime <
+                    self.RACY_SECONDS else stat.st_mtime_ns),
+                self.SIZE_KEY: stat.st_size,
+                self.HASH_KEY: fileHash,
+                self.PROBLEM_KEY: (None if problemTypeTuple is None else
+                    problemTypeTuple[0]),
+                self.CASE_TYPE_KEY: (None if problemTypeTuple is None else
+                    problemTypeTuple[1]),
+                self.CASE_COUNT_KEY: caseCount
+                }
+
+    def get_case_files(self) -> dict:
+        """
+        Gets the case files found by the last update, in the form of
+        _get_case_file_index
+
+        :return: {problemNumber: [(path, caseType)]}
+        """
+        caseFileIndex = {}
+        for fileName in sorted(self._files):
+            fileEntry = self._files[fileName]
+            if fileEntry[self.PROBLEM_KEY] is None:
+                continue
+            caseFileIndex.setdefault(fileEntry[self.PROBLEM_KEY], []).append(
+                    (fileops.join_path(self._directory, fileName),
+                        fileEntry[self.CASE_TYPE_KEY]))
+        return caseFileIndex
+
+    def record_case_count(self, path: str, caseCount: int):
+        """
+        Records how many cases the file at path held when it was loaded
+        """
+        fileEntry = self._files.get(fileops.get_basename(path))
+        if not fileEntry is None and not fileEntry[self.CASE_COUNT_KEY] == caseCount:
+            fileEntry[self.CASE_COUNT_KEY] = caseCount
+            self._changed = True
+
+    def get_case_count(self, problemNumber: int) -> int:
+        """
+        Gets the number of cases of a problem, or None if some of its files
+        have not been loaded since they changed
+        """
+        caseCount = 0
+        for fileEntry in self._files.values():
+            if fileEntry[self.PROBLEM_KEY] == int(problemNumber):
+                if fileEntry[self.CASE_COUNT_KEY] is None:
+                    return None
+                caseCount += fileEntry[self.CASE_COUNT_KEY]
+        return caseCount
+
+class CasePack:
+    """
+    A single file holding every case of the cases directory, compiled by
+    `cases compile` so that runs do not parse the JSON case files. It is
+    laid out as
+
+        MAGIC | JSON header length | JSON header | entries | payload
+
+    where each entry locates the stdin and expected stdout bytes of a case
+    in the payload. The file is memory mapped, so loading it reads only the
+    header and entries, and processes reading the same pack share its pages.
+    A pack is rebuilt when any file in the cases directory changed since it
+    was compiled
+    """
+    FILE_DEFINITION_KEY = 'case_pack_file'
+
+    MAGIC = b'PYCPACK1'
+    PREFIX = struct.Struct('<8sQ')
+    # problem, case number, case type, whether there is an output, and the
+    # offsets and lengths of the input and output in the payload
+    ENTRY = struct.Struct('<qqBB6xQQQQ')
+
+    # Header keys
+    SIGNATURE_KEY = 'signature'
+    SOURCES_KEY = 'sources'
+    PROBLEMS_KEY = 'problems'
+    ENTRY_COUNT_KEY = 'entryCount'
+
+    def __init__(self, path: str):
+        """
+        :raises ValueError: If the file is not a case pack
+        """
+        with open(path, 'rb') as packFile:
+            self._map = mmap.mmap(packFile.fileno(), 0, access=mmap.ACCESS_READ)
 
-    for possibleCaseFile in fileops.get_files_in_dir(directory):
+        magic, headerLength = self.PREFIX.unpack_from(self._map)
+        if not magic == self.MAGIC:
+            raise ValueError('{} is not a case pack'.format(path))
+        headerStart = self.PREFIX.size
+        self._header = json.loads(self._map[headerStart:headerStart +
+            headerLength].decode('utf-8'))
+        self._entriesStart = headerStart + headerLength
+        self._payloadStart = (self._entriesStart +
+                self._header[self.ENTRY_COUNT_KEY] * self.ENTRY.size)
+
+    @classmethod
+    def get_path(cls) -> str:
+        """
+        Gets the path of the pack file named in the definitions file, or None
+        if none is defined
+        """
+        packFile = Definitions.get_value(cls.FILE_DEFINITION_KEY)
+        return None if packFile is None else PathMapper.get_mapped_path(packFile)
+
+    @classmethod
+    def load(cls, directory: str):
+        """
+        Opens the pack of the cases in directory, rebuilding it if the cases
+        changed since it was compiled. Returns None if there is no pack,
+        since packs are only used once they have been compiled
+        """
+        packPath = cls.get_path()
+        if packPath is None or not fileops.exists(packPath,
+                fileops.FileType.FILE):
+            return None
+
+        try:
+            casePack = CasePack(packPath)
+            if casePack.is_up_to_date(directory):
+                return casePack
+            print("Cases changed since {} was compiled, recompiling it".format(
+                packPath), file=sys.stderr)
+        except (OSError, ValueError, KeyError, struct.error):
+            print("Cannot read case pack {}, recompiling it".format(packPath),
+                    file=sys.stderr)
+
+        cls.compile(directory, packPath)
+        return CasePack(packPath)
+
+    @staticmethod
+    def _get_signature(directory: str) -> list:
+        return [os.path.abspath(directory),
+                Definitions.get_value(Case.NAMING_DEFINITION_KEY)] + [
+                        CaseType.to_string(caseType) for caseType in
+                        (CaseType.SAMPLE, CaseType.CORNER_CASE)]
+
+    @staticmethod
+    def _get_sources(directory: str) -> dict:
+        """
+        Gets the modification time and size of every file in directory.
+        Files modified too recently to be trusted get no modification time,
+        so that the pack is rebuilt again once they have settled
+
+        :return: {fileName: [mtime or None, size]}
+        """
+        indexTime = time.time()
+        sources = {}
+        with os.scandir(directory) as directoryEntries:
+            for directoryEntry in directoryEntries:
+                if (fileops.file_is_hidden(directoryEntry.name) or
+                        not directoryEntry.is_file()):
+                    continue
+                stat = directoryEntry.stat()
+                sources[directoryEntry.name] = [(None if indexTime -
+                    stat.st_mtime < CaseIndex.RACY_SECONDS else
+                    stat.st_mtime_ns), stat.st_size]
+        return sources
+
+    def is_up_to_date(self, directory: str) -> bool:
+        sources = self._header[self.SOURCES_KEY]
+        return (self._header[self.SIGNATURE_KEY] ==
+                self._get_signature(directory) and
+                all(not mtime is None for mtime, _ in sources.values()) and
+                sources == self._get_sources(directory))
+
+    @classmethod
+    def compile(cls, directory: str, path: str) -> int:
+        """
+        Compiles every case in directory into a pack at path, replacing any
+        pack there only once the new one is complete
+
+        :return: The number of cases compiled
+        """
+        # Look at the sources before reading them, so that a file changing
+        # while the pack is compiled makes the pack out of date
+        header = {cls.SIGNATURE_KEY: cls._get_signature(directory),
+                  cls.SOURCES_KEY: cls._get_sources(directory),
+                  cls.PROBLEMS_KEY: {}}
+        caseIndex = CaseIndex.load()
+        caseFileIndex = _get_case_file_index(directory, caseIndex)
+        if not caseIndex is None:
+            caseIndex.save()
+
+        entries = []
+        fileops.make(fileops.get_parent_dir(path), fileops.FileType.DIRECTORY)
+        with tempfile.TemporaryFile() as payloadFile:
+            payloadSize = 0
+            for problemNumber in sorted(caseFileIndex):
+                header[cls.PROBLEMS_KEY][str(problemNumber)] = [len(entries), 0]
+                for caseFile, caseType in caseFileIndex[problemNumber]:
+                    for case in iter_cases_from_json_file(caseFile,
+                            problemNumber, caseType, lazy=False):
+                        inputBytes = case.inputContents.encode('utf-8')
+                        outputBytes = (case.get_encoded_output() if
+                                isinstance(case, KnownCase) else b'')
+                        entries.append(cls.ENTRY.pack(problemNumber,
+                            case.caseNumber, caseType,
+                            isinstance(case, KnownCase), payloadSize,
+                            len(inputBytes), payloadSize + len(inputBytes),
+                            len(outputBytes)))
+                        payloadFile.write(inputBytes)
+                        payloadFile.write(outputBytes)
+                        payloadSize += len(inputBytes) + len(outputBytes)
+                header[cls.PROBLEMS_KEY][str(problemNumber)][1] = (
+                        len(entries) - header[cls.PROBLEMS_KEY][
+                            str(problemNumber)][0])
+            header[cls.ENTRY_COUNT_KEY] = len(entries)
+
+            encodedHeader = json.dumps(header).encode('utf-8')
+            temporaryPath = '{}.{}.{}.tmp'.format(path, os.getpid(),
+                    threading.get_ident())
+            with open(temporaryPath, 'wb') as packFile:
+                packFile.write(cls.PREFIX.pack(cls.MAGIC, len(encodedHeader)))
+                packFile.write(encodedHeader)
+                packFile.write(b''.join(entries))
+                payloadFile.seek(0)
+                shutil.copyfileobj(payloadFile, packFile)
+            os.replace(temporaryPath, path)
+
+        return len(entries)
+
+    def get_cases(self, problemNumbers=None) -> dict:
+        """
+        Creates the cases of the given problems (or of all problems), which
+        read their contents from the pack when they are first used
+
+        :return: {problemNumber: [Case]}
+        """
+        cases = {}
+        for problemString, (firstEntry, entryCount) in self._header[
+                self.PROBLEMS_KEY].items():
+            problemNumber = int(problemString)
+            if not problemNumbers is None and not problemNumber in problemNumbers:
+                continue
+
+            entriesStart = self._entriesStart + firstEntry * self.ENTRY.size
+            entries = self.ENTRY.iter_unpack(self._map[entriesStart:
+                entriesStart + entryCount * self.ENTRY.size])
+            cases[problemNumber] = [(KnownCase(caseType, problemNumber,
+                caseNumber, None, None, packedCase=(self, entryNumber))
+                if hasOutput else Case(caseType, problemNumber, caseNumber,
+                    None, packedCase=(self, entryNumber)))
+                for entryNumber, (_, caseNumber, caseType, hasOutput, *_)
+                in enumerate(entries, firstEntry)]
+        return cases
+
+    def get_contents(self, entryNumber: int) -> tuple:
+        """
+        Gets the stdin and expected stdout bytes of a case as views of the
+        mapped pack, so they are not copied out of it
+
+        :return: (input memoryview, output memoryview)
+        """
+        (_, _, _, _, inputOffset, inputLength, outputOffset,
+                outputLength) = self.ENTRY.unpack_from(self._map,
+                        self._entriesStart + entryNumber * self.ENTRY.size)
+        inputStart = self._payloadStart + inputOffset
+        outputStart = self._payloadStart + outputOffset
+        packView = memoryview(self._map)
+        return (packView[inputStart:inputStart + inputLength],
+                packView[outputStart:outputStart + outputLength])
+
+def _get_case_file_index(directory, caseIndex=None):
+    """
+    Looks through directory and maps every case file to its problem number
+    and case type using only the file names. No case file is opened. If a
+    CaseIndex is given, it is brought up to date and used instead
+
+    :return: {problemNumber: [(path, caseType)]}
+    """
+    if not caseIndex is None:
+        caseIndex.update(directory)
+        return caseIndex.get_case_files()
+
+    caseFileIndex = {}
+
+    for possibleCaseFile in sorted(fileops.get_files_in_dir(directory)):
         if "_data" in possibleCaseFile:
             continue
         problemTypeTuple = _get_file_problemnumber_type_tuple(possibleCaseFile)
-        if (not problemNumber is None and 
-            not problemTypeTuple[0] == int(problemNumber)):
+        if problemTypeTuple is None:
             continue
-        if not problemTypeTuple[0] in cases:
-            cases[problemTypeTuple[0]] = []
-        cases[problemTypeTuple[0]].extend(
-                _get_cases_from_json_file_given_problem_type(possibleCaseFile,
-                problemTypeTuple[0], problemTypeTuple[1]))
+        if not problemTypeTuple[0] in caseFileIndex:
+            caseFileIndex[problemTypeTuple[0]] = []
+        caseFileIndex[problemTypeTuple[0]].append((possibleCaseFile,
+            problemTypeTuple[1]))
+    return caseFileIndex
+
+def _get_all_cases(directory, problemNumber=None, problemNumbers=None,
+        caseIndex=None):
+    """
+    Looks through directory and creates Case objects from all files in
+    the directory. If problem numbers are given, only the files belonging to
+    those problems are opened. If a CaseIndex is given, the files are found
+    through it and the case counts of the loaded files are recorded in it
+
+    :return: A dictionary of cases keyed by the problem number
+    """
+    if not problemNumber is None:
+        problemNumbers = [problemNumber]
+
+    caseFileIndex = _get_case_file_index(directory, caseIndex)
+    if not problemNumbers is None:
+        requestedProblems = set(int(number) for number in problemNumbers)
+        caseFileIndex = {number: caseFiles for number, caseFiles in
+                caseFileIndex.items() if number in requestedProblems}
+
+    cases = {}
+    for caseProblemNumber, caseFiles in caseFileIndex.items():
+        cases[caseProblemNumber] = []
+        for caseFile, caseType in caseFiles:
+            fileCases = _get_cases_from_json_file_given_problem_type(caseFile,
+                    caseProblemNumber, caseType)
+            if not caseIndex is None:
+                caseIndex.record_case_count(caseFile, len(fileCases))
+            cases[caseProblemNumber].extend(fileCases)
     return cases
 
-def get_all_cases(problemNumber=None):
+class CaseStream:
+    """
+    The cases of a single problem, read lazily from their files the first
+    time they are iterated and kept, so that every solution of the problem
+    shares the same cases and the files are only parsed once. Iterating a
+    stream yields the same cases in the same order as get_all_cases lists
+    them
+    """
+
+    def __init__(self, problemNumber: int, caseFiles: list):
+        """
+        :param caseFiles: The [(path, caseType)] of the problem's case files
+        """
+        self.problemNumber = problemNumber
+        self._caseFiles = caseFiles
+        self._cases = []
+        self._unreadCases = None
+
+    def of_case_type(self, caseType: int):
+        """
+        Gets the stream of only the cases of the given CaseType
+        """
+        return CaseStream(self.problemNumber, [(caseFile, fileCaseType) for
+            caseFile, fileCaseType in self._caseFiles if
+            fileCaseType == caseType])
+
+    def iter_once(self):
+        """
+        Yields the cases straight from their files without keeping them, for
+        a single pass over cases that are not shared
+        """
+        for caseFile, caseType in self._caseFiles:
+            yield from iter_cases_from_json_file(caseFile, self.problemNumber,
+                    caseType)
+
+    def _read_case(self) -> bool:
+        """
+        Reads the next case from the files into the kept cases
+
+        :return: Whether there was a case left to read
+        """
+        if self._unreadCases is None:
+            self._unreadCases = self.iter_once()
+        case = next(self._unreadCases, None)
+        if case is None:
+            return False
+        self._cases.append(case)
+        return True
+
+    def __bool__(self) -> bool:
+        """
+        Checks whether the problem has any case, reading at most one
+        """
+        return len(self._cases) > 0 or self._read_case()
+
+    def __iter__(self):
+        caseIndex = 0
+        while caseIndex < len(self._cases) or self._read_case():
+            yield self._cases[caseIndex]
+            caseIndex += 1
+
+def _get_cases_directory() -> str:
+    return fileops.join_path(PathMapper._rootPath,
+            Definitions.get_value('test_directory'))
+
+def get_case_streams(problemNumbers) -> dict:
+    """
+    Finds the case files of the given problems, through the CaseIndex if one
+    is defined, without opening any of them. If the cases are compiled into
+    a CasePack, the pack's cases are given instead, since they are read from
+    the pack only when used
+
+    :return: {problemNumber: CaseStream or [Case]}, of the problems with case
+             files
+    """
+    problemNumbers = set(int(number) for number in problemNumbers)
+    casePack = CasePack.load(_get_cases_directory())
+    if not casePack is None:
+        return casePack.get_cases(problemNumbers)
+
+    caseIndex = CaseIndex.load()
+    caseFileIndex = _get_case_file_index(_get_cases_directory(), caseIndex)
+    if not caseIndex is None:
+        caseIndex.save()
+
+    return {number: CaseStream(number, caseFiles) for number, caseFiles in
+            caseFileIndex.items() if number in problemNumbers}
+
+def iter_cases(problemNumber, caseType=None):
+    """
+    Lazily yields the cases of a problem, file by file and case by case, so
+    that the first case is available before its file has been fully read
+
+    :param caseType: If given, only cases of this CaseType are yielded
+    """
+    problemNumber = int(problemNumber)
+    cases = get_case_streams([problemNumber]).get(problemNumber, [])
+    if isinstance(cases, CaseStream):
+        # Skip the files of other case types without opening them
+        if not caseType is None:
+            cases = cases.of_case_type(caseType)
+        cases = cases.iter_once()
+
+    for case in cases:
+        if caseType is None or case.caseType == caseType:
+            yield case
+
+def get_all_cases(problemNumber=None, problemNumbers=None):
     """
     Resolves the cases directory from the definitions file and delegates to
-    _get_all_cases
+    _get_all_cases, finding the case files through the CaseIndex if one is
+    defined. If the cases are compiled into a CasePack, they are taken from
+    the pack instead
 
+    :param problemNumber: If given, only cases for this problem are loaded
+    :param problemNumbers: If given, only cases for these problems are loaded
     :return: {problemNumber: [Case]}
     """
-    return _get_all_cases(fileops.join_path(PathMapper._rootPath, 
-        Definitions.get_value('test_directory')), problemNumber=problemNumber)
+    casePack = CasePack.load(_get_cases_directory())
+    if not casePack is None:
+        if not problemNumber is None:
+            problemNumbers = [problemNumber]
+        return casePack.get_cases(None if problemNumbers is None else
+                set(int(number) for number in problemNumbers))
+
+    caseIndex = CaseIndex.load()
+    cases = _get_all_cases(_get_cases_directory(),
+            problemNumber=problemNumber, problemNumbers=problemNumbers,
+            caseIndex=caseIndex)
+    if not caseIndex is None:
+        caseIndex.save()
+    return cases
+
+def compile_case_pack(path: str) -> int:
+    """
+    Compiles the cases directory named in the definitions file into a
+    CasePack at path
+
+    :return: The number of cases compiled
+    """
+    return CasePack.compile(_get_cases_directory(), path)
 
 def get_cases_from_json(json, problemNumber, caseType):
     """
@@ -179,18 +908,22 @@ def get_cases_from_json(json, problemNumber, caseType):
 
     :return: [Case]
     """
-    caseList = []
+    return [_get_case_from_json(caseNumberStr, caseContents, problemNumber,
+        caseType) for caseNumberStr, caseContents in
+        json[Case.CASES_JSON_KEY].items()]
 
-    for caseNumberStr, caseContents in json[Case.CASES_JSON_KEY].items():
-        caseObject = Case(caseType, problemNumber, int(caseNumberStr), 
-                _parse_input_json(caseContents[Case.CASES_INPUT_KEY]))
-        if KnownCase.CASES_OUTPUT_KEY in caseContents:
-            caseList.append(KnownCase.from_case(caseObject, 
-                caseContents[KnownCase.CASES_OUTPUT_KEY]))
-        else:
-            caseList.append(caseObject)
+def _get_case_from_json(caseNumberStr, caseContents, problemNumber, caseType):
+    """
+    Create a Case object (or a KnownCase if it has an output) from the json
+    of a single case
+    """
+    caseObject = Case(caseType, problemNumber, int(caseNumberStr), 
+            _parse_input_json(caseContents[Case.CASES_INPUT_KEY]))
+    if KnownCase.CASES_OUTPUT_KEY in caseContents:
+        return KnownCase.from_case(caseObject, 
+            caseContents[KnownCase.CASES_OUTPUT_KEY])
 
-    return caseList
+    return caseObject
 
 def _parse_input_json(jsonData):
     if not isinstance(jsonData, dict):
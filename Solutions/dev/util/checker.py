@@ -0,0 +1,208 @@
+################################################################################
+# Filename: util/checker.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains the checkers, which decide whether the output of a solution is an
+# accepted answer to a case. Each problem can choose its checker in the
+# definitions file
+################################################################################
+from util import fileops
+from util.definitions import Definitions
+from util.pathmapper import PathMapper
+from util.perror import PyCException
+import math
+import subprocess
+import tempfile
+
+CHECKER_DEFINITION_KEY = 'checker'
+FLOAT_TOLERANCE_DEFINITION_KEY = 'float_tolerance'
+CHECKER_COMMAND_DEFINITION_KEY = 'checker_command'
+CHECKER_TIME_LIMIT_DEFINITION_KEY = 'checker_time_limit'
+CHECKER_DEFINITION_KEYS = [CHECKER_DEFINITION_KEY, FLOAT_TOLERANCE_DEFINITION_KEY,
+        CHECKER_COMMAND_DEFINITION_KEY, CHECKER_TIME_LIMIT_DEFINITION_KEY]
+
+class CheckerError(Exception):
+    """
+    Raised when a checker could not come to a verdict
+    """
+    pass
+
+class Checker:
+    """
+    Decides whether a solution's (normalized) output is accepted for a case.
+    Subclasses implement _check
+    """
+    NAME = None
+    # Whether the checker reads the whole output, rather than only asking the
+    # comparator whether it matched
+    USES_OUTPUT = True
+
+    def check(self, case, output: str, comparator=None) -> bool:
+        """
+        :param case: The KnownCase the output was produced for
+        :param output: The normalized output of the solution
+        :param comparator: The OutputComparator the output was fed to while
+                           it was read, if any
+
+        :raises CheckerError: If the checker could not come to a verdict
+        """
+        return self._check(case, output, comparator)
+
+    def _check(self, case, output: str, comparator=None) -> bool:
+        raise NotImplementedError()
+
+    @staticmethod
+    def _is_exact_match(case, output: str, comparator=None) -> bool:
+        if not comparator is None:
+            return comparator.matches()
+
+        return output == case.outputContents
+
+class ExactChecker(Checker):
+    """
+    Accepts only output that is exactly the expected output
+    """
+    NAME = 'exact'
+    USES_OUTPUT = False
+
+    def _check(self, case, output: str, comparator=None) -> bool:
+        return self._is_exact_match(case, output, comparator)
+
+class TokenChecker(Checker):
+    """
+    Accepts output with the same whitespace separated tokens as the expected
+    output, however they are spaced
+    """
+    NAME = 'tokens'
+
+    def _check(self, case, output: str, comparator=None) -> bool:
+        if self._is_exact_match(case, output, comparator):
+            return True
+
+        return output.split() == case.get_output_tokens()
+
+class FloatChecker(Checker):
+    """
+    Accepts output whose tokens are the expected tokens, except that numbers
+    only need to be within the tolerance (absolute or relative) of the
+    expected numbers. Only tokens which differ as strings are parsed
+    """
+    NAME = 'float'
+    DEFAULT_TOLERANCE = 1e-6
+
+    def __init__(self, tolerance: float=DEFAULT_TOLERANCE):
+        self.tolerance = tolerance
+
+    def _check(self, case, output: str, comparator=None) -> bool:
+        if self._is_exact_match(case, output, comparator):
+            return True
+
+        outputTokens = output.split()
+        expectedTokens = case.get_output_tokens()
+        if not len(outputTokens) == len(expectedTokens):
+            return False
+
+        # The comparisons of equal tokens run in C, and only the rest is parsed
+        differingTokens = [(outputToken, expectedToken) for outputToken,
+                expectedToken in zip(outputTokens, expectedTokens)
+                if not outputToken == expectedToken]
+        try:
+            outputNumbers = list(map(float, (outputToken for outputToken, _
+                in differingTokens)))
+            expectedNumbers = list(map(float, (expectedToken for _,
+                expectedToken in differingTokens)))
+        except ValueError:
+            # A differing token is not a number
+            return False
+
+        return all(math.isclose(outputNumber, expectedNumber,
+            rel_tol=self.tolerance, abs_tol=self.tolerance)
+            for outputNumber, expectedNumber in zip(outputNumbers,
+                expectedNumbers))
+
+class ExternalChecker(Checker):
+    """
+    Runs a checker program as `<command> <input file> <output file>
+    <expected output file>`, which accepts the output by exiting with 0
+    (the convention of testlib checkers)
+    """
+    NAME = 'external'
+    DEFAULT_TIME_LIMIT = 20
+
+    def __init__(self, command: str, timeLimit: float=DEFAULT_TIME_LIMIT):
+        self.command = command
+        self.timeLimit = timeLimit
+
+    def _check(self, case, output: str, comparator=None) -> bool:
+        with tempfile.TemporaryDirectory() as checkDirectory:
+            filePaths = []
+            for fileName, contents in (('input', case.inputContents),
+                    ('output', output), ('expected', case.outputContents)):
+                filePaths.append(fileops.join_path(checkDirectory, fileName))
+                with open(filePaths[-1], 'w', encoding='utf-8') as checkFile:
+                    checkFile.write(contents)
+
+            try:
+                returnCode = subprocess.call([self.command] + filePaths,
+                        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL, timeout=self.timeLimit)
+            except (OSError, subprocess.TimeoutExpired):
+                raise CheckerError() from None
+
+        return returnCode == 0
+
+CHECKER_CLASSES = [ExactChecker, TokenChecker, FloatChecker, ExternalChecker]
+CHECKER_NAMES = [checkerClass.NAME for checkerClass in CHECKER_CLASSES]
+
+_checkers = {}
+
+def get_checker(problemNumber) -> Checker:
+    """
+    Gets the checker of a problem, named by its checker definition (exact if
+    there is none). The checker is created once per problem
+
+    :raises PyCException: If the checker is unknown or is missing settings
+    """
+    problemNumber = int(problemNumber)
+    if not problemNumber in _checkers:
+        _checkers[problemNumber] = _load_checker(problemNumber)
+
+    return _checkers[problemNumber]
+
+def get_checker_settings(problemNumber) -> dict:
+    """
+    Gets the definitions a problem's checker is built from, so that verdicts
+    can be tied to them. Unlike get_checker, this never fails
+
+    :return: {definition key: value or None}
+    """
+    return {key: Definitions.get_problem_value(key, problemNumber)
+            for key in CHECKER_DEFINITION_KEYS}
+
+def _load_checker(problemNumber: int) -> Checker:
+    checkerName = Definitions.get_problem_value(CHECKER_DEFINITION_KEY,
+            problemNumber)
+    if checkerName is None or checkerName == ExactChecker.NAME:
+        return ExactChecker()
+    if checkerName == TokenChecker.NAME:
+        return TokenChecker()
+    if checkerName == FloatChecker.NAME:
+        tolerance = Definitions.get_problem_value(
+                FLOAT_TOLERANCE_DEFINITION_KEY, problemNumber)
+        return FloatChecker(FloatChecker.DEFAULT_TOLERANCE if tolerance is None
+                else tolerance)
+    if checkerName == ExternalChecker.NAME:
+        command = Definitions.get_problem_value(CHECKER_COMMAND_DEFINITION_KEY,
+                problemNumber)
+        if command is None:
+            raise PyCException('Error: Problem {} uses an external checker but {} is not defined'.format(
+                problemNumber, CHECKER_COMMAND_DEFINITION_KEY))
+        timeLimit = Definitions.get_problem_value(
+                CHECKER_TIME_LIMIT_DEFINITION_KEY, problemNumber)
+        return ExternalChecker(PathMapper.get_mapped_path(command),
+                ExternalChecker.DEFAULT_TIME_LIMIT if timeLimit is None
+                else timeLimit)
+
+    raise PyCException('Error: Unknown checker {} for problem {}, expected one of {}'.format(
+        checkerName, problemNumber, ', '.join(CHECKER_NAMES)))
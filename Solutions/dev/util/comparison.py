@@ -0,0 +1,107 @@
+################################################################################
+# Filename: util/comparison.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains the OutputComparator, which compares the output of a solution with
+# the expected output of a case while the output is still being read
+################################################################################
+
+# The most bytes a single UTF-8 character takes
+MAX_CHARACTER_SIZE = 4
+
+class OutputComparator:
+    """
+    Compares raw solution output, fed in chunks, with an expected output. The
+    output is normalized the way AppliedLanguage.get_normalized_output does it
+    (carriage returns and the last character are dropped), so it matches if it
+    is the expected output followed by exactly one character.
+
+    Output that still matches is not kept, since it is a prefix of the
+    expected output. Once a chunk differs, comparing stops and the rest of
+    the output is only collected, so that it can be shown, up to the number
+    of bytes asked for
+    """
+
+    def __init__(self, expectedOutput: str, encodedOutput: bytes=None,
+            keptOutputSize: int=None):
+        """
+        :param expectedOutput: The output the solution should produce, or None
+                               to decode it from encodedOutput only if the
+                               matching output is asked for
+        :param encodedOutput: expectedOutput encoded as UTF-8 (as bytes or a
+                              memoryview of them), if known
+        :param keptOutputSize: The most bytes of the start of a mismatched
+                               output that are collected, or None to collect
+                               all of it
+        """
+        self._expectedOutput = expectedOutput
+        self._expected = (encodedOutput if not encodedOutput is None else
+                expectedOutput.encode('utf-8'))
+        self._offset = 0
+        self._tail = b''
+        self._mismatchedChunks = None
+        self._keptOutputSize = keptOutputSize
+        self._mismatchedSize = 0
+        self._isCut = False
+
+    def feed(self, chunk: bytes):
+        chunk = chunk.replace(b'\r', b'')
+        if self._mismatchedChunks is None:
+            expectedPart = self._expected[self._offset:self._offset + len(chunk)]
+            tailSize = len(self._tail) + len(chunk) - len(expectedPart)
+            if chunk.startswith(expectedPart) and tailSize <= MAX_CHARACTER_SIZE:
+                self._offset += len(expectedPart)
+                self._tail += chunk[len(expectedPart):]
+                return
+
+            self._mismatchedChunks = []
+            self._collect(self._expected[:self._offset])
+            self._collect(self._tail)
+        self._collect(chunk)
+
+    def _collect(self, chunk: bytes):
+        """
+        Collects a chunk of mismatched output, cutting it to the kept size
+        """
+        if not self._keptOutputSize is None:
+            keptSize = self._keptOutputSize - self._mismatchedSize
+            if len(chunk) > keptSize:
+                chunk = chunk[:keptSize]
+                self._isCut = True
+        self._mismatchedChunks.append(chunk)
+        self._mismatchedSize += len(chunk)
+
+    def matches(self) -> bool:
+        """
+        Checks whether everything fed so far matches the expected output
+        """
+        if not self._mismatchedChunks is None or self._offset < len(self._expected):
+            return False
+        if len(self._tail) == 0:
+            # Dropping the last character of nothing leaves nothing
+            return len(self._expected) == 0
+
+        try:
+            return len(self._tail.decode('utf-8')) == 1
+        except UnicodeDecodeError:
+            return False
+
+    def get_output(self) -> str:
+        """
+        Gets the normalized output fed so far. If it matches, this is the
+        expected output itself, which is decoded at most once. If a mismatched output
+        was cut, only its start is given, without a character it cuts through
+        """
+        if self.matches():
+            if self._expectedOutput is None:
+                self._expectedOutput = str(self._expected, 'utf-8')
+            return self._expectedOutput
+        if self._mismatchedChunks is None:
+            output = bytes(self._expected[:self._offset]) + self._tail
+        else:
+            output = b''.join(self._mismatchedChunks)
+        if self._isCut:
+            return output.decode('utf-8', 'ignore')
+
+        return output.decode('utf-8')[:-1]
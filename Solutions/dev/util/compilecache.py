@@ -0,0 +1,49 @@
+################################################################################
+# Filename: util/compilecache.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains the CompileCache class, which holds the settings of the cache of
+# compiled solutions kept on disk so that unchanged solutions do not need to
+# be recompiled
+################################################################################
+from util.definitions import Definitions
+from util.pathmapper import PathMapper
+
+class CompileCache:
+    """
+    Compiled solutions are kept in build directories named by the hash of
+    their source, compile command and compiler version, so that the build
+    directories themselves are the cache (see AppliedLanguage). Each build is
+    locked on its own while it is compiled or pruned, so there is no shared
+    index for concurrent runs to race on. The builds are kept in the compile
+    cache directory, unless a build directory is defined
+    """
+    DIRECTORY_DEFINITION_KEY = 'compile_cache_directory'
+    SIZE_DEFINITION_KEY = 'compile_cache_size'
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """
+        The cache is only used if a cache directory is defined
+        """
+        return not Definitions.get_value(cls.DIRECTORY_DEFINITION_KEY) is None
+
+    @classmethod
+    def get_cache_path(cls) -> str:
+        """
+        Gets the directory that compiled solutions are built in
+        """
+        return PathMapper.get_mapped_path(
+                Definitions.get_value(cls.DIRECTORY_DEFINITION_KEY))
+
+    @classmethod
+    def get_max_size(cls) -> int:
+        """
+        Gets the maximum size of the cache in bytes. The definition is in MB
+        """
+        sizeInMegabytes = Definitions.get_value(cls.SIZE_DEFINITION_KEY)
+        if sizeInMegabytes is None:
+            return None
+
+        return int(sizeInMegabytes * 1024 * 1024)
@@ -11,7 +11,10 @@ from util.pathmapper import PathMapper
 
 class Definitions:
     DEFINITIONS_FILE = 'definitions.json'
+    PROBLEM_KEY_FORMAT = 'problem{problem}_{key}'
     _definitionsDict = None
+    # {key: (value, Matcher)}
+    _valueMatchers = {}
 
     @classmethod
     def get_value(cls, key):
@@ -26,12 +29,26 @@ class Definitions:
         else:
             return cls._definitionsDict[key]
 
+    @classmethod
+    def get_problem_value(cls, key, problemNumber):
+        """
+        Gets the value of the definition given by key for a single problem.
+        A definition named problem<number>_<key> overrides the one named key
+        """
+        problemValue = cls.get_value(cls.PROBLEM_KEY_FORMAT.format(
+            problem=problemNumber, key=key))
+        if problemValue is None:
+            return cls.get_value(key)
+        else:
+            return problemValue
+
     @classmethod
     def load_definitions(cls):
         """
         Load the definitions dictionary from the definitions file
         """
         cls._definitionsDict = fileops.get_json_dict(cls.get_definitions_filepath())
+        cls._valueMatchers = {}
 
     @classmethod
     def get_definitions_filepath(cls):
@@ -43,6 +60,13 @@ class Definitions:
     @classmethod
     def get_value_matcher(cls, key):
         """
-        Gets a matcher object for the definition value given by key
+        Gets a matcher object for the definition value given by key. The
+        matcher is built once and reused for as long as the value is unchanged
         """
-        return Matcher.from_variable_string(cls.get_value(key))
+        value = cls.get_value(key)
+        matcherValue, matcher = cls._valueMatchers.get(key, (None, None))
+        if matcher is None or not matcherValue == value:
+            matcher = Matcher.from_variable_string(value)
+            cls._valueMatchers[key] = (value, matcher)
+
+        return matcher
@@ -0,0 +1,609 @@
+################################################################################
+# Filename: util/execution.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains the logic for running a single solution process under time,
+# memory and output limits
+################################################################################
+from util.definitions import Definitions
+import contextlib
+import contextvars
+import functools
+import math
+import mmap
+import os
+import resource
+import selectors
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+# How much of a solution's stderr is kept to classify its failures
+ERROR_TAIL_SIZE = 4096
+
+# The core the solution processes started by the current worker are pinned to
+_pinnedCore = contextvars.ContextVar('pinnedCore', default=None)
+
+class ExecutionLimits:
+    """
+    The limits a single solution process runs under, and how its output is
+    collected
+    """
+    TIME_LIMIT_KEY = 'time_limit'
+    CPU_TIME_LIMIT_KEY = 'cpu_time_limit'
+    MEMORY_LIMIT_KEY = 'memory_limit'
+    OUTPUT_LIMIT_KEY = 'output_limit'
+    SPOOL_OUTPUT_KEY = 'spool_output'
+
+    DEFAULT_WALL_TIME = 20
+
+    # A failing process that used this fraction of its memory limit is
+    # considered to have run out of memory
+    MEMORY_EXCEEDED_FRACTION = 0.9
+
+    # What the supported languages print when an allocation fails
+    OUT_OF_MEMORY_MARKERS = [b'MemoryError', b'std::bad_alloc',
+            b'OutOfMemoryError']
+
+    def __init__(self, wallTime: float=DEFAULT_WALL_TIME, cpuTime: float=None,
+            memory: int=None, output: int=None, spoolOutput: bool=False):
+        """
+        :param wallTime: The maximum seconds the process may run for
+        :param cpuTime: The maximum seconds of CPU the process may use
+        :param memory: The maximum bytes of memory the process may use
+        :param output: The maximum bytes the process may write to stdout
+        :param spoolOutput: Whether stdout goes to a temporary file instead of
+                            a pipe, so that it is not held in memory
+        """
+        self.wallTime = wallTime
+        self.cpuTime = cpuTime
+        self.memory = memory
+        self.output = output
+        self.spoolOutput = spoolOutput
+
+    @classmethod
+    def for_problem(cls, problemNumber, language=None):
+        """
+        Creates the limits for a solution to the given problem from the
+        definitions file (in seconds and MB), scaled by the language's
+        multipliers. A memory multiplier of 0 disables the memory limit. The
+        output limit is not scaled
+        """
+        timeMultiplier = (1 if language is None else
+                language._timeLimitMultiplier)
+        memoryMultiplier = (1 if language is None else
+                language._memoryLimitMultiplier)
+
+        wallTime = Definitions.get_problem_value(cls.TIME_LIMIT_KEY,
+                problemNumber)
+        cpuTime = Definitions.get_problem_value(cls.CPU_TIME_LIMIT_KEY,
+                problemNumber)
+        memory = Definitions.get_problem_value(cls.MEMORY_LIMIT_KEY,
+                problemNumber)
+        output = Definitions.get_problem_value(cls.OUTPUT_LIMIT_KEY,
+                problemNumber)
+        spoolOutput = Definitions.get_problem_value(cls.SPOOL_OUTPUT_KEY,
+                problemNumber)
+
+        return ExecutionLimits(
+                wallTime=(cls.DEFAULT_WALL_TIME if wallTime is None else
+                    wallTime) * timeMultiplier,
+                cpuTime=None if cpuTime is None else cpuTime * timeMultiplier,
+                memory=(None if memory is None or memoryMultiplier == 0 else
+                    int(memory * memoryMultiplier * 1024 * 1024)),
+                output=None if output is None else int(output * 1024 * 1024),
+                spoolOutput=bool(spoolOutput))
+
+    def without_cpu_time(self):
+        """
+        Gets a copy of these limits without a CPU limit, for processes which
+        run many cases and so accumulate CPU time across them
+        """
+        return ExecutionLimits(wallTime=self.wallTime, memory=self.memory,
+                output=self.output, spoolOutput=self.spoolOutput)
+
+    def apply_to_current_process(self, pinnedCore: int=None):
+        """
+        Applies the CPU, memory and output limits to the calling process
+        through setrlimit. The output limit is a file size limit, so it only
+        holds for output spooled to a file. Used as the preexec_fn of
+        solution processes
+
+        :param pinnedCore: The core to pin the process to, if any
+        """
+        if not pinnedCore is None:
+            os.sched_setaffinity(0, {pinnedCore})
+        if not self.cpuTime is None:
+            cpuSeconds = int(math.ceil(self.cpuTime))
+            resource.setrlimit(resource.RLIMIT_CPU, (cpuSeconds, cpuSeconds + 1))
+        if not self.memory is None:
+            resource.setrlimit(resource.RLIMIT_AS, (self.memory, self.memory))
+        if not self.output is None:
+            # One byte over the limit, so that output which was cut off can be
+            # told apart from output of exactly the maximum size, even if the
+            # process ignores SIGXFSZ
+            resource.setrlimit(resource.RLIMIT_FSIZE,
+                    (self.output + 1, self.output + 1))
+
+    def get_preexec_fn(self):
+        """
+        Gets the function that applies these limits in a new solution
+        process, pinning it to the core of the calling worker if it has one
+        """
+        pinnedCore = CorePool.get_pinned_core()
+        if (self.cpuTime is None and self.memory is None and
+                self.output is None and pinnedCore is None):
+            return None
+
+        return functools.partial(self.apply_to_current_process, pinnedCore)
+
+    def is_cpu_time_exceeded(self, returnCode: int, cpuTime: float=None) -> bool:
+        """
+        Checks whether a process was stopped for exceeding its CPU limit, which
+        is signalled with SIGXCPU (or SIGKILL once the hard limit is reached)
+        """
+        if self.cpuTime is None:
+            return False
+        if returnCode == -signal.SIGXCPU:
+            return True
+
+        return (returnCode == -signal.SIGKILL and not cpuTime is None and
+                cpuTime >= self.cpuTime)
+
+    def is_output_exceeded(self, returnCode: int, outputSize: int=None) -> bool:
+        """
+        Checks whether a process wrote more output than allowed. Writing past
+        RLIMIT_FSIZE is signalled with SIGXFSZ
+        """
+        if self.output is None:
+            return False
+        if returnCode == -signal.SIGXFSZ:
+            return True
+
+        return not outputSize is None and outputSize > self.output
+
+    def is_memory_exceeded(self, returnCode: int, peakMemory: int=None,
+            errorOutput: bytes=None) -> bool:
+        """
+        Checks whether a failing process ran out of memory. Allocations past
+        RLIMIT_AS simply fail, so a failing process is assumed to have run out
+        if its stderr reports a failed allocation or its peak resident memory
+        came close to the limit
+        """
+        if self.memory is None or returnCode == 0:
+            return False
+        if not errorOutput is None and any(marker in errorOutput for marker
+                in self.OUT_OF_MEMORY_MARKERS):
+            return True
+
+        return (not peakMemory is None and
+                peakMemory >= self.memory * self.MEMORY_EXCEEDED_FRACTION)
+
+class ExecutionStats:
+    """
+    The resources used by a single run of a solution. Anything that could not
+    be measured is None
+    """
+
+    def __init__(self, wallTime: float=None, userTime: float=None,
+            sysTime: float=None, peakMemory: int=None):
+        """
+        :param wallTime: The seconds between starting and reaping the process
+        :param userTime: The seconds of CPU spent in user mode
+        :param sysTime: The seconds of CPU spent in the kernel
+        :param peakMemory: The peak resident memory in bytes
+        """
+        self.wallTime = wallTime
+        self.userTime = userTime
+        self.sysTime = sysTime
+        self.peakMemory = peakMemory
+
+    @classmethod
+    def from_rusage(cls, wallTime: float, usage):
+        """
+        Creates the stats of a process from the resource usage os.wait4 gave
+        for it. ru_maxrss is in KB on Linux
+        """
+        return ExecutionStats(wallTime=wallTime, userTime=usage.ru_utime,
+                sysTime=usage.ru_stime, peakMemory=usage.ru_maxrss * 1024)
+
+    def get_cpu_time(self) -> float:
+        if self.userTime is None or self.sysTime is None:
+            return None
+
+        return self.userTime + self.sysTime
+
+    def to_dict(self) -> dict:
+        return {'wallTime': self.wallTime, 'userTime': self.userTime,
+                'sysTime': self.sysTime, 'peakMemory': self.peakMemory}
+
+class CorePool:
+    """
+    The cores solution processes are pinned to, so that concurrent solutions
+    do not compete for a core and their timings stay reproducible. A worker
+    holds one core while it runs solutions, and every solution process it
+    starts is pinned to that core. The number of workers must not exceed the
+    number of cores
+    """
+    PINNED_CORES_KEY = 'pinned_cores'
+
+    # The cores isolated from the scheduler with the isolcpus boot parameter
+    ISOLATED_CORES_PATH = '/sys/devices/system/cpu/isolated'
+
+    def __init__(self, cores: list):
+        self._lock = threading.Lock()
+        self._freeCores = list(reversed(cores))
+        self._coreCount = len(cores)
+
+    @classmethod
+    def load(cls):
+        """
+        Creates the pool of the cores listed by the pinned cores definition
+        or, without one, of the isolated cores this process may run on. If
+        no core is isolated, every core this process may run on is used
+        """
+        allowedCores = os.sched_getaffinity(0)
+        cores = Definitions.get_value(cls.PINNED_CORES_KEY)
+        if cores is None:
+            cores = cls._get_isolated_cores() & allowedCores or allowedCores
+
+        return CorePool(sorted(set(cores) & allowedCores))
+
+    @classmethod
+    def _get_isolated_cores(cls) -> set:
+        """
+        Reads the isolated cores, which are listed like "2-5,7"
+        """
+        try:
+            with open(cls.ISOLATED_CORES_PATH, 'r') as isolatedFile:
+                coreList = isolatedFile.read().strip()
+        except OSError:
+            return set()
+
+        cores = set()
+        for coreRange in filter(None, coreList.split(',')):
+            first, _, last = coreRange.partition('-')
+            cores.update(range(int(first), int(last or first) + 1))
+        return cores
+
+    def get_core_count(self) -> int:
+        return self._coreCount
+
+    @contextlib.contextmanager
+    def pin(self):
+        """
+        Holds a core for the calling worker (a thread or an asyncio task)
+        while the context is active
+        """
+        with self._lock:
+            core = self._freeCores.pop()
+        token = _pinnedCore.set(core)
+        try:
+            yield core
+        finally:
+            _pinnedCore.reset(token)
+            with self._lock:
+                self._freeCores.append(core)
+
+    @staticmethod
+    def get_pinned_core() -> int:
+        """
+        Gets the core held by the calling worker, or None
+        """
+        return _pinnedCore.get()
+
+class Reaper:
+    """
+    Solution processes are started in their own session, and so in their own
+    process group, so that anything they fork can be killed with them. The
+    Reaper kills process groups and keeps count of the solutions which left
+    processes running after they exited
+    """
+    _lock = threading.Lock()
+    _leakedGroupCount = 0
+
+    @staticmethod
+    def kill_group(processGroupId: int) -> bool:
+        """
+        Kills every process in a process group
+
+        :return: Whether any process was left in the group
+        """
+        try:
+            os.killpg(processGroupId, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            return False
+
+        return True
+
+    @classmethod
+    def reap(cls, processGroupId: int):
+        """
+        Kills whatever is left of the process group of a solution that has
+        been reaped, counting it as leaked if anything was
+        """
+        if cls.kill_group(processGroupId):
+            with cls._lock:
+                cls._leakedGroupCount += 1
+
+    @classmethod
+    def get_leaked_group_count(cls) -> int:
+        """
+        Gets the number of solution runs that left processes behind. Forked
+        processes that were still exiting may be counted too
+        """
+        return cls._leakedGroupCount
+
+class ProcessResult:
+    """
+    Stores what is known about a finished solution process
+    """
+
+    def __init__(self, returnCode: int, output: bytes, timedOut: bool,
+            stats: ExecutionStats=None, errorOutput: bytes=None,
+            outputSize: int=None):
+        """
+        :param returnCode: The return code, negative if killed by a signal
+        :param output: Everything the process wrote to stdout, unless it was
+                       passed to an output consumer
+        :param timedOut: Whether the process was killed for exceeding its
+                         wall time
+        :param stats: The resources the process used
+        :param errorOutput: The end of what the process wrote to stderr, if
+                            stderr was captured
+        :param outputSize: The number of bytes the process wrote to stdout
+        """
+        self.returnCode = returnCode
+        self.output = output
+        self.timedOut = timedOut
+        self.stats = stats if not stats is None else ExecutionStats()
+        self.errorOutput = errorOutput
+        self.outputSize = outputSize if not outputSize is None else len(output)
+
+def run_process(command: list, inputBytes: bytes, limits: ExecutionLimits,
+        stderr=subprocess.DEVNULL, readSize: int=65536,
+        outputConsumer=None) -> ProcessResult:
+    """
+    Runs command with inputBytes on its stdin under limits and collects its
+    stdout. The process is reaped with os.wait4 so that its resource usage is
+    known. If stderr is DEVNULL, its last ERROR_TAIL_SIZE bytes are kept
+    instead so that failures can be classified
+
+    If limits.spoolOutput is set, stdout goes to a temporary file, which is
+    read back through mmap once the process has exited. Otherwise the
+    process is killed as soon as more output than limits.output is read
+    from its pipe. The process runs in its own process group, all of which is
+    killed along with it, and anything left in the group once it has exited
+    is killed by the Reaper
+
+    :param outputConsumer: If given, every chunk of stdout is passed to its
+                           feed() as it is read instead of being collected
+
+    :raises OSError: If the command could not be started
+    """
+    captureErrors = stderr == subprocess.DEVNULL
+    with contextlib.ExitStack() as spoolStack:
+        spoolFile = (spoolStack.enter_context(tempfile.TemporaryFile())
+                if limits.spoolOutput else None)
+        process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                stdout=spoolFile if not spoolFile is None else subprocess.PIPE,
+                stderr=subprocess.PIPE if captureErrors else stderr,
+                preexec_fn=limits.get_preexec_fn(), start_new_session=True)
+        startTime = time.monotonic()
+        deadline = startTime + limits.wallTime
+        try:
+            (output, errorOutput, timedOut, outputSize,
+                    exitStatus) = _communicate(process, inputBytes, deadline,
+                            readSize, outputConsumer, limits.output)
+
+            if exitStatus is None:
+                status, usage = _wait_until(process,
+                        None if timedOut else deadline)
+                if status is None:
+                    timedOut = True
+                    Reaper.kill_group(process.pid)
+                    status, usage = _wait_until(process, None)
+                Reaper.reap(process.pid)
+            else:
+                status, usage = exitStatus
+        except BaseException:
+            # Do not leave the solution running if the run is aborted
+            Reaper.kill_group(process.pid)
+            _close_pipes(process)
+            process.wait()
+            raise
+        wallTime = time.monotonic() - startTime
+
+        if not spoolFile is None:
+            output, outputSize = _read_spooled_output(spoolFile, readSize,
+                    outputConsumer)
+
+    # Let the Popen object know the process has been reaped
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return ProcessResult(process.returncode, output, timedOut,
+            stats=ExecutionStats.from_rusage(wallTime, usage),
+            errorOutput=errorOutput if captureErrors else None,
+            outputSize=outputSize)
+
+def _read_spooled_output(spoolFile, readSize: int, outputConsumer=None):
+    """
+    Reads the output a process wrote to spoolFile through mmap, passing it
+    to the output consumer in chunks if there is one
+
+    :return: (output bytes, or b'' if they were consumed, output size)
+    """
+    outputSize = os.fstat(spoolFile.fileno()).st_size
+    if outputSize == 0:
+        return b'', 0
+
+    with mmap.mmap(spoolFile.fileno(), 0, access=mmap.ACCESS_READ) as outputMap:
+        if outputConsumer is None:
+            return outputMap[:], outputSize
+
+        for offset in range(0, outputSize, readSize):
+            outputConsumer.feed(outputMap[offset:offset + readSize])
+
+    return b'', outputSize
+
+def _communicate(process, inputBytes: bytes, deadline: float, readSize: int,
+        outputConsumer=None, outputLimit: int=None):
+    """
+    Writes the input to and reads the output from process until its stdout
+    closes or the deadline passes, in which case the process is killed. The
+    process is also killed once it has written more than outputLimit bytes,
+    and the output past the limit is not kept. The process is reaped as soon
+    as it exits, and whatever it left in its process group is killed, so that
+    a forked process holding its pipes open does not keep them from closing
+
+    :return: (output bytes, stderr tail bytes, whether the deadline passed,
+              bytes of output read, (wait status, resource usage) if the
+              process was reaped or else None)
+    """
+    outputChunks = []
+    outputSize = 0
+    errorOutput = b''
+    exitStatus = None
+    inputView = memoryview(inputBytes)
+    inputOffset = 0
+    with selectors.DefaultSelector() as selector, \
+            _open_exit_descriptor(process) as exitDescriptor:
+        if len(inputBytes) > 0:
+            os.set_blocking(process.stdin.fileno(), False)
+            selector.register(process.stdin, selectors.EVENT_WRITE)
+        else:
+            process.stdin.close()
+        pipes = [pipe for pipe in (process.stdout, process.stderr)
+                if not pipe is None]
+        for pipe in pipes:
+            selector.register(pipe, selectors.EVENT_READ)
+        if not exitDescriptor is None:
+            selector.register(exitDescriptor, selectors.EVENT_READ)
+        pollDelay = 0.0005
+
+        while len(pipes) > 0:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                Reaper.kill_group(process.pid)
+                _close_pipes(process)
+                return (b''.join(outputChunks), errorOutput, True, outputSize,
+                        exitStatus)
+
+            if exitDescriptor is None and exitStatus is None:
+                # Without a pidfd, the exit can only be noticed by polling
+                if _has_exited(process):
+                    exitStatus = _reap_exited(process, selector)
+                    continue
+                remaining = min(remaining, pollDelay)
+                pollDelay = min(pollDelay * 2, 0.05)
+
+            for key, events in selector.select(remaining):
+                if key.fileobj is exitDescriptor:
+                    selector.unregister(exitDescriptor)
+                    exitStatus = _reap_exited(process, selector)
+                    continue
+
+                if key.fileobj is process.stdin:
+                    try:
+                        inputOffset += os.write(key.fd, inputView[inputOffset:
+                            inputOffset + readSize])
+                    except BlockingIOError:
+                        continue
+                    except BrokenPipeError:
+                        # The process exited without reading all of its input
+                        inputOffset = len(inputBytes)
+                    if inputOffset >= len(inputBytes):
+                        selector.unregister(process.stdin)
+                        process.stdin.close()
+                    continue
+
+                if not key.fileobj in pipes:
+                    # Closed by an earlier event of this select
+                    continue
+                chunk = os.read(key.fd, readSize)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    pipes.remove(key.fileobj)
+                elif key.fileobj is process.stdout:
+                    outputSize += len(chunk)
+                    if not outputLimit is None and outputSize > outputLimit:
+                        # Stop a runaway solution before it fills memory
+                        Reaper.kill_group(process.pid)
+                        _close_pipes(process)
+                        return (b''.join(outputChunks), errorOutput, False,
+                                outputSize, exitStatus)
+                    if outputConsumer is None:
+                        outputChunks.append(chunk)
+                    else:
+                        outputConsumer.feed(chunk)
+                else:
+                    errorOutput = (errorOutput + chunk)[-ERROR_TAIL_SIZE:]
+
+    _close_pipes(process)
+    return b''.join(outputChunks), errorOutput, False, outputSize, exitStatus
+
+@contextlib.contextmanager
+def _open_exit_descriptor(process):
+    """
+    Opens a pidfd of process, which becomes readable once it exits. Yields
+    None where pidfds are not supported
+    """
+    try:
+        exitDescriptor = os.pidfd_open(process.pid)
+    except (AttributeError, OSError):
+        yield None
+        return
+
+    try:
+        yield exitDescriptor
+    finally:
+        os.close(exitDescriptor)
+
+def _has_exited(process) -> bool:
+    # WNOWAIT leaves the process to be reaped, along with its resource usage
+    return not os.waitid(os.P_PID, process.pid,
+            os.WEXITED | os.WNOHANG | os.WNOWAIT) is None
+
+def _reap_exited(process, selector):
+    """
+    Reaps a process which has exited and kills whatever it left in its
+    process group. Its stdin is closed, since nothing will read it
+
+    :return: (wait status, resource usage)
+    """
+    _, status, usage = os.wait4(process.pid, 0)
+    Reaper.reap(process.pid)
+    if not process.stdin.closed:
+        if process.stdin in (key.fileobj for key in
+                selector.get_map().values()):
+            selector.unregister(process.stdin)
+        process.stdin.close()
+    return status, usage
+
+def _wait_until(process, deadline: float):
+    """
+    Reaps process, giving up at the deadline (or never if it is None)
+
+    :return: (wait status or None if the deadline passed, resource usage)
+    """
+    if deadline is None:
+        _, status, usage = os.wait4(process.pid, 0)
+        return status, usage
+
+    delay = 0.0005
+    while True:
+        pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+        if not pid == 0:
+            return status, usage
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None, None
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.05)
+
+def _close_pipes(process):
+    for pipe in (process.stdin, process.stdout, process.stderr):
+        if not pipe is None and not pipe.closed:
+            pipe.close()
@@ -7,10 +7,12 @@
 ################################################################################
 import os
 import json
+import re
 import shutil
 import csv
 import zipfile
 import tarfile
+import threading
 
 def exists(path, fileType):
     """
@@ -99,6 +101,333 @@ def get_json_dict(path):
 
     return dictionary
 
+def _get_json_container_pattern(elementPattern: bytes) -> bytes:
+    """
+    Gets the pattern of a JSON object or array whose strings and nested
+    values all match elementPattern
+    """
+    return (rb'[{\[][^"{}\[\]]*(?:(?:' + elementPattern +
+            rb')[^"{}\[\]]*)*[}\]]')
+
+class _JsonStreamReader:
+    """
+    Reads JSON values one at a time from a file opened in binary mode,
+    reading only as much of the file as the next value needs. A value is
+    found by skipping over its strings and brackets, so it is only decoded
+    if it is read, and where it is in the file is known in bytes. Skipped
+    values are not checked to be valid JSON until they are decoded
+    """
+    WHITESPACE = re.compile(rb'[ \t\n\r]*')
+    STRING_CONTENTS_PATTERN = rb'[^"\\]*(?:\\.[^"\\]*)*'
+    STRING_PATTERN = rb'"' + STRING_CONTENTS_PATTERN + rb'"'
+    STRING = re.compile(STRING_PATTERN, re.DOTALL)
+    # Objects and arrays nested at most twice are skipped in a single match
+    NESTED_PATTERN = _get_json_container_pattern(STRING_PATTERN + b'|' +
+            _get_json_container_pattern(STRING_PATTERN))
+    CONTAINER_PATTERN = _get_json_container_pattern(STRING_PATTERN + b'|' +
+            NESTED_PATTERN)
+    # A key of an object and the colon after it
+    KEY = re.compile(rb'[ \t\n\r]*"(' + STRING_CONTENTS_PATTERN +
+            rb')"[ \t\n\r]*:', re.DOTALL)
+    # A key of an object and its value, if the value is followed by what
+    # ends it within the buffer
+    MEMBER = re.compile(KEY.pattern + rb'[ \t\n\r]*(' + STRING_PATTERN + b'|' +
+            CONTAINER_PATTERN + rb'|[^ \t\n\r,:"{}\[\]]+)(?=[ \t\n\r]*[,}])',
+            re.DOTALL)
+    # A key of an object matching CONTAINER_PATTERN, whose values are nested
+    # at most twice, and its value
+    OBJECT_MEMBER = re.compile(KEY.pattern + rb'[ \t\n\r]*(?:' +
+            STRING_PATTERN + b'|' + NESTED_PATTERN +
+            rb'|[^ \t\n\r,:"{}\[\]]+)(?=[ \t\n\r]*[,}])', re.DOTALL)
+    CONTAINER = re.compile(CONTAINER_PATTERN, re.DOTALL)
+    # What follows a member of an object
+    SEPARATOR = re.compile(rb'[ \t\n\r]*([,}])')
+    # The characters that start or end a string, object or array
+    STRUCTURE = re.compile(rb'["{}\[\]]')
+    # Numbers, true, false and null run until whatever may follow a value
+    SCALAR = re.compile(rb'[^ \t\n\r,:\]}]*')
+
+    def __init__(self, openFile, readSize: int=65536):
+        self._file = openFile
+        self._readSize = readSize
+        self._decoder = json.JSONDecoder()
+        self._buffer = b''
+        self._position = 0
+        # The byte offset in the file of the start of the buffer
+        self._bufferOffset = 0
+        self._endOfFile = False
+        # The (start, end) in the buffer of the value after the key just
+        # read, if it was found along with the key
+        self._nextValue = None
+
+    def _read_more(self, size: int) -> bool:
+        """
+        Appends up to size bytes to the buffer, dropping what has already
+        been read
+
+        :return: Whether anything was read
+        """
+        chunk = self._file.read(size)
+        self._bufferOffset += self._position
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        self._endOfFile = len(chunk) == 0
+        return not self._endOfFile
+
+    def _grow_buffer(self):
+        """
+        Reads at least as much again as is left in the buffer, so that
+        scanning a large value again after each read takes linear time
+
+        :raises ValueError: If the file has already been read to its end
+        """
+        if self._endOfFile:
+            raise ValueError('Unexpected end of JSON')
+        self._read_more(max(self._readSize, len(self._buffer) - self._position))
+
+    def peek_token(self) -> str:
+        """
+        Skips whitespace and gets the next character without reading it
+        """
+        # A value read token by token is not the value found with its key
+        self._nextValue = None
+        while True:
+            self._position = self.WHITESPACE.match(self._buffer,
+                    self._position).end()
+            if self._position < len(self._buffer):
+                return chr(self._buffer[self._position])
+            if not self._read_more(self._readSize):
+                raise ValueError('Unexpected end of JSON')
+
+    def read_token(self) -> str:
+        """
+        Skips whitespace and reads the next structural character
+        """
+        token = self.peek_token()
+        self._position += 1
+        return token
+
+    @staticmethod
+    def _decode_string(contents: bytes) -> str:
+        """
+        Decodes what is between the quotes of a JSON string, which only needs
+        to be unescaped if it holds a backslash
+        """
+        if b'\\' in contents:
+            return json.loads(b'"' + contents + b'"')
+        return contents.decode('utf-8')
+
+    def _get_object_keys(self, start: int, end: int, deep: bool) -> set:
+        """
+        Gets the keys of the object from start to end in the buffer without
+        decoding its values
+
+        :param deep: Whether the object is nested too deeply to match
+                     CONTAINER, so that its keys are found bracket by bracket
+        """
+        if not deep:
+            return set(map(self._decode_string, self.OBJECT_MEMBER.findall(
+                self._buffer, start + 1, end)))
+
+        keys = set()
+        depth = 0
+        position = start
+        while position < end:
+            structure = self.STRUCTURE.search(self._buffer, position, end)
+            position = structure.end()
+            character = structure.group()
+            if character == b'"':
+                string = self.STRING.match(self._buffer, structure.start())
+                position = string.end()
+                # Only the keys of the object itself are followed by a colon
+                colon = self.WHITESPACE.match(self._buffer, position).end()
+                if depth == 1 and self._buffer[colon:colon + 1] == b':':
+                    keys.add(self._decode_string(string.group()[1:-1]))
+            elif character in (b'{', b'['):
+                depth += 1
+            else:
+                depth -= 1
+        return keys
+
+    def _scan_value(self, start: int) -> tuple:
+        """
+        Finds the end of the value starting at start in the buffer
+
+        :return: (end, whether the value is nested too deeply to match
+                 CONTAINER), or None if the value may not end within the
+                 buffer
+        """
+        buffer = self._buffer
+        first = buffer[start:start + 1]
+        if first == b'"':
+            string = self.STRING.match(buffer, start)
+            return None if string is None else (string.end(), False)
+        if not first in (b'{', b'['):
+            end = self.SCALAR.match(buffer, start).end()
+            if end == start:
+                raise ValueError('Expected a JSON value')
+            # A number cut off by the end of the buffer may go on in the file
+            if end == len(buffer) and not self._endOfFile:
+                return None
+            return end, False
+
+        container = self.CONTAINER.match(buffer, start)
+        if not container is None:
+            return container.end(), False
+
+        # Go bracket by bracket through values nested too deeply to match
+        depth = 0
+        position = start
+        while True:
+            structure = self.STRUCTURE.search(buffer, position)
+            if structure is None:
+                return None
+            position = structure.end()
+            character = structure.group()
+            if character == b'"':
+                string = self.STRING.match(buffer, structure.start())
+                if string is None:
+                    return None
+                position = string.end()
+            elif character in (b'{', b'['):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return position, True
+
+    def _find_value(self) -> tuple:
+        """
+        Skips whitespace and finds the next value, growing the buffer until
+        the value fits
+
+        :return: (start, end, whether the value is nested too deeply to match
+                 CONTAINER) of the value in the buffer
+        """
+        if not self._nextValue is None:
+            nextValue, self._nextValue = self._nextValue, None
+            return nextValue
+
+        self.peek_token()
+        while True:
+            scanned = self._scan_value(self._position)
+            if not scanned is None:
+                return (self._position,) + scanned
+            self._grow_buffer()
+
+    def read_value(self):
+        """
+        Skips whitespace and decodes the next value
+        """
+        start, self._position, _ = self._find_value()
+        return self._decoder.decode(self._buffer[start:self._position].decode(
+            'utf-8'))
+
+    def read_value_span(self) -> tuple:
+        """
+        Skips whitespace and finds where the next value is in the file,
+        without decoding it
+
+        :return: ((byte offset, byte length) of the value's JSON text, set of
+                 the value's keys if it is an object, else None)
+        """
+        start, self._position, deep = self._find_value()
+        keys = (self._get_object_keys(start, self._position, deep) if
+                self._buffer[start:start + 1] == b'{' else None)
+        return (self._bufferOffset + start, self._position - start), keys
+
+    def skip_value(self):
+        """
+        Skips whitespace and the next value, without decoding it
+        """
+        self._position = self._find_value()[1]
+
+    def _read_key(self) -> str:
+        """
+        Skips whitespace and reads the next key of an object along with the
+        colon after it. If the key's value is in the buffer, it is found too
+        """
+        member = self.MEMBER.match(self._buffer, self._position)
+        if not member is None:
+            self._position = member.start(2)
+            self._nextValue = member.span(2) + (False,)
+            return self._decode_string(member.group(1))
+
+        while True:
+            key = self.KEY.match(self._buffer, self._position)
+            if not key is None:
+                self._position = key.end()
+                return self._decode_string(key.group(1))
+            self._grow_buffer()
+
+    def iter_object_keys(self):
+        """
+        Lazily decodes the keys of the object starting at the current
+        position. The value of each key must be read before the next key
+        """
+        if not self.read_token() == '{':
+            raise ValueError('Expected a JSON object')
+        if self.peek_token() == '}':
+            self.read_token()
+            return
+
+        while True:
+            yield self._read_key()
+            separator = self.SEPARATOR.match(self._buffer, self._position)
+            if separator is None:
+                separator = self.read_token()
+            else:
+                self._position = separator.end()
+                separator = chr(separator.group(1)[0])
+            if separator == '}':
+                return
+            if not separator == ',':
+                raise ValueError('Expected , or } in a JSON object')
+
+def _iter_json_object_values(path, key: str, readValue):
+    """
+    Lazily yields (key, readValue(reader)) for each key of the object stored
+    under key in the top level object of a json file, where reader is the
+    _JsonStreamReader positioned at the key's value
+    """
+    if not exists(path, FileType.FILE):
+        return
+
+    try:
+        with open(path, 'rb') as openFile:
+            reader = _JsonStreamReader(openFile)
+            for topLevelKey in reader.iter_object_keys():
+                if not topLevelKey == key:
+                    reader.skip_value()
+                    continue
+
+                for itemKey in reader.iter_object_keys():
+                    yield itemKey, readValue(reader)
+    except ValueError:
+        raise Exception('Cannot load JSON from file {}'.format(path)) from None
+
+def iter_json_object_items(path, key: str):
+    """
+    Lazily yields the (key, value) pairs of the object stored under key in
+    the top level object of a json file, without loading the whole file.
+    Yields nothing if the file does not exist
+    """
+    return _iter_json_object_values(path, key, _JsonStreamReader.read_value)
+
+def iter_json_object_spans(path, key: str):
+    """
+    Lazily yields where the values of the object stored under key in the top
+    level object of a json file are, without decoding them, so that each can
+    be read from the file when it is needed. Yields nothing if the file does
+    not exist
+
+    :return: (key, (byte offset, byte length) of the value's JSON text, set
+             of the value's keys if it is an object, else None)
+    """
+    for itemKey, (span, keys) in _iter_json_object_values(path, key,
+            _JsonStreamReader.read_value_span):
+        yield itemKey, span, keys
+
 def write_json_dict(path, dictionary):
     """
     Writes a dictionary into a json file
@@ -106,6 +435,16 @@ def write_json_dict(path, dictionary):
     with open(path, 'w+') as openFile:
         openFile.write(get_json_string(dictionary))
 
+def write_json_dict_atomically(path, dictionary):
+    """
+    Writes a dictionary into a json file through a temporary file, so that
+    concurrent readers never see a partially written file
+    """
+    temporaryPath = '{}.{}.{}.tmp'.format(path, os.getpid(),
+            threading.get_ident())
+    write_json_dict(temporaryPath, dictionary)
+    os.replace(temporaryPath, path)
+
 def write_file(path, contents):
     with open(path, 'w+') as openFile:
         openFile.write(contents)
@@ -116,6 +455,14 @@ def read_file(path):
         contents = openFile.read()
     return contents
 
+def read_file_bytes(path, offset: int, length: int) -> bytes:
+    """
+    Reads length bytes of a file starting at offset
+    """
+    with open(path, 'rb') as openFile:
+        openFile.seek(offset)
+        return openFile.read(length)
+
 def get_json_string(jsonData):
     """
     Returns a decoded json data chunk
@@ -0,0 +1,164 @@
+////////////////////////////////////////////////////////////////////////////////
+// Filename: util/harnesses/BatchHarness.java
+// Author:   Brandon Milton, http://brandonio21.com
+// Date:     18 October 2026
+//
+// Runs a Java solution against many cases in a single JVM. Cases are read from
+// stdin as "<length> <output limit>\n<input bytes>" frames and each result is
+// written to stdout as a "<OK|ERR|OLE> <length> <user> <sys>\n<output bytes>"
+// frame, where user and sys are the CPU seconds the case used on the harness
+// thread. A case writing more than its output limit (if it is not negative)
+// is stopped and reported as OLE without its output. The solution class is
+// loaded by a fresh class loader for every case so static state does not
+// leak between cases.
+//
+// Usage: java BatchHarness.java <class directory> <class name>
+////////////////////////////////////////////////////////////////////////////////
+import java.io.*;
+import java.lang.management.ManagementFactory;
+import java.lang.management.ThreadMXBean;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.util.Locale;
+
+public class BatchHarness {
+
+    public static void main(String[] args) throws Exception {
+        URL[] classPath = { new File(args[0]).toURI().toURL() };
+        InputStream protocolIn = new BufferedInputStream(System.in);
+        OutputStream protocolOut = new BufferedOutputStream(
+                new FileOutputStream(FileDescriptor.out));
+        System.setOut(System.err);
+        ThreadMXBean threads = ManagementFactory.getThreadMXBean();
+
+        String header;
+        while ((header = readLine(protocolIn)) != null) {
+            String[] fields = header.trim().split(" ");
+            byte[] input = readFully(protocolIn, Integer.parseInt(fields[0]));
+            LimitedOutput output = new LimitedOutput(Long.parseLong(fields[1]));
+            long startCpu = threads.getCurrentThreadCpuTime();
+            long startUser = threads.getCurrentThreadUserTime();
+            String status = runCase(classPath, args[1], input, output);
+            long user = threads.getCurrentThreadUserTime() - startUser;
+            long system = threads.getCurrentThreadCpuTime() - startCpu - user;
+
+            if (output.exceeded) {
+                status = "OLE";
+            }
+            byte[] outputBytes = output.exceeded ? new byte[0]
+                : output.toByteArray();
+            protocolOut.write(String.format(Locale.ROOT, "%s %d %.6f %.6f\n",
+                        status, outputBytes.length, user / 1e9, system / 1e9)
+                    .getBytes(StandardCharsets.US_ASCII));
+            protocolOut.write(outputBytes);
+            protocolOut.flush();
+        }
+    }
+
+    /**
+     * Thrown into the solution when it writes more than its output limit. It
+     * is an Error so that the solution cannot catch it by accident
+     */
+    private static class OutputLimitExceeded extends Error {
+        OutputLimitExceeded() {
+            super("Output limit exceeded", null, false, false);
+        }
+    }
+
+    /**
+     * Collects the output of a case, throwing OutputLimitExceeded once more
+     * than limit bytes were written. Later writes are dropped, so that the
+     * solution's streams can still be flushed
+     */
+    private static class LimitedOutput extends ByteArrayOutputStream {
+        private final long limit;
+        private long size = 0;
+        boolean exceeded = false;
+
+        LimitedOutput(long limit) {
+            this.limit = limit;
+        }
+
+        private void count(int length) {
+            if (exceeded) {
+                return;
+            }
+            size += length;
+            if (limit >= 0 && size > limit) {
+                exceeded = true;
+                throw new OutputLimitExceeded();
+            }
+        }
+
+        @Override
+        public synchronized void write(int b) {
+            count(1);
+            if (!exceeded) {
+                super.write(b);
+            }
+        }
+
+        @Override
+        public synchronized void write(byte[] b, int off, int len) {
+            count(len);
+            if (!exceeded) {
+                super.write(b, off, len);
+            }
+        }
+    }
+
+    private static String runCase(URL[] classPath, String className,
+            byte[] input, LimitedOutput output) {
+        PrintStream caseOut = new PrintStream(output, false);
+        System.setIn(new ByteArrayInputStream(input));
+        System.setOut(caseOut);
+        try (URLClassLoader loader = new URLClassLoader(classPath,
+                ClassLoader.getPlatformClassLoader())) {
+            Method solutionMain = loader.loadClass(className)
+                .getMethod("main", String[].class);
+            solutionMain.invoke(null, (Object) new String[0]);
+            return "OK";
+        } catch (InvocationTargetException e) {
+            if (e.getCause() instanceof OutputLimitExceeded) {
+                return "OLE";
+            }
+            e.getCause().printStackTrace();
+            return "ERR";
+        } catch (Exception e) {
+            e.printStackTrace();
+            return "ERR";
+        } finally {
+            caseOut.flush();
+            System.setOut(System.err);
+        }
+    }
+
+    private static String readLine(InputStream in) throws IOException {
+        StringBuilder line = new StringBuilder();
+        int read;
+        while ((read = in.read()) != '\n') {
+            if (read == -1) {
+                return line.length() == 0 ? null : line.toString();
+            }
+            line.append((char) read);
+        }
+        return line.toString();
+    }
+
+    private static byte[] readFully(InputStream in, int length)
+            throws IOException {
+        byte[] buffer = new byte[length];
+        int offset = 0;
+        while (offset < length) {
+            int read = in.read(buffer, offset, length - offset);
+            if (read == -1) {
+                throw new EOFException();
+            }
+            offset += read;
+        }
+        return buffer;
+    }
+}
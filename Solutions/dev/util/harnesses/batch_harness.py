@@ -0,0 +1,147 @@
+################################################################################
+# Filename: util/harnesses/batch_harness.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Runs a Python solution against many cases in a single interpreter. Cases are
+# read from stdin as "<length> <output limit>\n<input bytes>" frames and each
+# result is written to stdout as a "<OK|ERR|OLE> <length> <user> <sys>\n
+# <output bytes>" frame, where user and sys are the CPU seconds the case used.
+# A case writing more than its output limit (if it is not negative) is
+# stopped and reported as OLE without its output.
+#
+# Must stay compatible with both Python 2 and Python 3.
+#
+# Usage: python batch_harness.py <solution path>
+################################################################################
+import io
+import os
+import resource
+import sys
+import traceback
+
+PYTHON2 = sys.version_info[0] < 3
+if PYTHON2:
+    from StringIO import StringIO
+    OutputBase = StringIO
+else:
+    OutputBase = io.BytesIO
+
+class OutputLimitExceeded(BaseException):
+    """
+    Raised into the solution when it writes more than its output limit. It
+    is not an Exception so that the solution cannot catch it by accident
+    """
+    pass
+
+class LimitedOutput(OutputBase):
+    """
+    Collects the output of a case, raising OutputLimitExceeded once more
+    than limit bytes were written. Later writes are dropped, so that the
+    solution's streams can still be flushed
+    """
+
+    def __init__(self, limit):
+        OutputBase.__init__(self)
+        self.limit = limit
+        self.size = 0
+        self.exceeded = False
+
+    def write(self, data):
+        if self.exceeded:
+            return len(data)
+
+        self.size += len(data)
+        if self.limit >= 0 and self.size > self.limit:
+            self.exceeded = True
+            raise OutputLimitExceeded()
+        return OutputBase.write(self, data)
+
+def _make_case_streams(inputBytes, outputLimit):
+    """
+    Creates the stdin and stdout objects the solution sees for a single case
+    """
+    if PYTHON2:
+        return StringIO(inputBytes), LimitedOutput(outputLimit)
+
+    caseIn = io.TextIOWrapper(io.BytesIO(inputBytes), encoding='utf-8')
+    caseOut = io.TextIOWrapper(LimitedOutput(outputLimit), encoding='utf-8')
+    return caseIn, caseOut
+
+def _get_output_stream(caseOut):
+    return caseOut if PYTHON2 else caseOut.buffer
+
+def _get_case_output(caseOut):
+    if PYTHON2:
+        output = caseOut.getvalue()
+        return output.encode('utf-8') if isinstance(output, unicode) else output
+
+    caseOut.flush()
+    return caseOut.buffer.getvalue()
+
+def _run_case(code, solutionPath, inputBytes, outputLimit):
+    """
+    Runs the compiled solution against a single case
+
+    :return: (status, output bytes)
+    """
+    caseIn, caseOut = _make_case_streams(inputBytes, outputLimit)
+    status = 'OK'
+    sys.stdin, sys.stdout, sys.argv = caseIn, caseOut, [solutionPath]
+    try:
+        exec(code, {'__name__': '__main__', '__file__': solutionPath})
+    except SystemExit as e:
+        if not e.code in (None, 0):
+            status = 'ERR'
+    except OutputLimitExceeded:
+        pass
+    except BaseException:
+        traceback.print_exc()
+        status = 'ERR'
+    finally:
+        sys.stdin, sys.stdout = sys.__stdin__, sys.__stdout__
+
+    try:
+        output = _get_case_output(caseOut)
+    except OutputLimitExceeded:
+        pass
+    if _get_output_stream(caseOut).exceeded:
+        return 'OLE', b''
+    return status, output
+
+def _get_cpu_times():
+    """
+    Gets the (user, sys) CPU seconds this process has used so far
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime, usage.ru_stime
+
+def main(solutionPath):
+    with open(solutionPath) as solutionFile:
+        code = compile(solutionFile.read(), solutionPath, 'exec')
+
+    # Keep the real stdout for the protocol and point fd 1 at stderr so that
+    # stray low level writes cannot corrupt a frame
+    protocolIn = os.fdopen(os.dup(0), 'rb')
+    protocolOut = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(solutionPath)))
+
+    while True:
+        header = protocolIn.readline()
+        if not header:
+            break
+
+        inputLength, outputLimit = [int(field) for field in header.split()]
+        caseInput = protocolIn.read(inputLength)
+        startTimes = _get_cpu_times()
+        status, output = _run_case(code, solutionPath, caseInput, outputLimit)
+        endTimes = _get_cpu_times()
+        protocolOut.write('{0} {1} {2:.6f} {3:.6f}\n'.format(status,
+            len(output), endTimes[0] - startTimes[0],
+            endTimes[1] - startTimes[1]).encode('ascii'))
+        protocolOut.write(output)
+        protocolOut.flush()
+
+if __name__ == '__main__':
+    main(sys.argv[1])
@@ -7,14 +7,48 @@
 # languages.json
 ################################################################################
 from util import fileops
+from util.definitions import Definitions
 from util.pathmapper import PathMapper
 from util.variables import Variables
+from util.compilecache import CompileCache
+from util.execution import ExecutionLimits, ExecutionStats, Reaper
+from util.execution import run_process
+import asyncio
+import contextlib
+import fcntl
+import shutil
 import subprocess
+import threading
+import glob, time
+import hashlib
+import json
 import io, os, sys
 
+HARNESS_DIRECTORY = fileops.join_path(
+        fileops.get_parent_dir(os.path.abspath(__file__)), 'harnesses')
+BUILD_DIRECTORY_DEFINITION_KEY = 'build_directory'
+# Written into a build directory once everything in it has been compiled
+BUILD_COMPLETE_MARKER = '.complete'
+
 class ExecutionError(Exception):
-    def __init__(self, message):
+    RUNTIME_ERROR = 'Runtime Error'
+    TIME_LIMIT_EXCEEDED = 'Time Limit Exceeded'
+    MEMORY_LIMIT_EXCEEDED = 'Memory Limit Exceeded'
+    OUTPUT_LIMIT_EXCEEDED = 'Output Limit Exceeded'
+
+    def __init__(self, message, stats=None):
+        """
+        :param stats: The ExecutionStats of the failed run, if it got that far
+        """
         self.message = message
+        self.stats = stats
+
+class BatchHarnessError(Exception):
+    """
+    Raised when a batch harness stops following the framing protocol, which
+    usually means the solution took the whole harness process down with it
+    """
+    pass
         
 
 class Language:
@@ -25,10 +59,21 @@ class Language:
     RUN_EXTENSION_KEY = 'runExtension'
     RUN_COMMAND_KEY = 'runCommand'
     RUN_ARGS_KEY = 'runArguments'
+    COMPILE_VERSION_ARGS_KEY = 'compileVersionArguments'
+    BATCH_RUN_COMMAND_KEY = 'batchRunCommand'
+    BATCH_RUN_ARGS_KEY = 'batchRunArguments'
+    TIME_LIMIT_MULTIPLIER_KEY = 'timeLimitMultiplier'
+    MEMORY_LIMIT_MULTIPLIER_KEY = 'memoryLimitMultiplier'
+    BATCH_COMPILE_ARGS_KEY = 'batchCompileArguments'
+
+    DEFAULT_COMPILE_VERSION_ARGS = ['--version']
 
     def __init__(self, languageName, compileExtension=None, compileCommand=None,
             compileArguments=None, runExtension=None, runCommand=None, 
-            runArguments=None):
+            runArguments=None, compileVersionArguments=None,
+            batchRunCommand=None, batchRunArguments=None,
+            timeLimitMultiplier=None, memoryLimitMultiplier=None,
+            batchCompileArguments=None):
         self.name = languageName
         self._compileExtension = compileExtension
         self._compileCommand = compileCommand
@@ -36,6 +81,16 @@ class Language:
         self._runExtension = runExtension
         self._runCommand = runCommand
         self._runArguments = runArguments
+        self._compileVersionArguments = (compileVersionArguments if not
+                compileVersionArguments is None else
+                self.DEFAULT_COMPILE_VERSION_ARGS)
+        self._batchRunCommand = batchRunCommand
+        self._batchRunArguments = batchRunArguments
+        self._timeLimitMultiplier = (timeLimitMultiplier if not
+                timeLimitMultiplier is None else 1)
+        self._memoryLimitMultiplier = (memoryLimitMultiplier if not
+                memoryLimitMultiplier is None else 1)
+        self._batchCompileArguments = batchCompileArguments
 
     def __hash__(self):
         return hash(self.name)
@@ -70,37 +125,118 @@ class Language:
                 runCommand=(languageBlockDict[cls.RUN_COMMAND_KEY]
                     if cls.RUN_COMMAND_KEY in languageBlockDict else None),
                 runArguments=(languageBlockDict[cls.RUN_ARGS_KEY]
-                    if cls.RUN_ARGS_KEY in languageBlockDict else None))
+                    if cls.RUN_ARGS_KEY in languageBlockDict else None),
+                compileVersionArguments=(
+                    languageBlockDict[cls.COMPILE_VERSION_ARGS_KEY]
+                    if cls.COMPILE_VERSION_ARGS_KEY in languageBlockDict else None),
+                batchRunCommand=(languageBlockDict[cls.BATCH_RUN_COMMAND_KEY]
+                    if cls.BATCH_RUN_COMMAND_KEY in languageBlockDict else None),
+                batchRunArguments=(languageBlockDict[cls.BATCH_RUN_ARGS_KEY]
+                    if cls.BATCH_RUN_ARGS_KEY in languageBlockDict else None),
+                timeLimitMultiplier=(
+                    languageBlockDict[cls.TIME_LIMIT_MULTIPLIER_KEY]
+                    if cls.TIME_LIMIT_MULTIPLIER_KEY in languageBlockDict else None),
+                memoryLimitMultiplier=(
+                    languageBlockDict[cls.MEMORY_LIMIT_MULTIPLIER_KEY]
+                    if cls.MEMORY_LIMIT_MULTIPLIER_KEY in languageBlockDict else None),
+                batchCompileArguments=(
+                    languageBlockDict[cls.BATCH_COMPILE_ARGS_KEY]
+                    if cls.BATCH_COMPILE_ARGS_KEY in languageBlockDict else None))
 
         return languageObject
 
-    def execute_code(self, codePath, inputContents, verbose=False):
+    def execute_code(self, codePath, inputContents, verbose=False, limits=None):
         return AppliedLanguage.get_applied_language(codePath, self).execute_code(inputContents, 
-                verbose=verbose)
+                verbose=verbose, limits=limits)
+
+    def execute_code_with_stats(self, codePath, inputContents, verbose=False,
+            limits=None, comparator=None):
+        return AppliedLanguage.get_applied_language(codePath,
+                self).execute_code_with_stats(inputContents, verbose=verbose,
+                        limits=limits, comparator=comparator)
+
+    async def execute_code_async(self, codePath, inputContents, verbose=False,
+            limits=None):
+        return await AppliedLanguage.get_applied_language(codePath,
+                self).execute_code_async(inputContents, verbose=verbose,
+                        limits=limits)
+
+    async def execute_code_with_stats_async(self, codePath, inputContents,
+            verbose=False, limits=None, comparator=None):
+        return await AppliedLanguage.get_applied_language(codePath,
+                self).execute_code_with_stats_async(inputContents,
+                        verbose=verbose, limits=limits, comparator=comparator)
 
     def compile_code(self, codePath, verbose=False):
         AppliedLanguage.get_applied_language(codePath, self)._compile_code(verbose=verbose)
 
+    def compile_code_batch(self, codePaths: list, verbose=False) -> dict:
+        """
+        Compiles the code at many paths with as few compiler runs as this
+        language allows
+
+        :return: {codePath: ExecutionError, or None if it compiled}
+        """
+        return AppliedLanguage.compile_batch([
+            AppliedLanguage.get_applied_language(codePath, self)
+            for codePath in codePaths], verbose=verbose)
+
+    def supports_batch_execution(self):
+        return not self._batchRunCommand is None
+
+    def supports_batch_compilation(self):
+        return (not self._compileCommand is None and
+                not self._batchCompileArguments is None)
+
+    def get_run_fingerprint(self, codePath, limits=None) -> str:
+        """
+        Hashes everything the output of running the (compiled) code at
+        codePath depends on. The run command is hashed before the solution's
+        path is filled in, so identical solutions of different writers share
+        a fingerprint
+        """
+        runTemplate = [self._runCommand]
+        runTemplate.extend(self._runArguments)
+        return AppliedLanguage.get_applied_language(codePath,
+                self).get_run_fingerprint(runTemplate, limits)
+
+    def open_batch_session(self, codePath, verbose=False, limits=None):
+        return AppliedLanguage.get_applied_language(codePath,
+                self).open_batch_session(verbose=verbose, limits=limits)
+
 class AppliedLanguage(Language):
     # A language that's applied to a specific solution
     _appliedLanguages = {}
+    _compilerVersions = {}
 
     def __init__(self, languageName, compileExtension=None, compileCommand=None,
             compileArguments=None, runExtension=None, runCommand=None, 
-            runArguments=None, path=None):
+            runArguments=None, path=None, compileVersionArguments=None,
+            batchRunCommand=None, batchRunArguments=None,
+            timeLimitMultiplier=None, memoryLimitMultiplier=None,
+            batchCompileArguments=None, buildPath=None):
         super().__init__(languageName, compileExtension, compileCommand,
-                compileArguments, runExtension, runCommand, runArguments)
+                compileArguments, runExtension, runCommand, runArguments,
+                compileVersionArguments, batchRunCommand, batchRunArguments,
+                timeLimitMultiplier, memoryLimitMultiplier,
+                batchCompileArguments)
         self._path = path
+        self._buildPath = buildPath
 
     @classmethod
     def get_applied_language(cls, solutionPath, solutionLanguage):
         if solutionPath in cls._appliedLanguages:
             return cls._appliedLanguages[solutionPath]
 
+        # Compiled languages build in (and run from) their build directory
+        buildPath = cls._get_build_path(solutionPath, solutionLanguage)
         variableDictionary = {
                 Variables.get_variable_key_name(Variables.NAME_FILENAME): fileops.get_basename(solutionPath),
                 Variables.get_variable_key_name(Variables.NAME_FILENAME_LESS_EXT): fileops.get_basename_less_extension(solutionPath),
-                Variables.get_variable_key_name(Variables.NAME_DIRECTORY): fileops.get_parent_dir(solutionPath)
+                Variables.get_variable_key_name(Variables.NAME_DIRECTORY): (
+                    fileops.get_parent_dir(solutionPath) if buildPath is None
+                    else buildPath),
+                Variables.get_variable_key_name(Variables.NAME_HARNESS_DIRECTORY): HARNESS_DIRECTORY
                 }
 
         cls._appliedLanguages[solutionPath] = AppliedLanguage(solutionLanguage.name,
@@ -110,10 +246,40 @@ class AppliedLanguage(Language):
                 cls._get_formatted_str_rec(variableDictionary, solutionLanguage._runExtension),
                 cls._get_formatted_str_rec(variableDictionary, solutionLanguage._runCommand),
                 cls._get_formatted_str_rec(variableDictionary, solutionLanguage._runArguments),
-                solutionPath)
+                solutionPath, solutionLanguage._compileVersionArguments,
+                cls._get_formatted_str_rec(variableDictionary, solutionLanguage._batchRunCommand),
+                cls._get_formatted_str_rec(variableDictionary, solutionLanguage._batchRunArguments),
+                solutionLanguage._timeLimitMultiplier,
+                solutionLanguage._memoryLimitMultiplier,
+                cls._get_formatted_str_rec(variableDictionary, solutionLanguage._batchCompileArguments),
+                buildPath)
 
         return cls._appliedLanguages[solutionPath]
 
+    @classmethod
+    def _get_build_path(cls, solutionPath, solutionLanguage) -> str:
+        """
+        Gets the out of tree directory a compiled solution is built in, which
+        is named by the hash of the source, the unformatted compile command
+        and the compiler version so that identical solutions share it. Returns
+        None if the language is not compiled or no build directory is defined
+        """
+        buildRoot = _get_build_root()
+        if solutionLanguage._compileCommand is None or buildRoot is None:
+            return None
+
+        buildHash = hashlib.sha256(fileops.get_basename(
+            solutionPath).encode('utf-8'))
+        with open(solutionPath, 'rb') as sourceFile:
+            for chunk in iter(lambda: sourceFile.read(65536), b''):
+                buildHash.update(chunk)
+        buildHash.update(json.dumps([solutionLanguage._compileCommand,
+            solutionLanguage._compileArguments, solutionLanguage._runExtension,
+            cls._get_compiler_version(solutionLanguage._compileCommand,
+                solutionLanguage._compileVersionArguments)]).encode('utf-8'))
+
+        return fileops.join_path(buildRoot, buildHash.hexdigest())
+
                 
     @classmethod
     def _get_formatted_str_rec(cls, formatDict, string):
@@ -133,7 +299,236 @@ class AppliedLanguage(Language):
         """
         if self._compileCommand is None:
             return
+        if not self._buildPath is None:
+            return self._compile_in_build_path(verbose)
+
+        self._run_compiler(verbose)
+        return fileops.get_path_with_changed_extension(self._path, 
+                self._runExtension)
+
+    def _compile_in_build_path(self, verbose=False):
+        """
+        Compiles a copy of the source in the build directory, unless that has
+        already been done. A lock file next to the build directory keeps
+        concurrent runs (and threads) from building it at the same time, and
+        a build is only used once it is marked as complete
+        """
+        with self._lock_build_path():
+            if not self._is_built():
+                self._prepare_build_path()
+                self._run_compiler(verbose)
+                self._mark_built()
+            else:
+                self._touch_build()
+
+        return fileops.join_path(self._buildPath, '{}.{}'.format(
+            fileops.get_basename_less_extension(self._path), self._runExtension))
+
+    def _lock_build_path(self):
+        return _lock_build_path(self._buildPath)
+
+    def _is_built(self) -> bool:
+        return fileops.exists(fileops.join_path(self._buildPath,
+            BUILD_COMPLETE_MARKER), fileops.FileType.FILE)
+
+    def _prepare_build_path(self):
+        fileops.remove(self._buildPath, fileops.FileType.DIRECTORY)
+        fileops.make(self._buildPath, fileops.FileType.DIRECTORY)
+        shutil.copy(self._path, self._buildPath)
+
+    def _mark_built(self):
+        fileops.write_file(fileops.join_path(self._buildPath,
+            BUILD_COMPLETE_MARKER), '')
+
+    def _touch_build(self):
+        """
+        Marks a finished build as used, so that it is among the last to be
+        pruned
+        """
+        try:
+            os.utime(fileops.join_path(self._buildPath, BUILD_COMPLETE_MARKER))
+        except OSError:
+            pass
+
+    @staticmethod
+    def prune_builds():
+        """
+        Removes the least recently used build directories until they fit in
+        the compile cache's maximum size, since every changed solution gets a
+        build directory of its own. Builds that are being compiled (or are
+        locked by another run) are left alone
+        """
+        buildRoot = _get_build_root()
+        maxSize = CompileCache.get_max_size()
+        if buildRoot is None or maxSize is None:
+            return
+        if not fileops.exists(buildRoot, fileops.FileType.DIRECTORY):
+            return
+
+        builds = []
+        with os.scandir(buildRoot) as directoryEntries:
+            for directoryEntry in directoryEntries:
+                if not directoryEntry.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    lastUsed = os.stat(fileops.join_path(directoryEntry.path,
+                        BUILD_COMPLETE_MARKER)).st_mtime
+                except OSError:
+                    # Not finished, so possibly being compiled right now
+                    continue
+                builds.append((lastUsed, directoryEntry.path,
+                    _get_directory_size(directoryEntry.path)))
+
+        totalSize = sum(size for _, _, size in builds)
+        for _, buildPath, size in sorted(builds):
+            if totalSize <= maxSize:
+                break
+            with _lock_build_path(buildPath, blocking=False) as locked:
+                if not locked:
+                    continue
+                fileops.remove(buildPath, fileops.FileType.DIRECTORY)
+                os.remove('{}.lock'.format(buildPath))
+            totalSize -= size
+
+    @classmethod
+    def compile_batch(cls, appliedLanguages: list, verbose=False) -> dict:
+        """
+        Compiles many solutions of one language with as few compiler runs as
+        possible. A single run cannot take two sources of the same name, so
+        those are spread over several runs. Solutions that cannot share a run
+        (those built in tree or of languages without batch compile arguments)
+        are compiled on their own
+
+        :return: {solution path: ExecutionError, or None if it compiled}
+        """
+        errors = {}
+        builds = {}
+        groups = []
+        for appliedLanguage in appliedLanguages:
+            if (appliedLanguage._buildPath is None or
+                    not appliedLanguage.supports_batch_compilation()):
+                try:
+                    appliedLanguage._compile_code(verbose=verbose)
+                    errors[appliedLanguage._path] = None
+                except ExecutionError as e:
+                    errors[appliedLanguage._path] = e
+                continue
+
+            # Identical solutions share a build directory, so build it once
+            builds.setdefault(appliedLanguage._buildPath, []).append(
+                    appliedLanguage)
+            if len(builds[appliedLanguage._buildPath]) > 1:
+                continue
+
+            baseName = fileops.get_basename(appliedLanguage._path)
+            for group in groups:
+                if not baseName in group:
+                    group[baseName] = appliedLanguage
+                    break
+            else:
+                groups.append({baseName: appliedLanguage})
+
+        for group in groups:
+            errors.update(cls._compile_batch_group(list(group.values()),
+                verbose))
+        for buildLanguages in builds.values():
+            for appliedLanguage in buildLanguages[1:]:
+                errors[appliedLanguage._path] = errors[buildLanguages[0]._path]
+
+        return errors
+
+    @classmethod
+    def _compile_batch_group(cls, group: list, verbose=False) -> dict:
+        """
+        Compiles a group of solutions with distinct source names in a single
+        compiler run. If the run fails, the solutions the compiler named in
+        its errors are compiled again one at a time, since a solution may only
+        fail alongside others (e.g. when two of them declare the same
+        top-level class), and the rest are compiled together again. If it
+        named none of them, they are all compiled one at a time instead
+        """
+        # Lock in a fixed order so that concurrent groups cannot deadlock
+        group = sorted(group, key=lambda appliedLanguage:
+                appliedLanguage._buildPath)
+        errors = {appliedLanguage._path: None for appliedLanguage in group}
+        with contextlib.ExitStack() as lockStack:
+            for appliedLanguage in group:
+                lockStack.enter_context(appliedLanguage._lock_build_path())
+
+            pending = []
+            for appliedLanguage in group:
+                if appliedLanguage._is_built():
+                    appliedLanguage._touch_build()
+                else:
+                    pending.append(appliedLanguage)
+            for appliedLanguage in pending:
+                appliedLanguage._prepare_build_path()
+
+            while len(pending) > 0:
+                compileCommand = [pending[0]._compileCommand]
+                for appliedLanguage in pending:
+                    compileCommand.extend(appliedLanguage._batchCompileArguments)
+                try:
+                    process = subprocess.run(compileCommand,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+                except Exception:
+                    for appliedLanguage in pending:
+                        errors[appliedLanguage._path] = ExecutionError(
+                                'Could not run command {}'.format(
+                                    compileCommand[0]))
+                    break
+                if verbose:
+                    sys.stderr.write(process.stderr.decode('utf-8', 'replace'))
+
+                if process.returncode == 0:
+                    for appliedLanguage in pending:
+                        appliedLanguage._mark_built()
+                    break
+
+                failedPaths = [appliedLanguage._path for appliedLanguage
+                        in pending if appliedLanguage._is_named_in(
+                            process.stderr)]
+                if len(failedPaths) == 0:
+                    for appliedLanguage in pending:
+                        errors[appliedLanguage._path] = (
+                                appliedLanguage._compile_alone(verbose))
+                    break
 
+                for appliedLanguage in pending:
+                    if appliedLanguage._path in failedPaths:
+                        errors[appliedLanguage._path] = (
+                                appliedLanguage._compile_alone(verbose))
+                pending = [appliedLanguage for appliedLanguage in pending
+                        if not appliedLanguage._path in failedPaths]
+
+        return errors
+
+    def _compile_alone(self, verbose=False):
+        """
+        Compiles this solution in a compiler run of its own, once its build
+        path has been prepared and locked
+
+        :return: The ExecutionError it failed with, or None if it compiled
+        """
+        try:
+            self._run_compiler(verbose)
+        except ExecutionError as e:
+            return e
+
+        self._mark_built()
+        return None
+
+    def _is_named_in(self, compilerOutput: bytes) -> bool:
+        """
+        Checks whether a compiler reported a problem with this solution's
+        source, which compilers print as the path they were given followed
+        by a colon
+        """
+        sourcePath = fileops.join_path(self._buildPath,
+                fileops.get_basename(self._path))
+        return '{}:'.format(sourcePath).encode('utf-8') in compilerOutput
+
+    def _run_compiler(self, verbose=False):
         compileCommand = [self._compileCommand]
         compileCommand.extend(self._compileArguments)
         try:
@@ -144,36 +539,476 @@ class AppliedLanguage(Language):
             raise ExecutionError('Could not run command {}'.format(
                 compileCommand[0])) from None
 
-        return fileops.get_path_with_changed_extension(self._path, 
-                self._runExtension)
+    def _get_run_artifacts(self) -> list:
+        """
+        Gets the files that are run, which are the source itself if the
+        language is not compiled
+        """
+        if self._compileCommand is None:
+            return [self._path]
+
+        baseName = glob.escape(fileops.join_path(
+            fileops.get_parent_dir(self._path) if self._buildPath is None
+            else self._buildPath,
+            fileops.get_basename_less_extension(self._path)))
+        artifactPaths = glob.glob('{}.{}'.format(baseName, self._runExtension))
+        artifactPaths.extend(glob.glob('{}$*.{}'.format(baseName,
+            self._runExtension)))
+        return sorted(artifactPaths)
+
+    def get_run_fingerprint(self, runTemplate: list, limits=None) -> str:
+        """
+        Hashes the names and contents of the files that are run, together
+        with the unformatted run command and the limits they run under
+
+        :param runTemplate: The run command and arguments before formatting
+        """
+        fingerprint = hashlib.sha256()
+        for artifactPath in self._get_run_artifacts():
+            fingerprint.update(fileops.get_basename(artifactPath).encode('utf-8'))
+            with open(artifactPath, 'rb') as artifactFile:
+                for chunk in iter(lambda: artifactFile.read(65536), b''):
+                    fingerprint.update(chunk)
+        fingerprint.update(json.dumps([runTemplate, None if limits is None
+            else vars(limits)], sort_keys=True).encode('utf-8'))
 
-    def execute_code(self, inputContents, verbose=False):
+        return fingerprint.hexdigest()
+
+    @staticmethod
+    def _get_compiler_version(compileCommand: str,
+            compileVersionArguments: list) -> str:
+        """
+        Gets the version string reported by a compiler. The result is
+        remembered for the duration of the run
+        """
+        versionCommand = [compileCommand]
+        versionCommand.extend(compileVersionArguments)
+        versionKey = tuple(versionCommand)
+        if not versionKey in AppliedLanguage._compilerVersions:
+            try:
+                AppliedLanguage._compilerVersions[versionKey] = (
+                        subprocess.check_output(versionCommand,
+                            stderr=subprocess.STDOUT).decode('utf-8', 'replace'))
+            except Exception:
+                AppliedLanguage._compilerVersions[versionKey] = ''
+
+        return AppliedLanguage._compilerVersions[versionKey]
+
+    def execute_code(self, inputContents, verbose=False, limits=None):
         """
         Executes the code by first compiling it (if necessary), then running it,
         then returning the output or an ExecutionError if one occurred
+
+        :param limits: The ExecutionLimits to run under (default 20s wall time)
+        """
+        return self.execute_code_with_stats(inputContents, verbose=verbose,
+                limits=limits)[0]
+
+    def execute_code_with_stats(self, inputContents, verbose=False,
+            limits=None, comparator=None):
+        """
+        Behaves like execute_code, but also measures the resources the run used
+
+        :param comparator: An OutputComparator to feed the output to as it is
+                           read, which then also provides the returned output
+        :return: (output, ExecutionStats)
         """
-        if not self._compileCommand is None:
-            self._path = fileops.get_path_with_changed_extension(self._path,
-                          self._runExtension)
+        if limits is None:
+            limits = ExecutionLimits()
 
         runCommand = [self._runCommand]
         runCommand.extend(self._runArguments)
         try:
             encodedInput = inputContents.encode('utf-8')
-            output = subprocess.check_output(runCommand, input=encodedInput, 
-                stderr = (open(os.devnull, 'w') if not verbose else sys.stderr),
-                timeout=20).decode('utf-8')
-            if not output is None:
-                output = output.replace('\r','')
-        except subprocess.CalledProcessError as e:
-            raise ExecutionError('Runtime Error')
-        except subprocess.TimeoutExpired as e:
-            raise ExecutionError('Timeout Expired')
+            processResult = run_process(runCommand, encodedInput, limits,
+                stderr = (subprocess.DEVNULL if not verbose else sys.stderr),
+                outputConsumer=comparator)
+        except Exception:
+            raise ExecutionError('Could not run command {}'.format(
+                runCommand[0])) from None
+
+        stats = processResult.stats
+        if processResult.timedOut or limits.is_cpu_time_exceeded(
+                processResult.returnCode, stats.get_cpu_time()):
+            raise ExecutionError(ExecutionError.TIME_LIMIT_EXCEEDED, stats)
+        if limits.is_output_exceeded(processResult.returnCode,
+                processResult.outputSize):
+            raise ExecutionError(ExecutionError.OUTPUT_LIMIT_EXCEEDED, stats)
+        if limits.is_memory_exceeded(processResult.returnCode,
+                stats.peakMemory, processResult.errorOutput):
+            raise ExecutionError(ExecutionError.MEMORY_LIMIT_EXCEEDED, stats)
+        if not processResult.returnCode == 0:
+            raise ExecutionError(ExecutionError.RUNTIME_ERROR, stats)
+
+        if not comparator is None:
+            return comparator.get_output(), stats
+        return (AppliedLanguage.get_normalized_output(processResult.output),
+                stats)
+
+    async def execute_code_async(self, inputContents, verbose=False,
+            limits=None, chunkSize=65536):
+        """
+        Runs the (already compiled) code as an asyncio subprocess, streaming
+        its stdout in chunks. Behaves like execute_code, but many of these may
+        be in flight on one event loop without a thread per process. The event
+        loop reaps the process itself, so a solution that runs out of memory
+        is reported as a runtime error
+        """
+        return (await self.execute_code_with_stats_async(inputContents,
+            verbose=verbose, limits=limits, chunkSize=chunkSize))[0]
+
+    async def execute_code_with_stats_async(self, inputContents,
+            verbose=False, limits=None, chunkSize=65536, comparator=None):
+        """
+        Behaves like execute_code_async, but also measures the run. Only the
+        wall time is known, since the event loop reaps the process. The
+        comparator is used like in execute_code_with_stats
+
+        :return: (output, ExecutionStats)
+        """
+        if limits is None:
+            limits = ExecutionLimits()
+        startTime = time.monotonic()
+
+        runCommand = [self._runCommand]
+        runCommand.extend(self._runArguments)
+        loop = asyncio.get_running_loop()
+        try:
+            transport, protocol = await loop.subprocess_exec(
+                    lambda: _ExitWatchingProtocol(loop), *runCommand,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=(asyncio.subprocess.DEVNULL if not verbose else None),
+                    preexec_fn=limits.get_preexec_fn(), start_new_session=True)
+            process = asyncio.subprocess.Process(transport, protocol, loop)
         except Exception:
             raise ExecutionError('Could not run command {}'.format(
                 runCommand[0])) from None
 
-        return output[:-1]
+        async def write_input():
+            try:
+                process.stdin.write(inputContents.encode('utf-8'))
+                await process.stdin.drain()
+                process.stdin.close()
+            except (BrokenPipeError, ConnectionResetError):
+                # The solution exited without reading all of its input
+                pass
+
+        outputSize = 0
+        async def read_output():
+            nonlocal outputSize
+            outputChunks = []
+            chunk = await process.stdout.read(chunkSize)
+            while chunk:
+                outputSize += len(chunk)
+                if limits.is_output_exceeded(0, outputSize):
+                    # Stop a runaway solution before it fills memory
+                    Reaper.kill_group(process.pid)
+                    break
+                if comparator is None:
+                    outputChunks.append(chunk)
+                else:
+                    comparator.feed(chunk)
+                chunk = await process.stdout.read(chunkSize)
+            return b''.join(outputChunks)
+
+        async def wait_for_exit():
+            await protocol.exited
+            # Kill what the solution left behind, so that its pipes close
+            Reaper.reap(process.pid)
+            return await process.wait()
+
+        communication = asyncio.gather(write_input(), read_output(),
+                wait_for_exit())
+        try:
+            _, output, returnCode = await asyncio.wait_for(communication,
+                timeout=limits.wallTime)
+        except asyncio.CancelledError:
+            # Do not leave the solution running once nobody wants its output
+            Reaper.kill_group(process.pid)
+            await asyncio.gather(communication, return_exceptions=True)
+            await process.wait()
+            raise
+        except asyncio.TimeoutError:
+            Reaper.kill_group(process.pid)
+            await process.wait()
+            raise ExecutionError(ExecutionError.TIME_LIMIT_EXCEEDED,
+                    ExecutionStats(wallTime=time.monotonic() - startTime)) from None
+
+        stats = ExecutionStats(wallTime=time.monotonic() - startTime)
+        if limits.is_cpu_time_exceeded(returnCode):
+            raise ExecutionError(ExecutionError.TIME_LIMIT_EXCEEDED, stats)
+        if limits.is_output_exceeded(returnCode, outputSize):
+            raise ExecutionError(ExecutionError.OUTPUT_LIMIT_EXCEEDED, stats)
+        if not returnCode == 0:
+            raise ExecutionError(ExecutionError.RUNTIME_ERROR, stats)
+
+        if not comparator is None:
+            return comparator.get_output(), stats
+        return AppliedLanguage.get_normalized_output(output), stats
+
+    def open_batch_session(self, verbose=False, limits=None):
+        """
+        Starts a batch harness which runs all cases of this solution in a
+        single process. Returns None if the language has no batch harness.
+        The harness accumulates CPU time across cases, so only the wall time
+        and memory limits apply to it
+        """
+        if not self.supports_batch_execution():
+            return None
+        if limits is None:
+            limits = ExecutionLimits()
+
+        batchCommand = [self._batchRunCommand]
+        batchCommand.extend(self._batchRunArguments)
+        return BatchSession(batchCommand,
+                lambda inputContents, comparator=None:
+                    self.execute_code_with_stats(inputContents,
+                        verbose=verbose, limits=limits, comparator=comparator),
+                verbose=verbose,
+                limits=limits.without_cpu_time())
+
+    @staticmethod
+    def get_normalized_output(output: bytes) -> str:
+        """
+        Converts raw solution output into the form compared against cases,
+        dropping carriage returns and the trailing newline
+        """
+        return output.decode('utf-8').replace('\r', '')[:-1]
+
+class _ExitWatchingProtocol(asyncio.subprocess.SubprocessStreamProtocol):
+    """
+    A subprocess protocol whose exited future is done as soon as the process
+    exits. Process.wait() also waits for its pipes to close, which a process
+    it forked may keep open
+    """
+    STREAM_LIMIT = 65536
+
+    def __init__(self, loop):
+        super().__init__(limit=self.STREAM_LIMIT, loop=loop)
+        self.exited = loop.create_future()
+
+    def process_exited(self):
+        super().process_exited()
+        if not self.exited.done():
+            self.exited.set_result(None)
+
+def _get_build_root() -> str:
+    """
+    Gets the directory the build directories of compiled solutions are kept
+    in, which is the compile cache directory unless a build directory is
+    defined. Returns None if neither is defined
+    """
+    buildDirectory = Definitions.get_value(BUILD_DIRECTORY_DEFINITION_KEY)
+    if not buildDirectory is None:
+        return PathMapper.get_mapped_path(buildDirectory)
+    if CompileCache.is_enabled():
+        return CompileCache.get_cache_path()
+
+    return None
+
+@contextlib.contextmanager
+def _lock_build_path(buildPath: str, blocking=True):
+    """
+    Holds the lock file next to a build directory, which keeps concurrent
+    runs (and threads) from building or pruning it at the same time. A lock
+    file is removed along with its pruned build, so it is opened again if it
+    was replaced while this run waited for it
+
+    :return: Whether the lock is held, which is only False if not blocking
+    """
+    fileops.make(fileops.get_parent_dir(buildPath), fileops.FileType.DIRECTORY)
+    lockPath = '{}.lock'.format(buildPath)
+    while True:
+        with open(lockPath, 'a') as lockFile:
+            try:
+                fcntl.flock(lockFile, fcntl.LOCK_EX |
+                        (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                if not _is_same_file(lockFile, lockPath):
+                    continue
+                yield True
+                return
+            finally:
+                fcntl.flock(lockFile, fcntl.LOCK_UN)
+
+def _is_same_file(openFile, path: str) -> bool:
+    try:
+        return os.stat(path).st_ino == os.fstat(openFile.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+def _get_directory_size(directory: str) -> int:
+    size = 0
+    for root, _, fileNames in os.walk(directory):
+        for fileName in fileNames:
+            try:
+                size += os.path.getsize(os.path.join(root, fileName))
+            except OSError:
+                pass
+    return size
+
+class BatchSession:
+    """
+    A single batch harness process that all cases of one solution are fed
+    through. If the harness reports a failure or dies, the case is run again
+    through the fallback so its verdict matches the per-case mode, and once
+    the harness has died every following case goes to the fallback. The
+    fallback takes the input and optionally an OutputComparator, and returns
+    (output, ExecutionStats)
+    """
+    STATUS_OK = 'OK'
+    STATUS_OUTPUT_LIMIT_EXCEEDED = 'OLE'
+
+    def __init__(self, command: list, fallback, verbose=False, limits=None):
+        self._command = command
+        self._fallback = fallback
+        self._verbose = verbose
+        self._limits = limits if not limits is None else ExecutionLimits()
+        self._process = None
+        self._failed = False
+
+    def get_output(self, inputContents: str) -> str:
+        """
+        Runs a single case through the harness and returns its output
+        """
+        return self.get_output_with_stats(inputContents)[0]
+
+    def get_output_with_stats(self, inputContents: str, comparator=None):
+        """
+        Runs a single case through the harness and measures it. The harness
+        reports the CPU time of each case, but its peak memory covers every
+        case it has run, so it is left out
+
+        :param comparator: An OutputComparator to feed the output to, which
+                           then also provides the returned output
+        :return: (output, ExecutionStats)
+        """
+        if self._failed:
+            return self._run_fallback(inputContents, comparator)
+
+        try:
+            status, output, stats = self._exchange(inputContents.encode('utf-8'))
+        except BatchHarnessError:
+            self._failed = True
+            self.close()
+            return self._run_fallback(inputContents, comparator)
+
+        if not status == self.STATUS_OK:
+            return self._run_fallback(inputContents, comparator)
+
+        if not comparator is None:
+            comparator.feed(output)
+            return comparator.get_output(), stats
+        return AppliedLanguage.get_normalized_output(output), stats
+
+    def _run_fallback(self, inputContents: str, comparator=None):
+        if comparator is None:
+            return self._fallback(inputContents)
+
+        return self._fallback(inputContents, comparator=comparator)
+
+    def close(self):
+        if self._process is None:
+            return
+
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            Reaper.kill_group(self._process.pid)
+            self._process.wait()
+        self._process.stdout.close()
+        Reaper.reap(self._process.pid)
+        self._process = None
+
+    def _start(self):
+        try:
+            self._process = subprocess.Popen(self._command,
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                    stderr=(subprocess.DEVNULL if not self._verbose
+                        else sys.stderr),
+                    preexec_fn=self._limits.get_preexec_fn(),
+                    start_new_session=True)
+        except Exception:
+            raise BatchHarnessError() from None
+
+    def _exchange(self, encodedInput: bytes):
+        """
+        Sends a single framed case to the harness and reads the framed reply,
+        killing the harness if it does not reply within the timeout
+
+        :return: (status, output bytes, ExecutionStats)
+        """
+        if self._process is None:
+            self._start()
+        startTime = time.monotonic()
+
+        timedOut = threading.Event()
+        def kill_harness(process=self._process):
+            timedOut.set()
+            Reaper.kill_group(process.pid)
+
+        timer = threading.Timer(self._limits.wallTime, kill_harness)
+        timer.start()
+        try:
+            return self._send_and_receive(encodedInput, startTime)
+        except BatchHarnessError:
+            if timedOut.is_set():
+                # Rerunning a timed out case would only time out again
+                self._failed = True
+                self.close()
+                raise ExecutionError(ExecutionError.TIME_LIMIT_EXCEEDED,
+                        ExecutionStats(wallTime=time.monotonic() - startTime)
+                        ) from None
+            raise
+        finally:
+            timer.cancel()
+
+    def _send_and_receive(self, encodedInput: bytes, startTime: float):
+        """
+        Exchanges a single frame with the harness. Request headers are
+        "<length> <output limit>", where a negative limit means none, and
+        reply headers are "<status> <length> [<user seconds> <sys seconds>]".
+        The harness stops a case writing more than the output limit itself,
+        so that its output is never held in memory
+        """
+        outputLimit = self._limits.output
+        try:
+            self._process.stdin.write('{} {}\n'.format(len(encodedInput),
+                -1 if outputLimit is None else outputLimit).encode('ascii'))
+            self._process.stdin.write(encodedInput)
+            self._process.stdin.flush()
+
+            header = self._process.stdout.readline().decode('ascii').split()
+            if not len(header) in (2, 4):
+                raise BatchHarnessError()
+            if self._limits.is_output_exceeded(0, int(header[1])):
+                # Do not read the output, which leaves the harness unusable
+                self._failed = True
+                Reaper.kill_group(self._process.pid)
+                self.close()
+                raise ExecutionError(ExecutionError.OUTPUT_LIMIT_EXCEEDED,
+                        ExecutionStats(wallTime=time.monotonic() - startTime))
+            output = self._process.stdout.read(int(header[1]))
+            stats = ExecutionStats(wallTime=time.monotonic() - startTime)
+            if len(header) == 4:
+                stats.userTime, stats.sysTime = float(header[2]), float(header[3])
+        except (OSError, ValueError):
+            raise BatchHarnessError() from None
+
+        if not len(output) == int(header[1]):
+            raise BatchHarnessError()
+        if header[0] == self.STATUS_OUTPUT_LIMIT_EXCEEDED:
+            raise ExecutionError(ExecutionError.OUTPUT_LIMIT_EXCEEDED, stats)
+
+        return header[0], output, stats
 
 class Languages:
     LANGUAGES_FILE = 'languages.json'
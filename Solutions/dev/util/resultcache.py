@@ -0,0 +1,153 @@
+################################################################################
+# Filename: util/resultcache.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains the ResultCache class, which keeps the output of solution runs on
+# disk so that a solution is never run twice against the same input
+################################################################################
+from util import fileops
+from util.definitions import Definitions
+from util.pathmapper import PathMapper
+import hashlib
+import os
+import time
+
+class ResultCache:
+    """
+    Every entry is its own file, named by its key, so that entries can be
+    read and written by many workers without a shared index. An entry's
+    modification time is when it was stored (for the TTL) and its access time
+    is when it was last used (for size based eviction)
+    """
+    DIRECTORY_DEFINITION_KEY = 'result_cache_directory'
+    SIZE_DEFINITION_KEY = 'result_cache_size'
+    TTL_DEFINITION_KEY = 'result_cache_ttl'
+
+    # Entry keys
+    OUTPUT_KEY = 'output'
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """
+        The cache is only used if a cache directory is defined
+        """
+        return not Definitions.get_value(cls.DIRECTORY_DEFINITION_KEY) is None
+
+    @classmethod
+    def get_cache_path(cls) -> str:
+        return PathMapper.get_mapped_path(
+                Definitions.get_value(cls.DIRECTORY_DEFINITION_KEY))
+
+    @classmethod
+    def get_max_size(cls) -> int:
+        """
+        Gets the maximum size of the cache in bytes. The definition is in MB
+        """
+        sizeInMegabytes = Definitions.get_value(cls.SIZE_DEFINITION_KEY)
+        if sizeInMegabytes is None:
+            return None
+
+        return int(sizeInMegabytes * 1024 * 1024)
+
+    @classmethod
+    def get_ttl(cls) -> float:
+        """
+        Gets the seconds an entry stays valid for, or None if it never expires
+        """
+        return Definitions.get_value(cls.TTL_DEFINITION_KEY)
+
+    @staticmethod
+    def get_key(runFingerprint: str, inputContents: str) -> str:
+        """
+        Creates the cache key of running a solution against a single input
+
+        :param runFingerprint: The hash of the solution's artifacts, run
+                               command and limits
+        :param inputContents: The input the solution is run against
+        """
+        keyHash = hashlib.sha256(runFingerprint.encode('utf-8'))
+        keyHash.update(inputContents.encode('utf-8'))
+        return keyHash.hexdigest()
+
+    @classmethod
+    def get(cls, key: str) -> str:
+        """
+        Gets the output stored under key, or None if there is no valid entry
+        """
+        entryPath = cls._get_entry_path(key)
+        try:
+            storedTime = os.path.getmtime(entryPath)
+            if cls._is_expired(storedTime, time.time()):
+                os.remove(entryPath)
+                return None
+
+            entry = fileops.get_json_dict(entryPath)
+            # Mark the entry as used without changing when it was stored
+            os.utime(entryPath, (time.time(), storedTime))
+        except Exception:
+            # A missing or damaged entry is simply a miss
+            return None
+
+        return entry.get(cls.OUTPUT_KEY)
+
+    @classmethod
+    def put(cls, key: str, output: str):
+        """
+        Stores the output of a run under key
+        """
+        entryPath = cls._get_entry_path(key)
+        fileops.make(fileops.get_parent_dir(entryPath),
+                fileops.FileType.DIRECTORY)
+        fileops.write_json_dict_atomically(entryPath, {cls.OUTPUT_KEY: output})
+
+    @classmethod
+    def evict(cls):
+        """
+        Removes expired entries, then the least recently used entries until
+        the cache fits its maximum size
+        """
+        cachePath = cls.get_cache_path()
+        if not fileops.exists(cachePath, fileops.FileType.DIRECTORY):
+            return
+
+        now = time.time()
+        entries = []
+        for entryPath in cls._get_entry_paths(cachePath):
+            try:
+                entryStat = os.stat(entryPath)
+                if cls._is_expired(entryStat.st_mtime, now):
+                    os.remove(entryPath)
+                else:
+                    entries.append((entryStat.st_atime, entryStat.st_size,
+                        entryPath))
+            except OSError:
+                continue
+
+        maxSize = cls.get_max_size()
+        if maxSize is None:
+            return
+
+        totalSize = sum(entrySize for _, entrySize, _ in entries)
+        for _, entrySize, entryPath in sorted(entries):
+            if totalSize <= maxSize:
+                break
+
+            totalSize -= entrySize
+            fileops.remove(entryPath, fileops.FileType.FILE)
+
+    @classmethod
+    def _is_expired(cls, storedTime: float, now: float) -> bool:
+        ttl = cls.get_ttl()
+        return not ttl is None and now - storedTime > ttl
+
+    @staticmethod
+    def _get_entry_paths(cachePath: str):
+        for directory, _, fileNames in os.walk(cachePath):
+            for fileName in fileNames:
+                yield fileops.join_path(directory, fileName)
+
+    @classmethod
+    def _get_entry_path(cls, key: str) -> str:
+        # Spread the entries over subdirectories to keep directories small
+        return fileops.join_path(cls.get_cache_path(), key[:2], key)
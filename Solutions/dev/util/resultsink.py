@@ -0,0 +1,215 @@
+################################################################################
+# Filename: util/resultsink.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains the result sinks, which write test results to a file in a machine
+# readable format as they are reported instead of collecting the whole run in
+# memory
+################################################################################
+from util import fileops
+from util.definitions import Definitions
+from util.pathmapper import PathMapper
+from util.perror import PyCException
+from xml.sax.saxutils import escape, quoteattr
+import json
+import re
+
+class ResultSink:
+    """
+    Writes the results of a test run to a file. Each result must provide
+    to_dict() and expose solution, status, message and output. Subclasses
+    implement _write_header, _write_result and _write_footer
+    """
+    FORMAT = None
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = None
+
+    def open(self):
+        parentDirectory = fileops.get_parent_dir(self._path)
+        if not parentDirectory == '':
+            fileops.make(parentDirectory, fileops.FileType.DIRECTORY)
+        self._file = open(self._path, 'w', encoding='utf-8')
+        self._write_header()
+
+    def write(self, result):
+        """
+        Writes a single result and flushes it, so the file can be followed
+        while the run is going on
+        """
+        self._write_result(result)
+        self._file.flush()
+
+    def close(self):
+        if self._file is None:
+            return
+
+        self._write_footer()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def _write_header(self):
+        pass
+
+    def _write_result(self, result):
+        raise NotImplementedError()
+
+    def _write_footer(self):
+        pass
+
+class JsonResultSink(ResultSink):
+    """
+    Writes a single JSON document of the form {"results": [...]}
+    """
+    FORMAT = 'json'
+    RESULTS_KEY = 'results'
+
+    def _write_header(self):
+        self._file.write('{{"{}":['.format(self.RESULTS_KEY))
+        self._isFirst = True
+
+    def _write_result(self, result):
+        if not self._isFirst:
+            self._file.write(',\n')
+        self._file.write(fileops.get_json_string(result.to_dict()))
+        self._isFirst = False
+
+    def _write_footer(self):
+        self._file.write(']}\n')
+
+class JsonLinesResultSink(ResultSink):
+    """
+    Writes one JSON object per line, so every line stands on its own even if
+    the run is interrupted
+    """
+    FORMAT = 'jsonl'
+
+    def _write_result(self, result):
+        self._file.write(fileops.get_json_string(result.to_dict()))
+        self._file.write('\n')
+
+class JUnitXmlResultSink(ResultSink):
+    """
+    Writes a JUnit XML report with one testsuite per solution. Results arrive
+    grouped by solution, so only the test cases of the current solution are
+    held until its testsuite element (which carries the counts) is written
+    """
+    FORMAT = 'junit'
+    # The most characters of a failing output embedded in its failure
+    MAX_OUTPUT_LENGTH = 4096
+    # Characters XML 1.0 does not allow, even escaped
+    ILLEGAL_CHARACTERS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+    def _write_header(self):
+        self._file.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+        self._solution = None
+        self._testCases = []
+        self._counts = {}
+
+    def _write_result(self, result):
+        if not result.solution is self._solution:
+            self._write_test_suite()
+            self._solution = result.solution
+
+        resultDict = result.to_dict()
+        testCase = '    <testcase classname={} name={}'.format(
+                quoteattr('{}.Problem{}.{}'.format(resultDict['writer'],
+                    resultDict['problem'], resultDict['language'])),
+                quoteattr('{} {}'.format(resultDict['caseType'],
+                    resultDict['case'])))
+        if not resultDict['wallTime'] is None:
+            testCase += ' time="{:.6f}"'.format(resultDict['wallTime'])
+
+        self._counts[result.status] = self._counts.get(result.status, 0) + 1
+        if result.status == 'PASS':
+            testCase += '/>\n'
+        elif result.status == 'SKIP':
+            testCase += '>\n      <skipped message={}/>\n    </testcase>\n'.format(
+                    quoteattr(self._get_xml_text(result.message)))
+        else:
+            testCase += '>\n      <failure message={}>{}</failure>\n    </testcase>\n'.format(
+                    quoteattr(self._get_xml_text(result.message or '')),
+                    escape(self._get_xml_text(self._get_shown_output(
+                        result.output or ''))))
+
+        self._testCases.append(testCase)
+
+    @classmethod
+    def _get_xml_text(cls, text: str) -> str:
+        """
+        Drops the characters of text that cannot appear in an XML document,
+        like the control characters a failing solution may print
+        """
+        return cls.ILLEGAL_CHARACTERS.sub('', text)
+
+    @classmethod
+    def _get_shown_output(cls, output: str) -> str:
+        """
+        Cuts output to MAX_OUTPUT_LENGTH characters, noting that it was cut
+        """
+        if len(output) <= cls.MAX_OUTPUT_LENGTH:
+            return output
+
+        return '{}\n[{} more characters]'.format(output[:cls.MAX_OUTPUT_LENGTH],
+                len(output) - cls.MAX_OUTPUT_LENGTH)
+
+    def _write_test_suite(self):
+        if self._solution is None:
+            return
+
+        solution = self._solution
+        self._file.write('  <testsuite name={} tests="{}" failures="{}" skipped="{}">\n'.format(
+            quoteattr('{}.Problem{}.{}'.format(solution.solutionWriter,
+                solution.problemNumber, solution.solutionLanguage.name)),
+            sum(self._counts.values()), self._counts.get('FAIL', 0),
+            self._counts.get('SKIP', 0)))
+        self._file.writelines(self._testCases)
+        self._file.write('  </testsuite>\n')
+        self._testCases = []
+        self._counts = {}
+
+    def _write_footer(self):
+        self._write_test_suite()
+        self._file.write('</testsuites>\n')
+
+SINK_CLASSES = [JsonResultSink, JsonLinesResultSink, JUnitXmlResultSink]
+SINK_FORMATS = [sinkClass.FORMAT for sinkClass in SINK_CLASSES]
+EXTENSION_FORMATS = {'json': JsonResultSink.FORMAT,
+        'jsonl': JsonLinesResultSink.FORMAT, 'xml': JUnitXmlResultSink.FORMAT}
+FILE_DEFINITION_KEY = 'results_file'
+
+def get_result_sink(path: str, sinkFormat: str=None) -> ResultSink:
+    """
+    Creates the sink writing to path. If no format is given it is guessed
+    from the extension of path
+
+    :raises PyCException: If the format is unknown
+    """
+    if sinkFormat is None:
+        sinkFormat = EXTENSION_FORMATS.get(fileops.get_extension(path))
+
+    for sinkClass in SINK_CLASSES:
+        if sinkClass.FORMAT == sinkFormat:
+            return sinkClass(path)
+
+    raise PyCException('Error: Cannot tell the results format of {}'.format(path))
+
+def get_default_results_path() -> str:
+    """
+    Gets the results file named in the definitions file, or None if there is
+    none
+    """
+    resultsFile = Definitions.get_value(FILE_DEFINITION_KEY)
+    if resultsFile is None:
+        return None
+
+    return PathMapper.get_mapped_path(resultsFile)
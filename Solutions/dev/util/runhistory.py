@@ -0,0 +1,136 @@
+################################################################################
+# Filename: util/runhistory.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains the RunHistory class, which remembers the verdict of every
+# (solution, case) pair along with fingerprints of everything that verdict
+# depended on
+################################################################################
+from util import checker
+from util import fileops
+from util.definitions import Definitions
+from util.pathmapper import PathMapper
+import hashlib
+import json
+
+class RunHistory:
+    FILE_DEFINITION_KEY = 'test_history_file'
+    COMPILE_KEY = 'COMPILE'
+
+    # Entry keys
+    FINGERPRINT_KEY = 'fingerprint'
+    CASES_KEY = 'cases'
+    STATUS_KEY = 'status'
+    MESSAGE_KEY = 'message'
+    OUTPUT_KEY = 'output'
+
+    # The history file is rewritten whole on every save, so only the start of
+    # a failing output is kept for printing when its result is replayed
+    MAX_OUTPUT_LENGTH = 1024
+
+    def __init__(self, path: str):
+        self._path = path
+        try:
+            self._entries = fileops.get_json_dict(path)
+        except Exception:
+            self._entries = {}
+        self._solutionFingerprints = {}
+
+    @classmethod
+    def load(cls):
+        """
+        Loads the history file named in the definitions file. Returns None if
+        no history file is defined
+        """
+        historyFile = Definitions.get_value(cls.FILE_DEFINITION_KEY)
+        if historyFile is None:
+            return None
+
+        return RunHistory(PathMapper.get_mapped_path(historyFile))
+
+    def save(self):
+        fileops.make(fileops.get_parent_dir(self._path),
+                fileops.FileType.DIRECTORY)
+        fileops.write_json_dict_atomically(self._path, self._entries)
+
+    def get_result(self, solution, case=None) -> dict:
+        """
+        Gets the recorded result of running solution against case (or of
+        compiling solution if case is None). Returns None if nothing was
+        recorded or if the solution, its language, its limits, its problem's
+        checker or the case changed since
+
+        :return: {'status': str, 'message': str, 'output': str}
+        """
+        solutionEntry = self._entries.get(solution._path)
+        if (solutionEntry is None or not solutionEntry[self.FINGERPRINT_KEY] ==
+                self._get_solution_fingerprint(solution)):
+            return None
+
+        caseEntry = solutionEntry[self.CASES_KEY].get(self._get_case_key(case))
+        if (caseEntry is None or not caseEntry[self.FINGERPRINT_KEY] ==
+                self._get_case_fingerprint(case)):
+            return None
+
+        return caseEntry
+
+    def record(self, solution, case, status: str, message: str,
+            output: str=None):
+        """
+        Records the result of running solution against case (or of compiling
+        solution if case is None), keeping at most MAX_OUTPUT_LENGTH
+        characters of its output
+        """
+        solutionFingerprint = self._get_solution_fingerprint(solution)
+        solutionEntry = self._entries.get(solution._path)
+        if (solutionEntry is None or not solutionEntry[self.FINGERPRINT_KEY] ==
+                solutionFingerprint):
+            solutionEntry = {self.FINGERPRINT_KEY: solutionFingerprint,
+                             self.CASES_KEY: {}}
+            self._entries[solution._path] = solutionEntry
+
+        solutionEntry[self.CASES_KEY][self._get_case_key(case)] = {
+                self.FINGERPRINT_KEY: self._get_case_fingerprint(case),
+                self.STATUS_KEY: status,
+                self.MESSAGE_KEY: message,
+                self.OUTPUT_KEY: (None if output is None else
+                    output[:self.MAX_OUTPUT_LENGTH])
+                }
+
+    def _get_solution_fingerprint(self, solution) -> str:
+        """
+        Hashes the solution's source together with its language configuration,
+        its execution limits and its problem's checker settings. Computed once
+        per solution per run
+        """
+        if not solution._path in self._solutionFingerprints:
+            fingerprint = hashlib.sha256()
+            with open(solution._path, 'rb') as sourceFile:
+                for chunk in iter(lambda: sourceFile.read(65536), b''):
+                    fingerprint.update(chunk)
+            fingerprint.update(json.dumps([vars(solution.solutionLanguage),
+                vars(solution.get_execution_limits()),
+                checker.get_checker_settings(solution.problemNumber)],
+                sort_keys=True).encode('utf-8'))
+            self._solutionFingerprints[solution._path] = fingerprint.hexdigest()
+
+        return self._solutionFingerprints[solution._path]
+
+    def _get_case_key(self, case) -> str:
+        if case is None:
+            return self.COMPILE_KEY
+
+        return '{}_{}_{}'.format(case.problemNumber, case.get_case_string(),
+                case.caseNumber)
+
+    @staticmethod
+    def _get_case_fingerprint(case) -> str:
+        """
+        Hashes the case's input and expected output
+        """
+        if case is None:
+            return None
+
+        return hashlib.sha256(fileops.get_json_string([case.inputContents,
+            getattr(case, 'outputContents', None)]).encode('utf-8')).hexdigest()
@@ -9,6 +9,7 @@ from util import fileops
 from util.definitions import Definitions
 from util.variables import Variables
 from util.language import Languages
+from util.execution import ExecutionLimits, ExecutionStats
 
 class Solution:
     NAMING_DEFINITION_KEY = 'solution_naming'
@@ -19,6 +20,8 @@ class Solution:
         self.problemNumber = problemNumber
         self.solutionWriter = solutionWriter
         self.solutionLanguage = solutionLanguage
+        self._limits = None
+        self._runFingerprint = None
 
     def __str__(self):
         return "Problem {} written in {}".format(str(self.problemNumber), 
@@ -34,12 +37,109 @@ class Solution:
             return ''
 
         return self.solutionLanguage.execute_code(self._path, inputContents,
-                verbose=outputToStderr)
+                verbose=outputToStderr, limits=self.get_execution_limits())
                 
 
+    async def get_output_async(self, inputContents: str,
+            outputToStderr: bool=False) -> str:
+        """
+        Like get_output, but runs the solution as an asyncio subprocess so that
+        many solutions can be in flight at once
+        """
+        if self.solutionLanguage is None:
+            return ''
+
+        return await self.solutionLanguage.execute_code_async(self._path,
+                inputContents, verbose=outputToStderr,
+                limits=self.get_execution_limits())
+
+    def get_output_with_stats(self, inputContents: str,
+            outputToStderr: bool=False, comparator=None):
+        """
+        Like get_output, but also measures the resources the solution used
+
+        :param comparator: An OutputComparator to compare the output with the
+                           expected output as it is read
+        :return: (output, ExecutionStats)
+        """
+        if self.solutionLanguage is None:
+            return '', ExecutionStats()
+
+        return self.solutionLanguage.execute_code_with_stats(self._path,
+                inputContents, verbose=outputToStderr,
+                limits=self.get_execution_limits(), comparator=comparator)
+
+    async def get_output_with_stats_async(self, inputContents: str,
+            outputToStderr: bool=False, comparator=None):
+        """
+        Like get_output_with_stats, but runs the solution as an asyncio
+        subprocess
+
+        :return: (output, ExecutionStats)
+        """
+        if self.solutionLanguage is None:
+            return '', ExecutionStats()
+
+        return await self.solutionLanguage.execute_code_with_stats_async(
+                self._path, inputContents, verbose=outputToStderr,
+                limits=self.get_execution_limits(), comparator=comparator)
+
     def compile(self, verbose=False):
         self.solutionLanguage.compile_code(self._path, verbose=verbose)
 
+    def supports_batch_compilation(self) -> bool:
+        return (not self.solutionLanguage is None and
+                self.solutionLanguage.supports_batch_compilation())
+
+    @staticmethod
+    def compile_batch(solutions: list, verbose=False) -> list:
+        """
+        Compiles solutions which all share a language with as few compiler
+        runs as the language allows
+
+        :return: The ExecutionError of each solution, or None if it compiled
+        """
+        errors = solutions[0].solutionLanguage.compile_code_batch(
+                [solution._path for solution in solutions], verbose=verbose)
+        return [errors[solution._path] for solution in solutions]
+
+    def supports_batch_execution(self) -> bool:
+        return (not self.solutionLanguage is None and
+                self.solutionLanguage.supports_batch_execution())
+
+    def open_batch_session(self, verbose=False):
+        """
+        Starts a batch session which runs many cases of this solution in a
+        single process. Returns None if the language does not support it
+        """
+        if not self.supports_batch_execution():
+            return None
+
+        return self.solutionLanguage.open_batch_session(self._path,
+                verbose=verbose, limits=self.get_execution_limits())
+
+    def get_execution_limits(self):
+        """
+        Gets the time and memory limits this solution runs under, taken from
+        the definitions for its problem and scaled for its language
+        """
+        if self._limits is None:
+            self._limits = ExecutionLimits.for_problem(self.problemNumber,
+                    self.solutionLanguage)
+
+        return self._limits
+
+    def get_run_fingerprint(self) -> str:
+        """
+        Gets the hash of everything this solution's output depends on besides
+        its input. Must only be called once the solution has been compiled
+        """
+        if self._runFingerprint is None:
+            self._runFingerprint = self.solutionLanguage.get_run_fingerprint(
+                    self._path, self.get_execution_limits())
+
+        return self._runFingerprint
+
     @staticmethod
     def is_solution_file(path):
         """
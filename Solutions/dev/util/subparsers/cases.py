@@ -0,0 +1,38 @@
+################################################################################
+# Filename: util/subparsers/cases.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains logic for the subparser that is invoked when calling
+#  $ ./runner.py cases
+################################################################################
+from util.subparsers.subparsers import casescompile as casesCompileSubparser
+
+SUBPARSER_KEYWORD = 'cases'
+
+def operate(args):
+    """
+    Takes the passed in args and delegates to the proper functionality. This
+    is set as the executable function when the `cases` subparser is used
+
+    Arguments:
+    args: Namespace - The arguments passed via CLI
+    """
+    # Display a warning to the user
+    print('Error: No cases submodule provided. Use --help for more information')
+
+def add_to_subparser_object(subparserObject, parentParser):
+    """
+    Adds the cases subparser to a given subparsers object and delegates cases
+    functionality to the operate() function.
+
+    Arguments:
+    subparserObject - The ArgumentParser given by parser.add_subparsers() to add
+                      the cases subparser to.
+    parentParser    - The parser to be included as a parent to the subparser,
+                      useful for global flags
+    """
+    casesParser = subparserObject.add_parser(SUBPARSER_KEYWORD, parents=[parentParser])
+    casesParser.set_defaults(func=operate)
+    subparsers = casesParser.add_subparsers()
+    casesCompileSubparser.add_to_subparser_object(subparsers, parentParser)
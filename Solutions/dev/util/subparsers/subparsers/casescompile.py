@@ -0,0 +1,50 @@
+################################################################################
+# Filename: util/subparsers/subparsers/casescompile.py
+# Author:   Brandon Milton, http://brandonio21.com
+# Date:     18 October 2026
+#
+# Contains logic for the subparser that is invoked when calling
+# $ ./runner.py cases compile
+################################################################################
+from util import case as CaseManager
+from util.perror import PyCException
+SUBPARSER_KEYWORD = 'compile'
+
+def operate(args):
+    """
+    Takes the passed in args and delegates to the proper functionality. This is
+    set as the executable function when `cases compile` subparser is used
+
+    Arguments:
+    args: Namespace - The arguments passed via CLI
+    """
+    compile_cases()
+
+def add_to_subparser_object(subparserObject, parentParser):
+    """
+    Adds the compile subparser to a given subparsers object and delegates
+    compile functionality to the operate() function.
+
+    Arguments:
+    subparserObject - The ArgumentParser given by parser.add_subparsers() to add
+                      the compile subparser to.
+    parentParser    - The parser to be included as a parent to the subparser,
+                      useful for global flags.
+    """
+    compileParser = subparserObject.add_parser(SUBPARSER_KEYWORD,
+                                               parents=[parentParser])
+    compileParser.set_defaults(func=operate)
+
+def compile_cases():
+    """
+    Compiles every case in the cases directory into the case pack, which runs
+    then read instead of the JSON case files. The pack is kept up to date by
+    the runs that use it
+    """
+    packPath = CaseManager.CasePack.get_path()
+    if packPath is None:
+        raise PyCException('Error: cases compile requires {} to be defined'.format(
+            CaseManager.CasePack.FILE_DEFINITION_KEY))
+
+    caseCount = CaseManager.compile_case_pack(packPath)
+    print('Compiled {} cases into {}'.format(caseCount, packPath))
@@ -8,13 +8,36 @@
 ################################################################################
 from util.writer import Writer, Writers
 from util import case as CaseManager
-from util.language import ExecutionError
+from util.language import AppliedLanguage, ExecutionError
+from util.execution import CorePool, ExecutionStats, Reaper
 from util.case import KnownCase
 from util.perror import PyCException
+from util.runhistory import RunHistory
+from util.resultcache import ResultCache
+from util.comparison import OutputComparator
+from util import checker as CheckerManager
+from util import resultsink
+from util.definitions import Definitions
+from util.solution import Solution
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import contextlib
 import difflib
+import functools
+import itertools
+import sys
+import threading
 
 SUBPARSER_KEYWORD = "test"
 SHOW_PASSING_KEYWORD = "showpass"
+THREADS_BACKEND = "threads"
+ASYNCIO_BACKEND = "asyncio"
+MAX_TIMEOUTS_DEFINITION_KEY = "max_consecutive_timeouts"
+# The most bytes of a failing output kept for the results when it is not
+# printed whole
+KEPT_OUTPUT_SIZE = 64 * 1024
+STATS_FORMATTING_STR = ("{0: <10}\t{1: <10}\t{2: <10}\t{3: <10}\t{4: <10}\t"
+        "{5: <10}\t{6: <10}\t{7: <10}\t{8: <10}\t{9}")
 
 headerPrinted = False
 
@@ -27,8 +50,20 @@ def operate(args):
     args: Namespace - The arguments pased via CLI
     """
     writerList = args.writers
+    resultsPath = args.results
+    if resultsPath is None and args.file:
+        resultsPath = resultsink.get_default_results_path()
+        if resultsPath is None:
+            raise PyCException('Error: --file requires {} to be defined'.format(
+                resultsink.FILE_DEFINITION_KEY))
+
     test(writerList, args.language, args.problems, args.verbose, args.showpass,
-            args.diff)
+            args.diff, jobs=args.jobs, useBatch=not args.nobatch,
+            onlyChanged=args.changed, backend=args.backend,
+            printStats=args.stats, resultsPath=resultsPath,
+            resultsFormat=args.results_format, failFast=args.fail_fast,
+            maxFailures=args.max_failures, useCache=not args.nocache,
+            compileJobs=args.compile_jobs, pinCores=args.pin_cores)
 
 def add_to_subparser_object(subparserObject, parentParser):
     """
@@ -45,6 +80,33 @@ def add_to_subparser_object(subparserObject, parentParser):
     testParser.add_argument('writers', nargs='*')
     testParser.add_argument('--showpass', action='store_true')
     testParser.add_argument('--diff', action='store_true')
+    testParser.add_argument('--jobs', type=int, default=1,
+            help='The number of solution cases to run concurrently')
+    testParser.add_argument('--compile-jobs', type=int,
+            help='The number of solutions to compile concurrently, by default --jobs')
+    testParser.add_argument('--pin-cores', action='store_true',
+            help='Pin every worker to its own (isolated) core for stable timings, running at most one job per core')
+    testParser.add_argument('--nobatch', action='store_true',
+            help='Run every case in its own process')
+    testParser.add_argument('--nocache', action='store_true',
+            help='Run every case even if its output is already cached (implied by --stats)')
+    testParser.add_argument('--changed', action='store_true',
+            help='Only rerun solutions and cases that changed since the last '
+            'run with --changed')
+    testParser.add_argument('--backend', default=THREADS_BACKEND,
+            choices=[THREADS_BACKEND, ASYNCIO_BACKEND],
+            help='Run solution processes on worker threads or on an asyncio event loop')
+    testParser.add_argument('--stats', action='store_true',
+            help='Show the time and memory each case used, running every case in its own process')
+    testParser.add_argument('--results',
+            help='Write every result and its measurements to this file')
+    testParser.add_argument('--results-format',
+            choices=resultsink.SINK_FORMATS,
+            help='The format of the results file, by default guessed from its extension')
+    testParser.add_argument('--fail-fast', action='store_true',
+            help='Skip the remaining cases of a solution once one fails')
+    testParser.add_argument('--max-failures', type=int,
+            help='Stop the whole run after this many failures')
     testParser.set_defaults(func=operate)
 
 def _get_loaded_writers(writerNames: list = None) -> list:
@@ -127,76 +189,815 @@ def _get_filtered_solutions(writerNames: list, languageNames: list,
 
     return solutionsToTest
 
-def _test_solution_against_cases(solution, cases:list, outputToStderr: bool,
-        printPassingCases: bool, printDiff: bool):
+class CaseResult:
     """
-    Tests a single solution against a list of cases and outputs results
-    to stdout. 
+    Stores the outcome of running a single solution against a single case (or
+    of compiling the solution, in which case no case is attached)
+    """
+    COMPILE_KEYWORD = 'COMPILE'
 
-    Arguments:
-    solution    - The solution to test
-    cases: list - The list of cases to test the solution against
+    def __init__(self, solution, case, status: str, message: str,
+            output: str=None, stats=None):
+        self.solution = solution
+        self.case = case
+        self.status = status
+        self.message = message
+        self.output = output
+        self.stats = stats
+
+    def get_case_string(self) -> str:
+        return (self.COMPILE_KEYWORD if self.case is None
+                else self.case.get_case_string())
+
+    def get_case_number(self):
+        return self.COMPILE_KEYWORD if self.case is None else self.case.caseNumber
+
+    def is_timeout(self) -> bool:
+        return (self.status == 'FAIL' and
+                self.message == ExecutionError.TIME_LIMIT_EXCEEDED)
+
+    def to_dict(self) -> dict:
+        """
+        Gets the result in the form written to the results file
+        """
+        resultDict = {'writer': self.solution.solutionWriter,
+                'problem': self.solution.problemNumber,
+                'language': self.solution.solutionLanguage.name,
+                'caseType': self.get_case_string(),
+                'case': self.get_case_number(),
+                'status': self.status,
+                'message': self.message}
+        resultDict.update(self.stats.to_dict() if not self.stats is None
+                else ExecutionStats().to_dict())
+        return resultDict
+
+class FailurePolicy:
+    """
+    Decides which cases are no longer worth running, given the failures
+    reported so far. Results are recorded in the order they are reported, so
+    the cases skipped do not depend on how many jobs are running. Workers only
+    ask the policy whether to bother running a case; once a solution is being
+    skipped (or the run is stopped) it stays that way, so a worker never skips
+    a case the reporter would not
+    """
+
+    def __init__(self, failFast: bool=False, maxFailures: int=None,
+            maxConsecutiveTimeouts: int=None):
+        """
+        :param failFast: Whether to skip a solution's cases after one fails
+        :param maxFailures: The failures after which the run stops, if any
+        :param maxConsecutiveTimeouts: The timeouts in a row after which a
+                                       solution's cases are skipped, if any
+        """
+        self.failFast = failFast
+        self.maxFailures = maxFailures
+        self.maxConsecutiveTimeouts = maxConsecutiveTimeouts
+        self._lock = threading.Lock()
+        self._failureCount = 0
+        self._consecutiveTimeouts = {}
+        self._skipMessages = {}
+
+    @classmethod
+    def load(cls, failFast: bool=False, maxFailures: int=None):
+        """
+        Creates the policy, taking the timeout limit from the definitions file
+        """
+        maxTimeouts = Definitions.get_value(MAX_TIMEOUTS_DEFINITION_KEY)
+        return FailurePolicy(failFast, maxFailures,
+                maxTimeouts if maxTimeouts else None)
+
+    def is_stopped(self) -> bool:
+        return (not self.maxFailures is None and
+                self._failureCount >= self.maxFailures)
+
+    def get_skip_message(self, solution) -> str:
+        """
+        Gets why the remaining cases of solution are skipped, or None if they
+        should still be run
+        """
+        if self.is_stopped():
+            return 'Skipped after {} failures'.format(self.maxFailures)
+        with self._lock:
+            return self._skipMessages.get(solution)
+
+    def get_skipped_result(self, solution, case):
+        """
+        Gets the SKIP CaseResult of case if it should not be run, else None
+        """
+        skipMessage = self.get_skip_message(solution)
+        if skipMessage is None:
+            return None
+
+        return CaseResult(solution, case, 'SKIP', skipMessage)
+
+    def record(self, result):
+        """
+        Records a reported result, deciding whether the rest of its
+        solution's cases should be skipped
+        """
+        with self._lock:
+            if result.status == 'FAIL':
+                self._failureCount += 1
+            if result.status == 'SKIP' or result.solution in self._skipMessages:
+                return
+
+            solution = result.solution
+            self._consecutiveTimeouts[solution] = (self._consecutiveTimeouts.get(
+                solution, 0) + 1 if result.is_timeout() else 0)
+            if self.failFast and result.status == 'FAIL':
+                self._skipMessages[solution] = 'Skipped after a failure'
+            elif (not self.maxConsecutiveTimeouts is None and
+                    self._consecutiveTimeouts[solution] >=
+                    self.maxConsecutiveTimeouts):
+                self._skipMessages[solution] = 'Skipped after {} timeouts'.format(
+                        self.maxConsecutiveTimeouts)
+
+def _compile_solution(solution, outputToStderr: bool):
     """
-    # First, print the header
-    # Writer    Problem   Language  CaseType    Case#   Status  Message
-    formattingStr = "{0: <10}\t{1: <10}\t{2: <10}\t{3: <10}\t{4: <10}\t{5: <10}\t{6}"
+    Compiles a single solution. Returns a failing CaseResult if compilation
+    failed, otherwise None
 
-    # Compile first
+    Arguments:
+    solution             - The solution to compile
+    outputToStderr: bool - Whether compiler output should be shown
+    """
     try:
         solution.compile(verbose=outputToStderr)
     except ExecutionError as e:
-        _print_header_if_not_printed()
-        print(formattingStr.format(solution.solutionWriter, 
-            solution.problemNumber, solution.solutionLanguage.name, "COMPILE",
-            "COMPILE", 'FAIL', 'Compile Error'))
-        return
+        return CaseResult(solution, None, 'FAIL', 'Compile Error')
 
-    for case in cases:
-        if (outputToStderr):
-            print("Testing problem {} case {}".format(solution.problemNumber,
+    return None
+
+def _compile_solution_batch(solutions: list, outputToStderr: bool) -> list:
+    """
+    Compiles solutions of a single language together. Returns a failing
+    CaseResult for each solution that failed to compile, otherwise None
+
+    Arguments:
+    solutions: list      - The solutions to compile
+    outputToStderr: bool - Whether compiler output should be shown
+    """
+    return [None if error is None else
+            CaseResult(solution, None, 'FAIL', 'Compile Error')
+            for solution, error in zip(solutions, Solution.compile_batch(
+                solutions, verbose=outputToStderr))]
+
+def _set_batch_results(futures: list, batchFuture):
+    """
+    Passes the outcome of compiling a batch on to the futures of the
+    solutions in it
+    """
+    if batchFuture.cancelled():
+        for future in futures:
+            future.cancel()
+    elif not batchFuture.exception() is None:
+        for future in futures:
+            future.set_exception(batchFuture.exception())
+    else:
+        for future, result in zip(futures, batchFuture.result()):
+            future.set_result(result)
+
+class CompileStage:
+    """
+    Compiles solutions on its own pool of workers ahead of the runners that
+    execute them, so that compilers run while earlier solutions' cases do.
+    Runners wait only for the solution they are about to run
+    """
+
+    def __init__(self, outputToStderr: bool, compileJobs: int=1):
+        self.outputToStderr = outputToStderr
+        self._executor = ThreadPoolExecutor(max_workers=max(compileJobs, 1))
+        self._futures = {}
+
+    def submit(self, solution):
+        if not solution in self._futures:
+            self._futures[solution] = self._executor.submit(_compile_solution,
+                    solution, self.outputToStderr)
+
+    def submit_all(self, solutions: list):
+        """
+        Submits many solutions. The solutions a writer wrote in a language
+        whose compiler takes many sources at once (like javac) are compiled
+        in a single run, so the compiler only starts once per writer
+        """
+        batches = {}
+        for solution in solutions:
+            if solution in self._futures:
+                continue
+            if solution.supports_batch_compilation():
+                batches.setdefault((solution.solutionWriter,
+                    solution.solutionLanguage.name), []).append(solution)
+            else:
+                self.submit(solution)
+
+        for batch in batches.values():
+            if len(batch) == 1:
+                self.submit(batch[0])
+                continue
+
+            futures = [Future() for _ in batch]
+            for solution, future in zip(batch, futures):
+                self._futures[solution] = future
+            self._executor.submit(_compile_solution_batch, batch,
+                    self.outputToStderr).add_done_callback(
+                            functools.partial(_set_batch_results, futures))
+
+    def get_future(self, solution):
+        """
+        Gets the future of compiling solution, submitting it if needed. Its
+        result is a failing CaseResult if compilation failed, otherwise None
+        """
+        self.submit(solution)
+        return self._futures[solution]
+
+    def get_result(self, solution):
+        return self.get_future(solution).result()
+
+    def shutdown(self):
+        """
+        Cancels the compilations that have not started and waits for the rest
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+def _get_solution_plans(solutions: list, cases: dict, replayHistory,
+        compileStage) -> list:
+    """
+    Works out what is left to do for every solution and submits every
+    solution with cases left to run to the compile stage, in order
+
+    Arguments:
+    solutions: list - The solutions to test
+    cases: dict     - The cases to test against (lists or CaseStreams), keyed
+                      by problem number
+    replayHistory   - The RunHistory to replay unchanged results from, if any
+    compileStage    - The CompileStage to compile the solutions on
+
+    Return:
+    [(solution, [cases], compile CaseResult or None, {case: CaseResult},
+      [cases still to run])]
+    """
+    solutionPlans = []
+    solutionsToCompile = []
+    for solution in solutions:
+        solutionCases = cases[int(solution.problemNumber)]
+        compileResult, replayedResults, casesToRun = _get_replayed_results(
+                solution, solutionCases, replayHistory)
+        # A CaseStream reads its first case once, for all of its solutions
+        if not casesToRun:
+            casesToRun = []
+        elif compileResult is None:
+            solutionsToCompile.append(solution)
+        solutionPlans.append((solution, solutionCases, compileResult,
+            replayedResults, casesToRun))
+
+    compileStage.submit_all(solutionsToCompile)
+    return solutionPlans
+
+def _record_compiled(solution, reporter):
+    if not reporter.history is None:
+        reporter.history.record(solution, None, 'PASS', None)
+
+def _get_result_cache_key(solution, case) -> str:
+    """
+    Gets the result cache key of running solution against case, or None if
+    the solution's artifacts cannot be read
+    """
+    try:
+        return ResultCache.get_key(solution.get_run_fingerprint(),
+                case.inputContents)
+    except OSError:
+        return None
+
+def _run_solution_case(solution, case, outputToStderr: bool,
+        batchSession=None, useCache: bool=False, keepOutput: bool=True):
+    """
+    Runs a single (already compiled) solution against a single case. Returns
+    the CaseResult, or None if the case has no known output to compare with
+
+    Arguments:
+    solution             - The solution to run
+    case                 - The case to run the solution against
+    outputToStderr: bool - Whether the solution's stderr should be shown
+    batchSession         - The batch session to run the case through, if any
+    useCache: bool       - Whether to reuse and store outputs in the
+                           ResultCache
+    keepOutput: bool     - Whether a failing output is kept whole
+    """
+    cacheKey = _get_result_cache_key(solution, case) if useCache else None
+    if not cacheKey is None:
+        cachedOutput = ResultCache.get(cacheKey)
+        if not cachedOutput is None:
+            return _get_case_result(solution, case, cachedOutput)
+
+    comparator = _get_output_comparator(solution, case, keepOutput)
+    try:
+        if batchSession is None:
+            solutionOutput, stats = solution.get_output_with_stats(
+                    case.inputContents, outputToStderr=outputToStderr,
+                    comparator=comparator)
+        else:
+            solutionOutput, stats = batchSession.get_output_with_stats(
+                    case.inputContents, comparator=comparator)
+    except ExecutionError as e:
+        return CaseResult(solution, case, 'FAIL', e.message, stats=e.stats)
+
+    if not cacheKey is None:
+        ResultCache.put(cacheKey, solutionOutput)
+    return _get_case_result(solution, case, solutionOutput, stats, comparator)
+
+def _get_output_comparator(solution, case, keepOutput: bool=True):
+    """
+    Creates the OutputComparator a solution's output is compared with the
+    case's expected output by while it is read, or None if the case has no
+    known output. Unless the output is kept whole or the problem's checker
+    reads it, only the start of a failing output is kept
+    """
+    if not isinstance(case, KnownCase):
+        return None
+
+    keepOutput = keepOutput or CheckerManager.get_checker(
+            solution.problemNumber).USES_OUTPUT
+    # The expected output is compared encoded, so a packed output is only
+    # decoded if a matching output is used
+    encodedOutput = case.get_encoded_output()
+    return OutputComparator(case.get_decoded_output(), encodedOutput,
+            None if keepOutput else KEPT_OUTPUT_SIZE)
+
+def _get_case_result(solution, case, solutionOutput: str, stats=None,
+        comparator=None):
+    """
+    Compares the output of a solution with the expected output of a case.
+    Returns the CaseResult, or None if the case has no known output
+
+    Arguments:
+    solution            - The solution that produced the output
+    case                - The case the solution was run against
+    solutionOutput: str - The output of the solution
+    stats               - The ExecutionStats of the run, if measured
+    comparator          - The OutputComparator the output was fed to while
+                          it was read, if any
+    """
+    if not isinstance(case, KnownCase):
+        return None
+
+    try:
+        accepted = CheckerManager.get_checker(solution.problemNumber).check(
+                case, solutionOutput, comparator)
+    except CheckerManager.CheckerError:
+        return CaseResult(solution, case, 'FAIL', 'Checker Error',
+                solutionOutput, stats)
+
+    if accepted:
+        return CaseResult(solution, case, 'PASS', 'Correct Solution',
+                solutionOutput, stats)
+    else:
+        return CaseResult(solution, case, 'FAIL', 'Incorrect Solution',
+                solutionOutput, stats)
+
+def _iter_solution_case_results(solution, cases, outputToStderr: bool,
+        useBatch: bool, policy=None, useCache: bool=False, onCase=None,
+        keepOutput: bool=True):
+    """
+    Lazily runs a single (already compiled) solution against a list of cases,
+    yielding a result (or None) for each case in order. Solutions whose
+    language has a batch harness run all of their cases in one process
+
+    Arguments:
+    solution             - The solution to run
+    cases                - The cases (a list or a CaseStream) to run the
+                           solution against, which are iterated only once
+    outputToStderr: bool - Whether the solution's stderr should be shown
+    useBatch: bool       - Whether a batch harness may be used
+    policy               - The FailurePolicy deciding which cases to skip
+    useCache: bool       - Whether to use the ResultCache
+    onCase               - Called with each case before it is run, if given
+    keepOutput: bool     - Whether failing outputs are kept whole
+    """
+    # Look ahead just far enough to know whether there is more than one case
+    cases = iter(cases)
+    firstCases = list(itertools.islice(cases, 2))
+    batchSession = None
+    if useBatch and len(firstCases) > 1:
+        batchSession = solution.open_batch_session(verbose=outputToStderr)
+
+    try:
+        for case in itertools.chain(firstCases, cases):
+            if not onCase is None:
+                onCase(case)
+            skippedResult = (None if policy is None else
+                    policy.get_skipped_result(solution, case))
+            if not skippedResult is None:
+                yield skippedResult
+                continue
+
+            yield _run_solution_case(solution, case, outputToStderr,
+                    batchSession, useCache, keepOutput)
+    finally:
+        if not batchSession is None:
+            batchSession.close()
+
+def _pin_core(corePool):
+    """
+    Holds a core of the pool for the calling worker, if cores are pinned
+    """
+    return contextlib.nullcontext() if corePool is None else corePool.pin()
+
+def _get_case_group_results(solution, cases: list, outputToStderr: bool,
+        useBatch: bool, policy=None, useCache: bool=False,
+        corePool=None, keepOutput: bool=True) -> list:
+    """
+    Runs a solution against a group of cases on a worker of the parallel
+    runner, pinned to a core of corePool if it is given
+    """
+    with _pin_core(corePool):
+        return list(_iter_solution_case_results(solution, cases,
+            outputToStderr, useBatch, policy, useCache,
+            keepOutput=keepOutput))
+
+class ResultReporter:
+    """
+    Prints CaseResults to stdout following the filters provided, records
+    them in the test history if one is being kept and writes them to the
+    result sink if one was asked for
+    """
+
+    def __init__(self, outputToStderr: bool, printPassingCases: bool,
+            printDiff: bool, history=None, printStats: bool=False,
+            sink=None, policy=None):
+        self.outputToStderr = outputToStderr
+        self.printPassingCases = printPassingCases
+        self.printDiff = printDiff
+        self.history = history
+        self.printStats = printStats
+        self.sink = sink
+        self.policy = policy if not policy is None else FailurePolicy()
+
+    def report_testing(self, case):
+        """
+        Prints which case is about to be reported on, if output is verbose
+        """
+        if self.outputToStderr:
+            print("Testing problem {} case {}".format(case.problemNumber,
                 case.caseNumber))
 
-        solutionOutput = ""
-        try:
-            solutionOutput = solution.get_output(case.inputContents,
-                    outputToStderr=outputToStderr)
+    def is_stopped(self) -> bool:
+        return self.policy.is_stopped()
 
-        except ExecutionError as e:
-            _print_header_if_not_printed()
-            print(formattingStr.format(solution.solutionWriter,
-                solution.problemNumber, solution.solutionLanguage.name, 
-                case.get_case_string(), case.caseNumber, 'FAIL',
-                e.message))
-            continue
+    def prints_output(self) -> bool:
+        """
+        Checks whether failing outputs are printed whole, which verbose
+        output and diffs do
+        """
+        return self.outputToStderr or self.printDiff
 
-        if not isinstance(case, KnownCase):
-            continue
+    def report(self, result):
+        """
+        Prints and records a single CaseResult. None results, and all results
+        once the run is stopped, are ignored. Cases the policy skips are
+        reported as skipped even if they were run
+        """
+        if result is None or self.is_stopped():
+            return
+
+        if not result.case is None:
+            result = (self.policy.get_skipped_result(result.solution,
+                result.case) or result)
+        self.policy.record(result)
+
+        if not self.history is None and not result.status == 'SKIP':
+            self.history.record(result.solution, result.case, result.status,
+                    result.message, result.output if result.status == "FAIL"
+                    else None)
+        if not self.sink is None:
+            self.sink.write(result)
 
-        resultsStr = "PASS" if solutionOutput == case.outputContents else "FAIL"
-        commentStr = "Correct Solution" if resultsStr == "PASS" else "Incorrect Solution"
-        if resultsStr == "PASS" and not printPassingCases:
-            if outputToStderr:
+        self._print(result)
+
+    def report_stopped(self):
+        """
+        Prints why the run stopped early, if it did, to stderr so that it
+        stays out of the results table
+        """
+        if self.is_stopped():
+            print("Stopped after {} failures".format(self.policy.maxFailures),
+                    file=sys.stderr)
+
+    def _print(self, result):
+        # Writer    Problem   Language  CaseType    Case#   Status  Message
+        formattingStr = "{0: <10}\t{1: <10}\t{2: <10}\t{3: <10}\t{4: <10}\t{5: <10}\t{6}"
+        if self.printStats:
+            # ... Status  Time  CPU  Memory  Message
+            formattingStr = STATS_FORMATTING_STR
+        solution = result.solution
+        if result.status == "PASS" and not self.printPassingCases:
+            if self.outputToStderr:
                 print(">Passed")
-            continue
-        if outputToStderr:
-            print("User Output: {}".format(solutionOutput))
-            print("Correct Output: {}".format(case.outputContents))
-
-        _print_header_if_not_printed()
-        print(formattingStr.format(solution.solutionWriter,
-            solution.problemNumber, solution.solutionLanguage.name,
-            case.get_case_string(), case.caseNumber, resultsStr, commentStr))
-        
-        if printDiff:
-            userLines = solutionOutput.splitlines()
-            solutionLines = case.outputContents.splitlines()
+            return
+        if result.status == "SKIP" and not self.printPassingCases:
+            return
+
+        # Only solutions that produced output have anything to compare
+        hasOutput = not result.output is None
+        if self.outputToStderr and hasOutput:
+            print("User Output: {}".format(result.output))
+            print("Correct Output: {}".format(result.case.outputContents))
+
+        _print_header_if_not_printed(self.printStats)
+        columns = [solution.solutionWriter, solution.problemNumber,
+                solution.solutionLanguage.name, result.get_case_string(),
+                result.get_case_number(), result.status]
+        if self.printStats:
+            columns.extend(_get_stats_columns(result.stats))
+        columns.append(result.message)
+        print(formattingStr.format(*columns))
+
+        if self.printDiff and hasOutput and result.status == "FAIL":
+            userLines = result.output.splitlines()
+            solutionLines = result.case.outputContents.splitlines()
             for line in difflib.unified_diff(userLines, solutionLines, 
                     lineterm="", fromfile="User Solution", tofile="Correct Solution"):
                 print(line)
 
+def _get_replayed_results(solution, cases: list, history):
+    """
+    Looks up the results of a solution that are still valid in the test
+    history, so that they do not need to be run again
+
+    Arguments:
+    solution    - The solution to look up
+    cases: list - The cases the solution is tested against
+    history     - The RunHistory to look in, or None to replay nothing
+
+    Return:
+    (compile CaseResult or None, {case: CaseResult}, [cases still to run])
+    """
+    if history is None:
+        return None, {}, cases
+
+    compileEntry = history.get_result(solution)
+    if not compileEntry is None and compileEntry[history.STATUS_KEY] == 'FAIL':
+        return (CaseResult(solution, None, compileEntry[history.STATUS_KEY],
+            compileEntry[history.MESSAGE_KEY]), {}, [])
+
+    replayedResults = {}
+    casesToRun = []
+    for case in cases:
+        caseEntry = history.get_result(solution, case)
+        if caseEntry is None:
+            casesToRun.append(case)
+        else:
+            replayedResults[case] = CaseResult(solution, case,
+                    caseEntry[history.STATUS_KEY],
+                    caseEntry[history.MESSAGE_KEY],
+                    caseEntry[history.OUTPUT_KEY])
+
+    return None, replayedResults, casesToRun
+
+def _test_solution_against_cases(solutionPlan, reporter, compileStage,
+        useBatch: bool=True, useCache: bool=False):
+    """
+    Tests a single solution against a list of cases and outputs results
+    to stdout. 
+
+    Arguments:
+    solutionPlan  - The solution's entry from _get_solution_plans
+    reporter      - The ResultReporter to report results to
+    compileStage  - The CompileStage the solution is compiled on
+    useCache      - Whether to use the ResultCache
+    """
+    if reporter.is_stopped():
+        return
+
+    (solution, cases, compileResult, replayedResults,
+            casesToRun) = solutionPlan
+
+    # Wait for the compile, unless there is nothing left to run
+    if compileResult is None and casesToRun:
+        compileResult = compileStage.get_result(solution)
+        if compileResult is None:
+            _record_compiled(solution, reporter)
+    if not compileResult is None:
+        reporter.report(compileResult)
+        return
+
+    # Cached outputs are stored whole
+    keepOutput = useCache or reporter.prints_output()
+    if len(replayedResults) == 0:
+        # Run the cases as they are read, so that the first case of a
+        # CaseStream runs before the rest of its files are read
+        with contextlib.closing(_iter_solution_case_results(solution,
+                casesToRun, reporter.outputToStderr, useBatch,
+                reporter.policy, useCache, reporter.report_testing,
+                keepOutput)) as caseResults:
+            for caseResult in caseResults:
+                reporter.report(caseResult)
+                if reporter.is_stopped():
+                    return
+        return
+
+    caseResults = _iter_solution_case_results(solution, casesToRun,
+            reporter.outputToStderr, useBatch, reporter.policy, useCache,
+            keepOutput=keepOutput)
+    for case in cases:
+        if reporter.is_stopped():
+            caseResults.close()
+            return
+        if case in replayedResults:
+            reporter.report(replayedResults[case])
+            continue
+
+        reporter.report_testing(case)
+        reporter.report(next(caseResults))
+
+def _test_solutions_in_parallel(solutionPlans: list, jobs: int, reporter,
+        compileStage, useBatch: bool=True, useCache: bool=False,
+        corePool=None):
+    """
+    Tests a list of solutions against their cases using a pool of jobs workers.
+    The cases of every solution are scheduled as soon as it has been compiled
+    by the compile stage, and results are printed in the same order the serial
+    runner would print them. Solutions run through a batch harness are
+    scheduled as a single job.
+
+    Arguments:
+    solutionPlans: list - The plans from _get_solution_plans
+    jobs: int           - The number of workers to run concurrently
+    reporter            - The ResultReporter to report results to
+    compileStage        - The CompileStage the solutions are compiled on
+    useCache            - Whether to use the ResultCache
+    corePool            - The CorePool workers are pinned to, if any
+    """
+    outputToStderr = reporter.outputToStderr
+    keepOutput = useCache or reporter.prints_output()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # Schedule the cases of each solution once it has been compiled
+        resultFutures = []
+        for (solution, solutionCases, compileResult, replayedResults,
+                casesToRun) in solutionPlans:
+            if compileResult is None and len(casesToRun) > 0:
+                compileResult = compileStage.get_result(solution)
+                if compileResult is None:
+                    _record_compiled(solution, reporter)
+            if not compileResult is None:
+                resultFutures.append((compileResult, [], {}, []))
+                continue
+
+            if useBatch and solution.supports_batch_execution():
+                caseGroups = [casesToRun]
+            else:
+                caseGroups = [[case] for case in casesToRun]
+
+            groupFutures = {}
+            for caseGroup in caseGroups:
+                groupFuture = executor.submit(_get_case_group_results,
+                        solution, caseGroup, outputToStderr, useBatch,
+                        reporter.policy, useCache, corePool, keepOutput)
+                for index, case in enumerate(caseGroup):
+                    groupFutures[case] = (groupFuture, index)
+
+            resultFutures.append((None, solutionCases, replayedResults,
+                groupFutures))
+
+        # Print the results in the order they were scheduled
+        for (compileResult, solutionCases, replayedResults,
+                groupFutures) in resultFutures:
+            reporter.report(compileResult)
+            for case in solutionCases:
+                if reporter.is_stopped():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return
+                if case in replayedResults:
+                    reporter.report(replayedResults[case])
+                    continue
+
+                groupFuture, index = groupFutures[case]
+                reporter.report_testing(case)
+                reporter.report(groupFuture.result()[index])
+
+async def _run_solution_case_async(solution, case, outputToStderr: bool,
+        semaphore, policy=None, useCache: bool=False, corePool=None,
+        keepOutput: bool=True):
+    """
+    Runs a single (already compiled) solution against a single case on the
+    event loop, waiting for the semaphore before starting the process
+
+    Arguments:
+    solution             - The solution to run
+    case                 - The case to run the solution against
+    outputToStderr: bool - Whether the solution's stderr should be shown
+    semaphore            - The semaphore bounding the processes in flight
+    policy               - The FailurePolicy deciding which cases to skip
+    useCache: bool       - Whether to use the ResultCache
+    corePool             - The CorePool the process is pinned to, if any
+    keepOutput: bool     - Whether a failing output is kept whole
+    """
+    cacheKey = _get_result_cache_key(solution, case) if useCache else None
+    if not cacheKey is None:
+        cachedOutput = ResultCache.get(cacheKey)
+        if not cachedOutput is None:
+            return _get_case_result(solution, case, cachedOutput)
+
+    async with semaphore:
+        skippedResult = (None if policy is None else
+                policy.get_skipped_result(solution, case))
+        if not skippedResult is None:
+            return skippedResult
+        comparator = _get_output_comparator(solution, case, keepOutput)
+        try:
+            # Each case runs in its own task, so the pinned core is its own
+            with _pin_core(corePool):
+                solutionOutput, stats = (
+                        await solution.get_output_with_stats_async(
+                            case.inputContents, outputToStderr=outputToStderr,
+                            comparator=comparator))
+        except ExecutionError as e:
+            return CaseResult(solution, case, 'FAIL', e.message, stats=e.stats)
+
+    if not cacheKey is None:
+        ResultCache.put(cacheKey, solutionOutput)
+    return _get_case_result(solution, case, solutionOutput, stats, comparator)
+
+async def _schedule_solution_async(solution, casesToRun: list,
+        outputToStderr: bool, semaphore, compileStage, policy=None,
+        useCache: bool=False, corePool=None, keepOutput: bool=True):
+    """
+    Waits for a single solution to be compiled by the compile stage and then
+    schedules all of its cases as tasks
+
+    Return:
+    (compile CaseResult or None, {case: task})
+    """
+    if len(casesToRun) == 0:
+        return None, {}
+
+    compileResult = await asyncio.wrap_future(
+            compileStage.get_future(solution))
+    if not compileResult is None:
+        return compileResult, {}
+
+    return None, {case: asyncio.ensure_future(_run_solution_case_async(
+        solution, case, outputToStderr, semaphore, policy, useCache,
+        corePool, keepOutput)) for case in casesToRun}
+
+async def _test_solutions_async(solutionPlans: list, jobs: int, reporter,
+        compileStage, useCache: bool=False, corePool=None):
+    """
+    Tests a list of solutions against their cases on an asyncio event loop,
+    keeping at most jobs solution processes running at once while the
+    compile stage builds the solutions. Results are reported in the same
+    order the serial runner reports them
+
+    Arguments:
+    solutionPlans: list - The plans from _get_solution_plans
+    jobs: int           - The number of processes to keep in flight
+    reporter            - The ResultReporter to report results to
+    compileStage        - The CompileStage the solutions are compiled on
+    useCache            - Whether to use the ResultCache
+    corePool            - The CorePool processes are pinned to, if any
+    """
+    semaphore = asyncio.Semaphore(jobs)
+    keepOutput = useCache or reporter.prints_output()
+    scheduledPlans = []
+    for (solution, solutionCases, compileResult, replayedResults,
+            casesToRun) in solutionPlans:
+        scheduleTask = None
+        if compileResult is None:
+            scheduleTask = asyncio.ensure_future(_schedule_solution_async(
+                solution, casesToRun, reporter.outputToStderr, semaphore,
+                compileStage, reporter.policy, useCache, corePool,
+                keepOutput))
+        scheduledPlans.append((solution, solutionCases, compileResult,
+            replayedResults, scheduleTask))
+
+    for (solution, solutionCases, compileResult, replayedResults,
+            scheduleTask) in scheduledPlans:
+        caseTasks = {}
+        if not scheduleTask is None:
+            compileResult, caseTasks = await scheduleTask
+            if compileResult is None and len(caseTasks) > 0:
+                _record_compiled(solution, reporter)
+        if not compileResult is None:
+            reporter.report(compileResult)
+            continue
+
+        for case in solutionCases:
+            if reporter.is_stopped():
+                # Leaving the event loop cancels the tasks still pending
+                return
+            if case in replayedResults:
+                reporter.report(replayedResults[case])
+                continue
+
+            reporter.report_testing(case)
+            reporter.report(await caseTasks[case])
 
 def test(writerNames: list, languageNames: list, problemStrings: list, 
-        outputToStderr: bool, printPassingCases: bool, printDiff: bool):
+        outputToStderr: bool, printPassingCases: bool, printDiff: bool,
+        jobs: int=1, useBatch: bool=True, onlyChanged: bool=False,
+        backend: str=THREADS_BACKEND, printStats: bool=False,
+        resultsPath: str=None, resultsFormat: str=None, failFast: bool=False,
+        maxFailures: int=None, useCache: bool=True, compileJobs: int=None,
+        pinCores: bool=False):
     """
     Tests solutions based on the arguments provided and outputs results to
     stdout. If all arguments are none, all solutions are tested
@@ -205,23 +1006,133 @@ def test(writerNames: list, languageNames: list, problemStrings: list,
     writerNames: list    - The list of writer names to test solutions for
     languageNames: list  - The list of language names to test solutions for
     problemStrings: list - The list of problem strings to test solutions for
+    jobs: int            - The number of solution cases to run concurrently
+    useBatch: bool       - Whether languages may use their batch harness. They
+                           never do when printing stats
+    onlyChanged: bool    - Whether to replay results of unchanged solution and
+                           case pairs from the test history instead of rerunning
+    backend: str         - How processes are run, either THREADS_BACKEND or
+                           ASYNCIO_BACKEND (which never uses a batch harness)
+    printStats: bool     - Whether to print the time and memory of each case
+    resultsPath: str     - The file to write all results to, if any
+    resultsFormat: str   - The format of the results file, one of
+                           resultsink.SINK_FORMATS (guessed if None)
+    failFast: bool       - Whether to skip the remaining cases of a solution
+                           once one of them fails
+    maxFailures: int     - The number of failures after which to stop, if any
+    useCache: bool       - Whether outputs may be reused from and stored in the
+                           ResultCache, if one is defined. It is never used
+                           when printing stats
+    compileJobs: int     - The number of solutions to compile concurrently
+                           ahead of running them (jobs if None)
+    pinCores: bool       - Whether to pin every worker to its own core of the
+                           CorePool, running at most one job per core
     """
     solutionsToTest = _get_filtered_solutions(writerNames, languageNames, 
             problemStrings)
 
-    # load all the cases
-    cases = CaseManager.get_all_cases()
+    # The history is only kept by runs that replay it, so that other runs do
+    # not fingerprint every case or rewrite the history file
+    history = RunHistory.load() if onlyChanged else None
+    if onlyChanged and history is None:
+        raise PyCException('Error: --changed requires {} to be defined'.format(
+            RunHistory.FILE_DEFINITION_KEY))
+    replayHistory = history
+
+    # load the cases of only the problems being tested. Run serially, every
+    # case is run as soon as it is read, so the cases are streamed
+    problemNumbers = set(int(solution.problemNumber) for solution in
+            solutionsToTest)
+    if backend == THREADS_BACKEND and jobs == 1 and replayHistory is None:
+        cases = CaseManager.get_case_streams(problemNumbers)
+    else:
+        cases = CaseManager.get_all_cases(problemNumbers=problemNumbers)
+    # Cases run in a warmed up batch harness are timed differently and have
+    # no memory measured, so printed stats always come from per case runs
+    useBatch = useBatch and not printStats
+    # Cached outputs carry no measurements, so runs printing stats run every
+    # case. The results of cached outputs are written without measurements
+    useCache = useCache and ResultCache.is_enabled()
+    if useCache and printStats:
+        print("Not using the result cache, since --stats measures every case",
+                file=sys.stderr)
+        useCache = False
+    sink = (None if resultsPath is None else
+            resultsink.get_result_sink(resultsPath, resultsFormat))
+    reporter = ResultReporter(outputToStderr, printPassingCases, printDiff,
+            history, printStats, sink, FailurePolicy.load(failFast, maxFailures))
 
+    corePool = None
+    if pinCores:
+        corePool = CorePool.load()
+        if corePool.get_core_count() == 0:
+            raise PyCException('Error: None of the cores in {} can be used'.format(
+                CorePool.PINNED_CORES_KEY))
+        jobs = min(jobs, corePool.get_core_count())
 
-    # Now test all of the solutions
-    for solution in solutionsToTest:
-        _test_solution_against_cases(solution, cases[int(solution.problemNumber)],
-                outputToStderr, printPassingCases, printDiff)
+    compileStage = CompileStage(outputToStderr,
+            jobs if compileJobs is None else compileJobs)
 
-def _print_header_if_not_printed():
+    if not sink is None:
+        sink.open()
+    try:
+        # Start compiling everything before the first case is run
+        solutionPlans = _get_solution_plans(solutionsToTest, cases,
+                replayHistory, compileStage)
+
+        if backend == ASYNCIO_BACKEND:
+            asyncio.run(_test_solutions_async(solutionPlans, jobs, reporter,
+                compileStage, useCache, corePool))
+            return
+
+        if jobs > 1:
+            _test_solutions_in_parallel(solutionPlans, jobs, reporter,
+                    compileStage, useBatch, useCache, corePool)
+            return
+
+        # Now test all of the solutions
+        with _pin_core(corePool):
+            for solutionPlan in solutionPlans:
+                _test_solution_against_cases(solutionPlan, reporter,
+                        compileStage, useBatch, useCache)
+    finally:
+        compileStage.shutdown()
+        AppliedLanguage.prune_builds()
+        reporter.report_stopped()
+        leakedGroupCount = Reaper.get_leaked_group_count()
+        if leakedGroupCount > 0:
+            print("Killed processes left running by {} solution runs".format(
+                leakedGroupCount), file=sys.stderr)
+        if not history is None:
+            history.save()
+        if not sink is None:
+            sink.close()
+        if useCache:
+            ResultCache.evict()
+
+def _get_stats_columns(stats) -> list:
+    """
+    Formats the wall time, CPU time and peak memory of a run for printing,
+    using - for anything that was not measured
+    """
+    if stats is None:
+        stats = ExecutionStats()
+
+    cpuTime = stats.get_cpu_time()
+    return ['-' if stats.wallTime is None else '{:.3f}s'.format(stats.wallTime),
+            '-' if cpuTime is None else '{:.3f}s'.format(cpuTime),
+            '-' if stats.peakMemory is None else '{:.1f}MB'.format(
+                stats.peakMemory / (1024 * 1024))]
+
+def _print_header_if_not_printed(printStats: bool=False):
     global headerPrinted
     if not headerPrinted:
-        formattingStr = "{0: <10}\t{1: <10}\t{2: <10}\t{3: <10}\t{4: <10}\t{5: <10}\t{6}"
-        print(formattingStr.format("Writer", "Problem", "Language", "CaseType", "Case", "Status", "Message"))
+        if printStats:
+            print(STATS_FORMATTING_STR.format("Writer", "Problem", "Language",
+                "CaseType", "Case", "Status", "Time", "CPU", "Memory",
+                "Message"))
+        else:
+            formattingStr = "{0: <10}\t{1: <10}\t{2: <10}\t{3: <10}\t{4: <10}\t{5: <10}\t{6}"
+            print(formattingStr.format("Writer", "Problem", "Language", "CaseType", "Case", "Status", "Message"))
         headerPrinted = True
 
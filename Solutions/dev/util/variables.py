@@ -20,6 +20,7 @@ class Variables:
     NAME_FILENAME_LESS_EXT = 'filename_less_extension'
     NAME_DIRECTORY = 'directory'
     NAME_LANGUAGE = 'language'
+    NAME_HARNESS_DIRECTORY = 'harness_directory'
 
     @classmethod
     def load_variables(cls):